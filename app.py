@@ -1,15 +1,24 @@
-from flask import Flask, render_template, request, send_from_directory, jsonify, send_file
-from flask_socketio import SocketIO, emit
+from flask import (Flask, render_template, request, jsonify, Response,
+                   stream_with_context)
+from flask_socketio import SocketIO, emit, join_room
+from werkzeug.security import safe_join
 import os
-import threading
-from main import (setup_chrome_driver, login, process_lessons, get_course_name,
-                   sanitize_filename, handle_alert)
+from main import open_course, process_course
+from driver_pool import DriverPool
+from blobstore import BlobStore
+from pdfindex import SearchIndex, PdfIndexer
+from fileserve import ContentHashes, send_download
 import zipfile
 import io
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
+from urllib.parse import quote
+from catalog import FileCatalog
+from watcher import is_partial_file
+from jobs import JobScheduler, JobQueueFull, RUNNING, QUEUED
+from metrics import REGISTRY, ACTIVE_JOBS, QUEUED_JOBS
+from progress import ProgressTracker
 import logging
+import sqlite3
+import threading
 import time
 
 
@@ -17,10 +26,178 @@ app = Flask(__name__)
 # Configurações do Flask-SocketIO
 socketio = SocketIO(app)
 
-# Diretório onde os arquivos baixados serão armazenados
+# Diretório onde os arquivos baixados serão armazenados (uma pasta por curso)
 DOWNLOAD_DIR = os.path.join(os.getcwd(), "downloads")
-# Variável global para controlar o estado do download
-DOWNLOAD_COMPLETE = False
+# Diretório de trabalho dos jobs em execução (uma pasta por job)
+JOBS_DIR = os.path.join(os.getcwd(), "jobs")
+# Número de jobs executados ao mesmo tempo e de jobs aguardando na fila
+MAX_JOBS = int(os.getenv("MAX_JOBS", 2))
+MAX_QUEUED_JOBS = int(os.getenv("MAX_QUEUED_JOBS", 10))
+# Número de navegadores mantidos aquecidos à espera do próximo job
+PREWARM_BROWSERS = int(os.getenv("PREWARM_BROWSERS", 1))
+# Armazenamento por conteúdo que deduplica os arquivos dos cursos; deve estar no mesmo sistema de
+# arquivos de DOWNLOAD_DIR e JOBS_DIR para que os arquivos sejam hardlinks. Vazio desativa a deduplicação.
+BLOB_STORE_DIR = os.getenv("BLOB_STORE_DIR", "")
+blob_store = BlobStore(BLOB_STORE_DIR) if BLOB_STORE_DIR else None
+# Índice de busca do texto dos PDFs em DOWNLOAD_DIR, alimentado em um pool de processos
+search_index = SearchIndex(DOWNLOAD_DIR)
+pdf_indexer = PdfIndexer(search_index)
+# Catálogo dos arquivos disponíveis em DOWNLOAD_DIR; os arquivos que saem da pasta saem também do índice de busca
+file_catalog = FileCatalog(DOWNLOAD_DIR, on_removed=search_index.remove)
+# Hashes dos arquivos em DOWNLOAD_DIR, usados como ETag e versão dos links de download
+content_hashes = ContentHashes()
+# Tamanho dos blocos lidos de cada arquivo ao gerar o .zip
+ZIP_CHUNK_SIZE = 1024 * 1024
+
+
+class ZipStreamBuffer(io.RawIOBase):
+    """
+    Destino de escrita não posicionável para o ZipFile, cujo conteúdo é repassado ao cliente à medida que é gerado.
+    """
+
+    def __init__(self):
+        self._chunks = []
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self):
+        """
+        Retorna e descarta os bytes escritos desde a última chamada.
+        """
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def stream_zip(base_dir):
+    """
+    Gera um arquivo .zip com todos os arquivos de um diretório, bloco a bloco.
+    
+    Os PDFs são armazenados sem compressão, pois já são comprimidos; os demais
+    arquivos são comprimidos com deflate. A memória usada é constante,
+    independentemente do tamanho total do diretório.
+    
+    Args:
+        base_dir (str): Diretório a ser compactado.
+    
+    Yields:
+        bytes: Próximo trecho do arquivo .zip.
+    """
+    buffer = ZipStreamBuffer()
+    with zipfile.ZipFile(buffer, 'w') as zip_file:
+        for root, dirs, filenames in os.walk(base_dir):
+            for filename in filenames:
+                # Ignora downloads ainda em andamento e demais temporários
+                if is_partial_file(filename):
+                    continue
+                file_path = os.path.join(root, filename)
+                arcname = os.path.relpath(file_path, base_dir)  # Caminho relativo no .zip
+                zip_info = zipfile.ZipInfo.from_file(file_path, arcname)
+                zip_info.compress_type = (zipfile.ZIP_STORED if filename.lower().endswith('.pdf')
+                                          else zipfile.ZIP_DEFLATED)
+                with open(file_path, 'rb') as source, zip_file.open(zip_info, 'w', force_zip64=True) as target:
+                    while chunk := source.read(ZIP_CHUNK_SIZE):
+                        target.write(chunk)
+                        data = buffer.drain()
+                        if data:
+                            yield data
+                yield buffer.drain()
+    yield buffer.drain()
+
+def publish_file(work_dir, source):
+    """
+    Move um arquivo concluído do diretório de trabalho de um job para DOWNLOAD_DIR e o registra
+    no catálogo, no cache de hashes e no índice de busca.
+    
+    Args:
+        work_dir (str): Diretório de trabalho do job.
+        source (str): Caminho do arquivo dentro de ``work_dir``.
+    """
+    target = os.path.join(DOWNLOAD_DIR, os.path.relpath(source, work_dir))
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    if os.path.exists(target):
+        # Arquivo baixado de novo: as páginas antigas saem do índice até que o novo conteúdo seja indexado
+        search_index.remove(target)
+    os.replace(source, target)
+    file_catalog.add_file(target)
+    content_hashes.schedule(target)
+    if target.lower().endswith('.pdf'):
+        pdf_indexer.submit(target)
+
+def publish_files(work_dir):
+    """
+    Move para DOWNLOAD_DIR os arquivos concluídos que ainda restam no diretório de trabalho de um job.
+    
+    Os arquivos já são publicados um a um à medida que terminam; esta varredura no fim do
+    job recolhe apenas os que não passaram por ``publish_file``.
+    
+    Args:
+        work_dir (str): Diretório de trabalho do job.
+    """
+    for root, dirs, filenames in os.walk(work_dir):
+        for filename in filenames:
+            # Ignora downloads que não chegaram a terminar e demais temporários
+            if is_partial_file(filename):
+                continue
+            publish_file(work_dir, os.path.join(root, filename))
+
+def run_job(job):
+    """
+    Executa um job de download em um navegador próprio, usando o diretório de trabalho do job.
+    
+    Args:
+        job (Job): Job com a URL do curso, as credenciais e o modo de download.
+    
+    Returns:
+        dict: Nome do curso, número de aulas processadas e arquivos que não puderam ser baixados.
+    """
+    params = job.params
+    # Publica o progresso apenas para os clientes que acompanham este job
+    progress = ProgressTracker(
+        lambda data: socketio.emit('download_progress', {'job_id': job.id, **data}, to=job.id, namespace='/')
+    )
+    driver = driver_pool.acquire(job.work_dir)
+    error_message = 'Erro ao carregar a página de lições.'
+    try:
+        # Aguarda até que a página de lições esteja carregada
+        open_course(driver, params['url'], params['username'], params['password'])
+        error_message = 'Ocorreu um erro durante o download.'
+        course = process_course(driver, params['url'], job.work_dir, direct_download=params['direct_download'],
+                                cancel_event=job.cancel_event, progress=progress, store=blob_store,
+                                on_file=lambda path: publish_file(job.work_dir, path))
+        # Notifica o cliente quando o download é concluído
+        socketio.emit('download_complete', {'job_id': job.id, 'message': 'Download concluído com sucesso!'},
+                      to=job.id, namespace='/')
+        return {"course": course["course"], "lessons": len(course["lessons"]), "failed": course["failed"]}
+    except Exception as e:
+        if job.cancel_event.is_set():
+            error_message = 'Download cancelado.'
+        else:
+            logging.error(f"{error_message} {e}")
+        socketio.emit('download_error', {'job_id': job.id, 'message': error_message}, to=job.id, namespace='/')
+        raise
+    finally:
+        driver_pool.release(driver)
+        publish_files(job.work_dir)
+
+# Navegadores aquecidos usados pelos jobs
+driver_pool = DriverPool(JOBS_DIR, size=PREWARM_BROWSERS)
+# Agendador dos jobs de download
+scheduler = JobScheduler(run_job, JOBS_DIR, max_workers=MAX_JOBS, max_queue=MAX_QUEUED_JOBS)
+ACTIVE_JOBS.set_function(lambda: scheduler.count(RUNNING))
+QUEUED_JOBS.set_function(lambda: scheduler.count(QUEUED))
+
+@socketio.on('join_job')
+def join_job(data):
+    """
+    Inscreve o cliente na sala de um job para receber seus eventos de progresso e conclusão.
+    """
+    join_room(data['job_id'])
 
 @app.route('/')
 def index():
@@ -32,104 +209,143 @@ def download():
     username = request.form['username']
     password = request.form['password']
     url = request.form['url']
+    direct_download = request.form.get('direct_download') == 'on'
+
+    # Adiciona o job à fila de downloads
+    try:
+        job = scheduler.submit(username=username, password=password, url=url, direct_download=direct_download)
+    except JobQueueFull as e:
+        return jsonify({"error": str(e)}), 429
+    return jsonify({
+        "message": "O download foi iniciado. Você será notificado quando terminar.",
+        "job_id": job.id
+    })
+
+@app.route('/jobs', methods=['GET'])
+def list_jobs():
+    """
+    Lista os jobs de download e seus estados.
+    """
+    return jsonify({"jobs": [job.to_dict() for job in scheduler.list()]})
+
+@app.route('/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    """
+    Retorna o estado de um job de download.
+    """
+    job = scheduler.get(job_id)
+    if job is None:
+        return jsonify({"error": "Job não encontrado."}), 404
+    return jsonify(job.to_dict())
+
+@app.route('/jobs/<job_id>/cancel', methods=['POST'])
+def cancel_job(job_id):
+    """
+    Cancela um job de download na fila ou em execução.
+    """
+    if scheduler.get(job_id) is None:
+        return jsonify({"error": "Job não encontrado."}), 404
+    if not scheduler.cancel(job_id):
+        return jsonify({"error": "O job já foi finalizado."}), 409
+    return jsonify({"message": "Cancelamento solicitado."})
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    """
+    Exporta as métricas do processo no formato de texto do Prometheus.
+    """
+    return Response(REGISTRY.render(), mimetype='text/plain; version=0.0.4')
 
-    # Cria um diretório de downloads
-    os.makedirs(DOWNLOAD_DIR, exist_ok=True)
-
-    # Executa o script em uma thread separada
-    def run_script():
-        global DOWNLOAD_DIR, DOWNLOAD_COMPLETE
-        # Limpa o diretório de downloads antes de iniciar um novo download
-        driver = setup_chrome_driver(DOWNLOAD_DIR, headless=False)
-        try:
-            driver.get(url)
-            login(driver, username, password)
-
-        #TODO: Melhorar a espera para evitar o uso de sleep
-            # Aguarda até que a página de lições esteja carregada
-            try:
-                # Aguarda a presença do alerta antes de tentar fechá-lo
-                WebDriverWait(driver, 20).until(EC.alert_is_present())
-                handle_alert(driver)
-                
-                # Aguarda até que a página de lições esteja carregada
-                WebDriverWait(driver, 30).until(
-                    EC.presence_of_element_located((By.CLASS_NAME, "LessonList-item"))
-                )
-                logging.info("Página de lições carregada com sucesso.")
-            except Exception as e:
-                logging.error(f"Erro ao carregar a página de lições: {e}")
-                socketio.emit('download_error', {'message': 'Erro ao carregar a página de lições.'}, namespace='/')
-                return
-            # Fecha alertas, se presentes
-            handle_alert(driver)
-            process_lessons(driver, DOWNLOAD_DIR)
-            course_name = get_course_name(driver)
-            course_name_dir = os.path.join(os.getcwd(), sanitize_filename(course_name))
-            os.rename(DOWNLOAD_DIR, course_name_dir)
-            DOWNLOAD_DIR = course_name_dir
-            DOWNLOAD_COMPLETE = True
-            # Notifica o cliente quando o download é concluído
-            socketio.emit('download_complete', {'message': 'Download concluído com sucesso!'}, namespace='/')
-        except Exception as e:
-            print(f"Erro: {e}")
-            socketio.emit('download_error', {'message': 'Ocorreu um erro durante o download.'}, namespace='/')
-        finally:
-            driver.quit()
-
-    threading.Thread(target=run_script).start()
-    return jsonify({"message": "O download foi iniciado. Você será notificado quando terminar."})
+@app.route('/search', methods=['GET'])
+def search():
+    """
+    Busca um texto nas páginas dos PDFs da biblioteca, retornando o curso, a aula, a página e um trecho de cada resultado.
+    """
+    query = request.args.get('q', '').strip()
+    if not query:
+        return jsonify({"error": "Informe o texto a buscar no parâmetro q."}), 400
+    try:
+        limit = min(max(int(request.args.get('limit', 20)), 1), 100)
+    except ValueError:
+        return jsonify({"error": "Parâmetro limit inválido."}), 400
+    start = time.perf_counter()
+    # Atualiza o catálogo antes da busca, para que os arquivos removidos da pasta saiam do índice
+    file_catalog.refresh()
+    try:
+        results = search_index.search(query, course=request.args.get('course'), limit=limit)
+    except sqlite3.OperationalError as e:
+        return jsonify({"error": f"Consulta inválida: {e}"}), 400
+    return jsonify({
+        "query": query,
+        "results": results,
+        "took_ms": round((time.perf_counter() - start) * 1000, 2)
+    })
 
 @app.route('/files', methods=['GET'])
 def list_files():
     """
-    Renderiza a página com os arquivos disponíveis para download.
+    Renderiza a página com os arquivos disponíveis para download; a lista é carregada página a página por /api/files.
     """
-    if not os.path.exists(DOWNLOAD_DIR):
-        return render_template('files.html', files=[])
+    return render_template('files.html')
 
-    files = []
-    for root, dirs, filenames in os.walk(DOWNLOAD_DIR):
-        for filename in filenames:
-            # Adiciona o caminho relativo do arquivo
-            files.append(os.path.relpath(os.path.join(root, filename), DOWNLOAD_DIR))
-    return render_template('files.html', files=files)
+@app.route('/api/files', methods=['GET'])
+def api_files():
+    """
+    Lista os arquivos disponíveis com paginação e filtros por curso, aula e nome. Cada arquivo
+    traz o seu hash, se já calculado, e o erro da verificação, se for um PDF inválido.
+    """
+    try:
+        page = max(int(request.args.get('page', 1)), 1)
+        per_page = min(max(int(request.args.get('per_page', 50)), 1), 500)
+    except ValueError:
+        return jsonify({"error": "Parâmetros de paginação inválidos."}), 400
+    result = file_catalog.query(
+        course=request.args.get('course'),
+        lesson=request.args.get('lesson'),
+        name=request.args.get('q'),
+        page=page,
+        per_page=per_page
+    )
+    # Inclui o hash já conhecido de cada arquivo, usado pela página como versão do link, e o
+    # motivo pelo qual os PDFs reprovados na verificação não são válidos
+    invalid = {row["path"]: row["error"] for row in search_index.invalid()}
+    result["items"] = [
+        dict(item, sha256=content_hashes.get(os.path.join(DOWNLOAD_DIR, item["path"])),
+             error=invalid.get(item["path"]))
+        for item in result["items"]
+    ]
+    return jsonify(result)
 
 @app.route('/files/<path:filename>', methods=['GET'])
 def serve_file(filename):
     """
-    Permite o download de um arquivo específico.
+    Permite o download de um arquivo específico, com suporte a Range, If-None-Match e If-Modified-Since.
     """
-    try:
-        return send_from_directory(DOWNLOAD_DIR, filename, as_attachment=True)
-    except FileNotFoundError:
+    path = safe_join(DOWNLOAD_DIR, filename)
+    if path is None or not os.path.isfile(path) or is_partial_file(os.path.basename(path)):
         return jsonify({"error": "Arquivo não encontrado."}), 404
+    return send_download(request, path, filename, content_hashes)
 
 @app.route('/files/download_all', methods=['GET'])
 def download_all_files():
     """
-    Compacta todos os arquivos disponíveis em um único arquivo .zip e o disponibiliza para download.
+    Compacta todos os arquivos disponíveis em um único arquivo .zip, enviado ao cliente à medida que é gerado.
     """
     if not os.path.exists(DOWNLOAD_DIR):
         return jsonify({"error": "Nenhum arquivo disponível para download."}), 404
 
-    # Cria um arquivo .zip em memória
-    zip_buffer = io.BytesIO()
-    with zipfile.ZipFile(zip_buffer, 'w', zipfile.ZIP_DEFLATED) as zip_file:
-        for root, dirs, filenames in os.walk(DOWNLOAD_DIR):
-            for filename in filenames:
-                file_path = os.path.join(root, filename)
-                arcname = os.path.relpath(file_path, DOWNLOAD_DIR)  # Caminho relativo no .zip
-                zip_file.write(file_path, arcname)
-    zip_buffer.seek(0)
-
-    # Retorna o arquivo .zip para download
-    return send_file(
-        zip_buffer,
+    download_name = os.path.basename(DOWNLOAD_DIR) + '.zip'
+    return Response(
+        stream_with_context(chunk for chunk in stream_zip(DOWNLOAD_DIR) if chunk),
         mimetype='application/zip',
-        as_attachment=True,
-        download_name=os.path.basename(DOWNLOAD_DIR) + '.zip'
+        headers={'Content-Disposition': f"attachment; filename*=UTF-8''{quote(download_name)}"}
     )
 
 if __name__ == '__main__':
+    # Com o recarregador do modo debug, apenas o processo que atende as requisições aquece os navegadores
+    if os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        os.makedirs(JOBS_DIR, exist_ok=True)
+        driver_pool.start()
+        # Indexa, em segundo plano, os PDFs já existentes que ainda não estão no índice
+        threading.Thread(target=pdf_indexer.scan, daemon=True).start()
     app.run(debug=True)
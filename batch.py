@@ -0,0 +1,173 @@
+import os
+import time
+import logging
+import argparse
+import threading
+from queue import Queue, Empty
+from main import (setup_chrome_driver, quit_chrome_driver, download_course, parse_asset_types, ASSET_TYPES,
+                  DEFAULT_ASSET_TYPES, add_rate_limit_arguments, configure_rate_limit)
+from session import SESSION_FILE, restore_session
+from manifest import MANIFEST_FILE, Manifest
+from blobstore import BLOB_STORE_DIR, BlobStore
+
+# URL da página de aulas de um curso a partir do seu identificador
+COURSE_URL_TEMPLATE = "https://www.estrategiaconcursos.com.br/app/dashboard/cursos/{}/aulas"
+
+
+def normalize_course_url(value):
+    """
+    Converte um identificador de curso em URL; URLs completas são mantidas.
+
+    Args:
+        value (str): URL da página de aulas ou identificador numérico do curso.
+
+    Returns:
+        str: URL da página de aulas do curso.
+    """
+    value = value.strip()
+    return COURSE_URL_TEMPLATE.format(value) if value.isdigit() else value
+
+
+def read_courses_file(path):
+    """
+    Lê uma lista de cursos de um arquivo, um por linha. Linhas vazias e iniciadas por '#' são ignoradas.
+
+    Args:
+        path (str): Caminho do arquivo.
+
+    Returns:
+        list: Lista de URLs ou identificadores de cursos.
+    """
+    with open(path, encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip() and not line.startswith("#")]
+
+
+def run_batch(courses, output_root, username, password, browsers=2, direct_download=False,
+              max_workers=4, headless=True, session_file=SESSION_FILE, profile_root=None, manifest=None,
+              verify_hash=False, lean=True, asset_types=DEFAULT_ASSET_TYPES, use_api=True, store=None):
+    """
+    Baixa vários cursos distribuindo-os entre um conjunto limitado de navegadores.
+
+    Cada navegador realiza o login uma única vez e é reaproveitado para todos os
+    cursos que retirar da fila. Cada curso é baixado em um diretório próprio.
+
+    Args:
+        courses (list): URLs ou identificadores dos cursos.
+        output_root (str): Diretório onde as pastas dos cursos são criadas.
+        username (str): Usuário para o login.
+        password (str): Senha para o login.
+        browsers (int): Número máximo de navegadores simultâneos.
+        direct_download (bool): Se True, baixa os arquivos via HTTP em paralelo.
+        max_workers (int): Número de downloads simultâneos por curso no modo direto.
+        headless (bool): Se True, os navegadores são executados em modo headless.
+        session_file (str): Arquivo de sessão reaproveitado pelos navegadores (None desativa).
+        profile_root (str): Diretório onde cada navegador recebe um perfil persistente próprio.
+        manifest (Manifest): Registro compartilhado dos arquivos baixados, usado para sincronização incremental.
+        verify_hash (bool): Se True, confere o hash dos arquivos já concluídos.
+        lean (bool): Se True, os navegadores usam o perfil enxuto de ``setup_chrome_driver``.
+        asset_types (tuple): Tipos de arquivo a baixar (chaves de ``ASSET_TYPES``).
+        use_api (bool): Se True, as aulas são listadas pela API do curso, com a página como reserva.
+        store (BlobStore): Armazenamento por conteúdo compartilhado pelos cursos do lote.
+
+    Returns:
+        dict: Resultado de cada curso, indexado pela URL, com status, diretório, duração, erro e arquivos
+        que não puderam ser baixados.
+    """
+    os.makedirs(output_root, exist_ok=True)
+    pending = Queue()
+    for course in courses:
+        pending.put(normalize_course_url(course))
+    results = {}
+    results_lock = threading.Lock()
+
+    def worker(worker_id):
+        driver = None
+        try:
+            while True:
+                try:
+                    url = pending.get_nowait()
+                except Empty:
+                    return
+                start = time.monotonic()
+                try:
+                    if driver is None:
+                        profile_dir = os.path.join(profile_root, f"navegador_{worker_id}") if profile_root else None
+                        driver = setup_chrome_driver(output_root, headless=headless, profile_dir=profile_dir, lean=lean)
+                        if session_file:
+                            restore_session(driver, session_file)
+                    logging.info(f"[navegador {worker_id}] Iniciando o curso: {url}")
+                    course = download_course(driver, url, output_root, username, password,
+                                             direct_download=direct_download, max_workers=max_workers,
+                                             session_file=session_file, manifest=manifest,
+                                             verify_hash=verify_hash, asset_types=asset_types, use_api=use_api,
+                                             store=store)
+                    result = {"status": "done", "dir": course["dir"], "error": None, "failed": course["failed"]}
+                except Exception as e:
+                    logging.error(f"[navegador {worker_id}] Erro ao baixar o curso {url}: {e}")
+                    result = {"status": "failed", "dir": None, "error": str(e), "failed": []}
+                result["duration"] = time.monotonic() - start
+                with results_lock:
+                    results[url] = result
+        finally:
+            if driver is not None:
+                quit_chrome_driver(driver)
+
+    threads = [threading.Thread(target=worker, args=(n + 1,)) for n in range(min(browsers, len(courses)))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    failed = [url for url, result in results.items() if result["status"] == "failed"]
+    logging.info(f"Lote concluído: {len(results) - len(failed)} cursos baixados, {len(failed)} com falha.")
+    for url in failed:
+        logging.warning(f"Curso com falha: {url} - {results[url]['error']}")
+    for url, result in results.items():
+        if result["failed"]:
+            logging.warning(f"Curso {url}: {len(result['failed'])} arquivos não puderam ser baixados.")
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Baixa vários cursos usando um conjunto de navegadores.")
+    parser.add_argument("courses", nargs="*", help="URLs ou identificadores dos cursos.")
+    parser.add_argument("--courses-file", help="Arquivo com um curso (URL ou identificador) por linha.")
+    parser.add_argument("--output", default=os.path.join(os.getcwd(), "cursos"),
+                        help="Diretório onde as pastas dos cursos são criadas.")
+    parser.add_argument("--browsers", type=int, default=2, help="Número de navegadores simultâneos.")
+    parser.add_argument("--direct", action="store_true",
+                        help="Baixa os arquivos via HTTP em paralelo, sem clicar nos botões.")
+    parser.add_argument("--workers", type=int, default=4,
+                        help="Número de downloads simultâneos por curso no modo direto.")
+    parser.add_argument("--show-browser", action="store_true", help="Executa os navegadores com interface gráfica.")
+    parser.add_argument("--full-browser", action="store_true",
+                        help="Não bloqueia imagens, fontes e rastreadores nem usa o carregamento antecipado das páginas.")
+    parser.add_argument("--assets", type=parse_asset_types, default=DEFAULT_ASSET_TYPES,
+                        help=f"Tipos de arquivo a baixar, separados por vírgula ({', '.join(ASSET_TYPES)}).")
+    add_rate_limit_arguments(parser)
+    parser.add_argument("--profile-root", help="Diretório com um perfil persistente do Chrome por navegador.")
+    parser.add_argument("--no-session", action="store_true",
+                        help="Não reaproveita nem salva a sessão autenticada.")
+    parser.add_argument("--no-api", action="store_true",
+                        help="Extrai as aulas da página do curso em vez de consultá-las pela API.")
+    parser.add_argument("--sync", action="store_true",
+                        help="Baixa apenas os arquivos novos ou incompletos, registrando-os no manifesto.")
+    parser.add_argument("--manifest", default=MANIFEST_FILE, help="Arquivo SQLite do manifesto de sincronização.")
+    parser.add_argument("--verify", action="store_true",
+                        help="Na sincronização, confere também o hash dos arquivos já baixados.")
+    parser.add_argument("--store", default=BLOB_STORE_DIR or None,
+                        help="Diretório do armazenamento por conteúdo que deduplica os arquivos entre os cursos.")
+    args = parser.parse_args()
+    configure_rate_limit(args)
+
+    courses = list(args.courses)
+    if args.courses_file:
+        courses.extend(read_courses_file(args.courses_file))
+    if not courses:
+        parser.error("Informe ao menos um curso.")
+
+    run_batch(courses, args.output, os.getenv("login"), os.getenv("password"), browsers=args.browsers,
+              direct_download=args.direct, max_workers=args.workers, headless=not args.show_browser, lean=not args.full_browser,
+              session_file=None if args.no_session else SESSION_FILE, profile_root=args.profile_root,
+              manifest=Manifest(args.manifest) if args.sync else None, verify_hash=args.verify, asset_types=args.assets,
+              use_api=not args.no_api, store=BlobStore(args.store) if args.store else None)
@@ -0,0 +1,326 @@
+import os
+import sys
+import json
+import time
+import logging
+import itertools
+import argparse
+import resource
+import tempfile
+import threading
+import subprocess
+from fake_site import FakeSite
+
+# Arquivo padrão onde os resultados são gravados
+RESULTS_FILE = "benchmark-results.json"
+# Métricas comparadas com a linha de base (maior é melhor)
+COMPARED_METRICS = ("lessons_per_minute", "mb_per_s")
+
+
+def parse_list(value, cast=int):
+    """
+    Converte uma lista separada por vírgulas em uma lista de valores.
+
+    Args:
+        value (str): Texto como ``"10,50,100"``.
+        cast (callable): Conversão aplicada a cada item.
+
+    Returns:
+        list: Valores convertidos.
+    """
+    return [cast(item) for item in value.split(",") if item.strip()]
+
+
+def tree_rss(pid):
+    """
+    Soma a memória residente de um processo e de todos os seus descendentes (Linux).
+
+    Args:
+        pid (int): Processo raiz.
+
+    Returns:
+        int | None: RSS total em bytes ou None se /proc não estiver disponível.
+    """
+    if not os.path.isdir("/proc"):
+        return None
+    children = {}
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as f:
+                # O nome do processo pode conter espaços; os campos seguintes vêm após o último ")"
+                ppid = int(f.read().rsplit(")", 1)[1].split()[1])
+        except (OSError, IndexError, ValueError):
+            continue
+        children.setdefault(ppid, []).append(int(entry))
+    total = 0
+    pending = [pid]
+    while pending:
+        current = pending.pop()
+        try:
+            with open(f"/proc/{current}/statm") as f:
+                total += int(f.read().split()[1]) * resource.getpagesize()
+        except (OSError, IndexError, ValueError):
+            continue
+        pending.extend(children.get(current, ()))
+    return total
+
+
+class RssSampler:
+    """
+    Amostra periodicamente a memória residente da árvore de processos e guarda o pico.
+
+    Args:
+        pid (int): Processo raiz; os descendentes (chromedriver e Chrome) também são contados.
+        interval (float): Intervalo entre as amostras (em segundos).
+    """
+
+    def __init__(self, pid, interval=0.2):
+        self.pid = pid
+        self.interval = interval
+        self.peak = None
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while True:
+            rss = tree_rss(self.pid)
+            if rss is not None:
+                self.peak = max(self.peak or 0, rss)
+            if self._stop.wait(self.interval):
+                break
+
+
+def count_files(directory):
+    """
+    Conta os PDFs e vídeos baixados e o total de bytes em um diretório.
+
+    Returns:
+        tuple: Número de arquivos e soma dos tamanhos (em bytes).
+    """
+    files = 0
+    size = 0
+    for root, _, names in os.walk(directory):
+        for name in names:
+            if name.endswith((".pdf", ".mp4")):
+                files += 1
+                size += os.path.getsize(os.path.join(root, name))
+    return files, size
+
+
+def run_scenario(scenario):
+    """
+    Executa um cenário no processo atual contra o servidor falso já em execução.
+
+    Deve rodar em um processo próprio: o prefixo dos links de PDF e o host da API são
+    lidos das variáveis de ambiente na importação de ``main``.
+
+    Args:
+        scenario (dict): Configuração do cenário (URL do curso, modo, downloads simultâneos...).
+
+    Returns:
+        dict: Medições do cenário.
+    """
+    from main import setup_chrome_driver, quit_chrome_driver, open_course, process_course
+
+    with tempfile.TemporaryDirectory(prefix="benchmark-") as output_root:
+        with RssSampler(os.getpid()) as sampler:
+            launch = time.perf_counter()
+            driver = setup_chrome_driver(output_root, headless=scenario["headless"], lean=scenario["lean"])
+            try:
+                start = time.perf_counter()
+                open_course(driver, scenario["url"], "benchmark", "benchmark")
+                opened = time.perf_counter()
+                course = process_course(driver, scenario["url"], output_root,
+                                        direct_download=scenario["mode"] == "direct",
+                                        max_workers=scenario["workers"],
+                                        asset_types=tuple(scenario["assets"]),
+                                        use_api=scenario["source"] == "api")
+                finished = time.perf_counter()
+            finally:
+                quit_chrome_driver(driver)
+            files, size = count_files(course["dir"])
+    elapsed = max(finished - opened, 1e-6)
+    return {
+        "startup_seconds": start - launch,
+        "open_course_seconds": opened - start,
+        "download_seconds": elapsed,
+        "lessons": len(course["lessons"]),
+        "files": files,
+        "failed_files": len(course["failed"]),
+        "bytes": size,
+        "lessons_per_minute": len(course["lessons"]) / elapsed * 60,
+        "mb_per_s": size / elapsed / 1e6,
+        "peak_tree_rss_bytes": sampler.peak,
+    }
+
+
+def spawn_scenario(site, scenario):
+    """
+    Executa um cenário em um processo filho, medindo o pico de memória do processo.
+
+    Args:
+        site (FakeSite): Servidor falso em execução.
+        scenario (dict): Configuração do cenário.
+
+    Returns:
+        dict: Medições do cenário, ou o erro ocorrido.
+    """
+    env = dict(os.environ, ESTRATEGIA_API_HOST=site.host, ESTRATEGIA_PDF_URL_PREFIX=site.pdf_url_prefix,
+               ESTRATEGIA_VIDEO_URL_PREFIX=site.video_url_prefix, ESTRATEGIA_COURSE_API_URL=site.course_api_url)
+    scenario = dict(scenario, url=site.course_url)
+    process = subprocess.Popen(
+        [sys.executable, os.path.abspath(__file__), "--scenario", json.dumps(scenario)],
+        env=env, stdout=subprocess.PIPE, text=True,
+    )
+    output = process.stdout.read()
+    process.stdout.close()
+    _, status, usage = os.wait4(process.pid, 0)
+    lines = output.strip().splitlines()
+    if os.waitstatus_to_exitcode(status) != 0 or not lines:
+        return {"error": f"Cenário terminou com código {os.waitstatus_to_exitcode(status)}."}
+    result = json.loads(lines[-1])
+    # ru_maxrss é informado em KiB no Linux
+    result["peak_python_rss_bytes"] = usage.ru_maxrss * 1024
+    return result
+
+
+def scenario_key(result):
+    return (result["mode"], result.get("profile", "lean"), result.get("source", "api"), result["lessons_total"],
+            result["workers"])
+
+
+def compare(results, baseline, tolerance):
+    """
+    Compara os resultados com uma execução anterior.
+
+    Args:
+        results (list): Resultados atuais.
+        baseline (list): Resultados da linha de base.
+        tolerance (float): Queda relativa máxima aceita (0.1 = 10%).
+
+    Returns:
+        list: Descrições das regressões encontradas.
+    """
+    previous = {scenario_key(result): result for result in baseline if "error" not in result}
+    regressions = []
+    for result in results:
+        before = previous.get(scenario_key(result))
+        if before is None:
+            continue
+        if "error" in result:
+            regressions.append(f"{scenario_key(result)}: {result['error']}")
+            continue
+        for metric in COMPARED_METRICS:
+            if result[metric] < before[metric] * (1 - tolerance):
+                regressions.append(
+                    f"{scenario_key(result)}: {metric} caiu de {before[metric]:.2f} para {result[metric]:.2f}"
+                )
+    return regressions
+
+
+def sweep(args):
+    """
+    Executa todas as combinações de número de aulas, modo e downloads simultâneos.
+
+    Returns:
+        list: Resultados de cada cenário.
+    """
+    results = []
+    for lessons in args.lessons:
+        for mode, profile, source in itertools.product(args.modes, args.profiles, args.sources):
+            # O número de downloads simultâneos só se aplica ao modo direto
+            for workers in (args.workers if mode == "direct" else [1]):
+                for run in range(1, args.repeat + 1):
+                    site = FakeSite(lessons=lessons, files_per_lesson=args.files_per_lesson,
+                                    pdf_size=args.pdf_size * 1024, videos_per_lesson=args.videos_per_lesson,
+                                    video_size=args.video_size * 1024 * 1024, latency=args.latency,
+                                    bandwidth=args.bandwidth * 1024, failure_rate=args.failure_rate,
+                                    max_concurrent=args.max_concurrent,
+                                    survey_rate=args.survey_rate, seed=args.seed + run)
+                    scenario = {"mode": mode, "workers": workers, "headless": not args.show_browser,
+                                "lean": profile == "lean", "source": source,
+                                "assets": ["pdf", "video"] if args.videos_per_lesson else ["pdf"]}
+                    logging.info(f"Cenário: {lessons} aulas, modo {mode}, navegador {profile}, aulas via {source}, "
+                                 f"{workers} downloads simultâneos (execução {run}/{args.repeat})")
+                    with site:
+                        result = spawn_scenario(site, scenario)
+                    result.update(mode=mode, profile=profile, source=source, workers=workers, run=run, lessons_total=lessons,
+                                  files_expected=site.total_files, server=dict(site.stats))
+                    if "error" in result:
+                        logging.error(f"Falha no cenário: {result['error']}")
+                    else:
+                        logging.info(f"{result['lessons_per_minute']:.1f} aulas/min, {result['mb_per_s']:.2f} MB/s, "
+                                     f"{result['files']}/{result['files_expected']} arquivos")
+                    results.append(result)
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Mede o desempenho do download de cursos contra um servidor local que imita o site."
+    )
+    parser.add_argument("--lessons", type=parse_list, default=[10, 50],
+                        help="Números de aulas a testar, separados por vírgula.")
+    parser.add_argument("--workers", type=parse_list, default=[1, 4, 8],
+                        help="Números de downloads simultâneos a testar no modo direto, separados por vírgula.")
+    parser.add_argument("--modes", type=lambda v: parse_list(v, str), default=["browser", "direct"],
+                        help="Modos de download a testar (browser, direct), separados por vírgula.")
+    parser.add_argument("--profiles", type=lambda v: parse_list(v, str), default=["lean"],
+                        help="Perfis do navegador a testar (lean, full), separados por vírgula.")
+    parser.add_argument("--sources", type=lambda v: parse_list(v, str), default=["api"],
+                        help="Origens da lista de aulas a testar (api, dom), separadas por vírgula.")
+    parser.add_argument("--files-per-lesson", type=int, default=1, help="Número de PDFs por aula.")
+    parser.add_argument("--pdf-size", type=int, default=1024, help="Tamanho de cada PDF (em KiB).")
+    parser.add_argument("--videos-per-lesson", type=int, default=0, help="Número de vídeos por aula.")
+    parser.add_argument("--video-size", type=int, default=64, help="Tamanho de cada vídeo (em MiB).")
+    parser.add_argument("--latency", type=float, default=0.05, help="Latência de cada PDF (em segundos).")
+    parser.add_argument("--bandwidth", type=int, default=0,
+                        help="Largura de banda de cada download (em KiB/s); 0 para ilimitada.")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="Fração dos downloads que falham.")
+    parser.add_argument("--max-concurrent", type=int, default=0,
+                        help="Downloads simultâneos aceitos pelo servidor falso antes de responder 429; 0 para ilimitado.")
+    parser.add_argument("--survey-rate", type=float, default=0.0,
+                        help="Fração dos cliques interceptados pelo modal de pesquisa.")
+    parser.add_argument("--repeat", type=int, default=1, help="Número de execuções de cada cenário.")
+    parser.add_argument("--seed", type=int, default=0, help="Semente das falhas simuladas.")
+    parser.add_argument("--show-browser", action="store_true", help="Executa o Chrome com interface gráfica.")
+    parser.add_argument("--output", default=RESULTS_FILE, help="Arquivo JSON onde os resultados são gravados.")
+    parser.add_argument("--baseline", help="Resultados anteriores usados para detectar regressões.")
+    parser.add_argument("--tolerance", type=float, default=0.1,
+                        help="Queda relativa máxima aceita em relação à linha de base.")
+    parser.add_argument("--scenario", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.scenario:
+        # Processo filho: executa um único cenário e escreve o resultado na última linha da saída
+        print(json.dumps(run_scenario(json.loads(args.scenario))))
+        sys.exit(0)
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    results = sweep(args)
+    report = {
+        "generated_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": sys.version.split()[0],
+        "config": {key: value for key, value in vars(args).items() if key not in ("scenario", "output", "baseline")},
+        "results": results,
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    logging.info(f"Resultados gravados em: {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            regressions = compare(results, json.load(f)["results"], args.tolerance)
+        for regression in regressions:
+            logging.error(f"Regressão: {regression}")
+        sys.exit(1 if regressions else 0)
@@ -0,0 +1,136 @@
+import os
+import fcntl
+import errno
+import shutil
+import logging
+import threading
+from metrics import DEDUP_BYTES
+
+# Diretório padrão do armazenamento por conteúdo; vazio desativa a deduplicação
+BLOB_STORE_DIR = os.getenv("ESTRATEGIA_BLOB_STORE", "")
+# ioctl do Linux que cria uma cópia por referência (reflink) em sistemas de arquivos como Btrfs e XFS
+FICLONE = 0x40049409
+
+
+def reflink(source, target):
+    """
+    Cria ``target`` como cópia por referência de ``source``, compartilhando os blocos em disco.
+
+    Args:
+        source (str): Arquivo de origem.
+        target (str): Arquivo a criar.
+
+    Returns:
+        bool: True se a cópia foi criada, False se o sistema de arquivos não oferece suporte.
+    """
+    try:
+        with open(source, "rb") as src, open(target, "wb") as dst:
+            fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+        return True
+    except OSError:
+        if os.path.exists(target):
+            os.remove(target)
+        return False
+
+
+class BlobStore:
+    """
+    Armazenamento endereçado por conteúdo compartilhado entre os cursos.
+
+    Cada conteúdo é guardado uma única vez, em ``<raiz>/<ab>/<sha256>``, e aparece nas
+    pastas dos cursos como hardlink com o nome da aula. Quando não é possível criar um
+    hardlink (outro sistema de arquivos, por exemplo), usa-se um reflink e, por fim, uma
+    cópia. Os arquivos não devem ser editados nas pastas dos cursos: com hardlinks, a
+    alteração apareceria em todos os cursos que compartilham o conteúdo.
+
+    Args:
+        root (str): Diretório do armazenamento.
+    """
+
+    def __init__(self, root=BLOB_STORE_DIR):
+        self.root = root
+        self._warned = False
+        self._lock = threading.Lock()
+        os.makedirs(root, exist_ok=True)
+
+    def path(self, sha256):
+        """
+        Retorna o caminho do blob de um conteúdo.
+        """
+        return os.path.join(self.root, sha256[:2], sha256)
+
+    def has(self, sha256, size=None):
+        """
+        Verifica se um conteúdo já está no armazenamento.
+
+        Args:
+            sha256 (str): Hash do conteúdo.
+            size (int): Se informado, o tamanho do blob também é conferido.
+
+        Returns:
+            bool: True se o blob existe.
+        """
+        try:
+            return size is None or os.path.getsize(self.path(sha256)) == size
+        except OSError:
+            return False
+
+    def add(self, path, sha256):
+        """
+        Guarda um arquivo recém-baixado no armazenamento.
+
+        Um conteúdo novo passa a ser o próprio blob (um hardlink, sem cópia); um conteúdo
+        repetido tem o arquivo substituído por um vínculo para o blob existente, liberando
+        o espaço da cópia.
+
+        Args:
+            path (str): Arquivo baixado.
+            sha256 (str): Hash do arquivo, calculado durante o download.
+
+        Returns:
+            bool: True se o conteúdo era novo.
+        """
+        blob = self.path(sha256)
+        os.makedirs(os.path.dirname(blob), exist_ok=True)
+        try:
+            os.link(path, blob)
+            return True
+        except FileExistsError:
+            pass
+        except OSError as e:
+            if e.errno not in (errno.EXDEV, errno.EPERM, errno.EMLINK):
+                raise
+            # Sem hardlink para o armazenamento, o blob precisa ser uma cópia do arquivo
+            if not reflink(path, blob):
+                shutil.copyfile(path, blob)
+            return True
+        if not os.path.samefile(path, blob):
+            DEDUP_BYTES.inc(os.path.getsize(path), reason="duplicate")
+            self.link(sha256, path)
+        return False
+
+    def link(self, sha256, dest_path):
+        """
+        Cria (ou substitui) ``dest_path`` como vínculo para o blob de um conteúdo.
+
+        Args:
+            sha256 (str): Hash do conteúdo.
+            dest_path (str): Caminho do arquivo na pasta do curso.
+        """
+        blob = self.path(sha256)
+        if os.path.exists(dest_path) and os.path.samefile(blob, dest_path):
+            return
+        temp_path = f"{dest_path}.link"
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        try:
+            os.link(blob, temp_path)
+        except OSError:
+            with self._lock:
+                if not self._warned:
+                    logging.warning(f"Não foi possível criar hardlinks a partir de {self.root}; "
+                                    f"usando reflinks ou cópias.")
+                    self._warned = True
+            if not reflink(blob, temp_path):
+                shutil.copyfile(blob, temp_path)
+        os.replace(temp_path, dest_path)
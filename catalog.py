@@ -0,0 +1,159 @@
+import os
+import time
+import threading
+from watcher import is_partial_file
+
+
+class FileCatalog:
+    """
+    Índice em memória dos arquivos baixados, usado para listar a biblioteca sem percorrer o disco a cada requisição.
+
+    O índice é atualizado diretamente pelo fluxo de download (``add_file``) e,
+    periodicamente, a partir do mtime dos diretórios: apenas os diretórios cujo
+    mtime mudou são listados novamente, de modo que a atualização custa uma
+    chamada ``stat`` por diretório, e não por arquivo.
+
+    Args:
+        root (str): Diretório da biblioteca.
+        max_age (float): Intervalo mínimo entre duas atualizações a partir do disco (em segundos).
+        on_removed (callable): Função chamada com o caminho de cada arquivo que saiu da biblioteca.
+    """
+
+    def __init__(self, root, max_age=5, on_removed=None):
+        self.root = root
+        self.max_age = max_age
+        self.on_removed = on_removed
+        self._lock = threading.Lock()
+        self._files = {}
+        self._dirs = {}
+        self._sorted = None
+        self._courses = []
+        self._refreshed_at = 0
+
+    def _entry(self, path, stat):
+        rel_path = os.path.relpath(path, self.root)
+        parts = rel_path.split(os.sep)
+        name = parts[-1]
+        return {
+            "path": rel_path.replace(os.sep, "/"),
+            "course": parts[0] if len(parts) > 1 else os.path.basename(self.root),
+            "lesson": os.path.splitext(name)[0],
+            "name": name,
+            "size": stat.st_size,
+            "mtime": stat.st_mtime,
+        }
+
+    def add_file(self, path):
+        """
+        Adiciona (ou atualiza) um arquivo no índice assim que ele é baixado.
+
+        Args:
+            path (str): Caminho do arquivo.
+        """
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return
+        entry = self._entry(path, stat)
+        with self._lock:
+            self._files[entry["path"]] = entry
+            self._sorted = None
+
+    def _remove(self, path):
+        del self._files[path]
+        if self.on_removed:
+            self.on_removed(os.path.join(self.root, path))
+
+    def _scan_dir(self, dir_path, seen_dirs):
+        try:
+            mtime = os.stat(dir_path).st_mtime
+        except OSError:
+            return
+        seen_dirs.add(dir_path)
+        cached = self._dirs.get(dir_path)
+        if cached and cached[0] == mtime:
+            subdirs = cached[1]
+        else:
+            subdirs = []
+            prefix = os.path.relpath(dir_path, self.root).replace(os.sep, "/")
+            prefix = "" if prefix == "." else prefix + "/"
+            listed = set()
+            with os.scandir(dir_path) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        subdirs.append(entry.path)
+                    elif entry.is_file() and not is_partial_file(entry.name):
+                        file_entry = self._entry(entry.path, entry.stat())
+                        listed.add(file_entry["path"])
+                        self._files[file_entry["path"]] = file_entry
+            # Remove do índice os arquivos que saíram do diretório
+            for path in [p for p in self._files if p.startswith(prefix) and "/" not in p[len(prefix):]]:
+                if path not in listed:
+                    self._remove(path)
+            self._dirs[dir_path] = (mtime, subdirs)
+            self._sorted = None
+        for subdir in subdirs:
+            self._scan_dir(subdir, seen_dirs)
+
+    def refresh(self, force=False):
+        """
+        Atualiza o índice a partir do disco, relendo apenas os diretórios alterados.
+
+        Args:
+            force (bool): Se True, ignora o intervalo mínimo entre atualizações.
+        """
+        with self._lock:
+            if not force and time.monotonic() - self._refreshed_at < self.max_age:
+                return
+            seen_dirs = set()
+            if os.path.isdir(self.root):
+                self._scan_dir(self.root, seen_dirs)
+            # Descarta diretórios removidos e os arquivos que estavam neles
+            for dir_path in set(self._dirs) - seen_dirs:
+                del self._dirs[dir_path]
+                prefix = os.path.relpath(dir_path, self.root).replace(os.sep, "/") + "/"
+                for path in [p for p in self._files if p.startswith(prefix)]:
+                    self._remove(path)
+                self._sorted = None
+            self._refreshed_at = time.monotonic()
+
+    def query(self, course=None, lesson=None, name=None, page=1, per_page=50):
+        """
+        Consulta o índice com filtros e paginação.
+
+        Args:
+            course (str): Nome exato do curso.
+            lesson (str): Trecho do nome da aula (sem diferenciar maiúsculas).
+            name (str): Trecho do nome do arquivo (sem diferenciar maiúsculas).
+            page (int): Página desejada, a partir de 1.
+            per_page (int): Quantidade de arquivos por página.
+
+        Returns:
+            dict: Arquivos da página, total de resultados, página, tamanho da página, número de páginas e cursos.
+        """
+        self.refresh()
+        with self._lock:
+            if self._sorted is None:
+                self._sorted = sorted(self._files.values(), key=lambda entry: entry["path"])
+                self._courses = sorted({entry["course"] for entry in self._sorted})
+            files = self._sorted
+            courses = self._courses
+        lesson = lesson.lower() if lesson else None
+        name = name.lower() if name else None
+        if course or lesson or name:
+            files = [
+                entry for entry in files
+                if (not course or entry["course"] == course)
+                and (not lesson or lesson in entry["lesson"].lower())
+                and (not name or name in entry["name"].lower())
+            ]
+        total = len(files)
+        start = (page - 1) * per_page
+        return {
+            "items": files[start:start + per_page],
+            "total": total,
+            "page": page,
+            "per_page": per_page,
+            "pages": (total + per_page - 1) // per_page,
+            "courses": courses,
+        }
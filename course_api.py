@@ -0,0 +1,131 @@
+import os
+import json
+import logging
+from downloader import API_HOST, get_session_headers, create_http_pool
+from ratelimit import rate_limiter
+
+# Endpoint com os dados do curso consultado pelo painel do aluno (pode ser trocado para apontar para um servidor de testes)
+COURSE_API_URL = os.getenv("ESTRATEGIA_COURSE_API_URL", f"https://{API_HOST}/api/aluno/curso/{{course_id}}")
+# Campos de cada aula, na resposta da API, com os arquivos de cada tipo
+API_ASSET_FIELDS = {
+    "pdf": ("pdfs", "pdf"),
+    "video": ("videos",),
+    "material": ("materiais",),
+}
+
+
+class CourseApiError(Exception):
+    """
+    Lançada quando a API do curso não responde ou a resposta não tem o formato esperado.
+    """
+
+
+def asset_urls(value, prefix):
+    """
+    Converte o valor de um campo de arquivos da API em URLs de download.
+
+    O campo pode trazer a URL completa, apenas o identificador do arquivo (completado com o
+    prefixo dos links do tipo), um objeto com ``url`` ou ``id``, ou uma lista desses valores.
+
+    Args:
+        value: Valor do campo na resposta da API.
+        prefix (str): Prefixo dos links de download do tipo de arquivo.
+
+    Returns:
+        list: URLs de download.
+
+    Raises:
+        CourseApiError: Se o valor não estiver em nenhum dos formatos esperados.
+    """
+    if value is None:
+        return []
+    if isinstance(value, list):
+        return [url for entry in value for url in asset_urls(entry, prefix)]
+    if isinstance(value, dict):
+        value = value.get("url") or value.get("id")
+    if isinstance(value, str) and value.startswith(("http://", "https://")):
+        return [value]
+    if isinstance(value, (int, str)) and not isinstance(value, bool) and str(value):
+        return [f"{prefix}{value}"]
+    raise CourseApiError(f"arquivo em formato inesperado: {value!r}")
+
+
+def parse_course_lessons(data, asset_types):
+    """
+    Extrai as aulas da resposta da API no mesmo formato devolvido pelo script de extração da página.
+
+    Args:
+        data (dict): Resposta da API já decodificada.
+        asset_types (list): Pares [tipo, prefixo dos links] dos arquivos a coletar.
+
+    Returns:
+        list: Lista de dicionários com índice, título, subtítulo e arquivos (URL e tipo) de cada aula.
+
+    Raises:
+        CourseApiError: Se a resposta não tiver o formato esperado ou se nenhuma aula tiver
+            arquivos dos tipos pedidos, o que indica que os campos de arquivos mudaram de nome.
+    """
+    course = data.get("data") if isinstance(data, dict) else None
+    lessons = course.get("aulas") if isinstance(course, dict) else None
+    if not isinstance(lessons, list) or not lessons:
+        raise CourseApiError("lista de aulas ausente na resposta")
+    raw_lessons = []
+    for index, lesson in enumerate(lessons, 1):
+        if not isinstance(lesson, dict):
+            raise CourseApiError(f"aula {index} em formato inesperado")
+        title, subtitle = lesson.get("nome"), lesson.get("conteudo")
+        # Sem título e subtítulo os nomes dos arquivos não coincidiriam com os obtidos pela página
+        if not isinstance(title, str) or not isinstance(subtitle, str):
+            raise CourseApiError(f"aula {index} sem nome ou conteúdo")
+        assets = []
+        seen = set()
+        for kind, prefix in asset_types:
+            for field in API_ASSET_FIELDS.get(kind, ()):
+                for url in asset_urls(lesson.get(field), prefix):
+                    if url not in seen:
+                        seen.add(url)
+                        assets.append({"url": url, "kind": kind})
+        raw_lessons.append({"index": index, "title": title.strip(), "subtitle": subtitle.strip(), "assets": assets})
+    if not any(lesson["assets"] for lesson in raw_lessons):
+        kinds = ", ".join(kind for kind, _ in asset_types)
+        raise CourseApiError(f"nenhum arquivo dos tipos pedidos ({kinds}) nas aulas da resposta")
+    return raw_lessons
+
+
+def fetch_course_lessons(driver, course_id, asset_types, limiter=rate_limiter):
+    """
+    Obtém as aulas de um curso pela API usada pelo painel do aluno, com os cookies da sessão do navegador.
+
+    Args:
+        driver (WebDriver): Instância do WebDriver já autenticada.
+        course_id (str): Identificador do curso.
+        asset_types (list): Pares [tipo, prefixo dos links] dos arquivos a coletar.
+        limiter (RateLimiter): Controle de ritmo das requisições.
+
+    Returns:
+        list: Aulas no formato de ``parse_course_lessons``.
+
+    Raises:
+        CourseApiError: Se a API não responder com sucesso ou a resposta não tiver o formato esperado.
+    """
+    url = COURSE_API_URL.format(course_id=course_id)
+    headers = get_session_headers(driver)
+    headers["Accept"] = "application/json"
+    http = create_http_pool(1)
+    try:
+        with limiter.request(http, "GET", url, headers=headers) as response:
+            if response.status != 200:
+                raise CourseApiError(f"resposta HTTP {response.status}")
+            try:
+                data = json.loads(response.data)
+            except ValueError as e:
+                raise CourseApiError(f"resposta não é JSON: {e}")
+    except CourseApiError:
+        raise
+    except Exception as e:
+        raise CourseApiError(f"erro na requisição: {e}")
+    finally:
+        http.clear()
+    raw_lessons = parse_course_lessons(data, asset_types)
+    logging.info(f"{len(raw_lessons)} aulas obtidas pela API do curso {course_id}.")
+    return raw_lessons
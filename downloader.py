@@ -0,0 +1,435 @@
+import os
+import json
+import time
+import logging
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import urllib3
+from manifest import hash_file
+from ratelimit import rate_limiter
+from pipeline import PipelineStage
+from pdfindex import check_pdf
+from metrics import (DOWNLOAD_TTFB_SECONDS, DOWNLOAD_SECONDS, DOWNLOAD_THROUGHPUT, DOWNLOAD_BYTES,
+                     DOWNLOAD_FAILURES, INVALID_PDFS)
+
+# Host da API de onde os arquivos das aulas são baixados (pode ser trocado para apontar para um servidor de testes)
+API_HOST = os.getenv("ESTRATEGIA_API_HOST", "api.estrategiaconcursos.com.br")
+# Tamanho dos blocos lidos da resposta e gravados em disco
+CHUNK_SIZE = 64 * 1024
+# Arquivos a partir deste tamanho são baixados em segmentos HTTP Range paralelos
+SEGMENT_THRESHOLD = 16 * 1024 * 1024
+# Número máximo de segmentos simultâneos por arquivo e tamanho mínimo de cada segmento
+MAX_SEGMENTS = 4
+MIN_SEGMENT_SIZE = 4 * 1024 * 1024
+# Bytes recebidos por segmento entre duas gravações do ponto de retomada
+CHECKPOINT_INTERVAL = 4 * 1024 * 1024
+# Tentativas de retomar um segmento interrompido no meio da transferência
+SEGMENT_RETRIES = 3
+
+
+class DownloadInterrupted(Exception):
+    """
+    Lançada quando um download é cancelado antes de terminar.
+    """
+
+
+def get_session_headers(driver):
+    """
+    Copia a sessão autenticada do WebDriver para cabeçalhos HTTP.
+
+    Args:
+        driver (WebDriver): Instância do WebDriver já autenticada.
+
+    Returns:
+        dict: Cabeçalhos com os cookies da sessão, o User-Agent e o Referer do navegador.
+    """
+    cookies = driver.get_cookies()
+    cookie_header = "; ".join(
+        f"{cookie['name']}={cookie['value']}"
+        for cookie in cookies
+        if API_HOST.endswith(cookie.get("domain", "").lstrip("."))
+    )
+    headers = {
+        "User-Agent": driver.execute_script("return navigator.userAgent;"),
+        "Referer": driver.current_url,
+    }
+    if cookie_header:
+        headers["Cookie"] = cookie_header
+    else:
+        logging.warning("Nenhum cookie de sessão encontrado para o host da API.")
+    return headers
+
+
+def create_http_pool(max_workers=4):
+    """
+    Cria um cliente HTTP com pool de conexões reaproveitadas entre os downloads.
+
+    Args:
+        max_workers (int): Número de downloads simultâneos; o pool comporta também os segmentos
+            de um arquivo grande baixado em paralelo.
+
+    Returns:
+        urllib3.PoolManager: Cliente HTTP configurado.
+    """
+    return urllib3.PoolManager(
+        maxsize=max_workers + MAX_SEGMENTS,
+        block=True,
+        # Apenas falhas de conexão e de leitura são repetidas aqui: as respostas 429/5xx e o Retry-After
+        # chegam ao RateLimiter, que repete a requisição e ajusta o ritmo das seguintes
+        retries=urllib3.Retry(connect=3, read=3, status=0, backoff_factor=0.5, respect_retry_after_header=False),
+        timeout=urllib3.Timeout(connect=10, read=60),
+    )
+
+
+def content_range_total(response):
+    """
+    Obtém o tamanho total do arquivo informado no cabeçalho ``Content-Range`` de uma resposta 206.
+
+    Args:
+        response (urllib3.BaseHTTPResponse): Resposta HTTP.
+
+    Returns:
+        int | None: Tamanho total em bytes ou None se desconhecido.
+    """
+    total = response.headers.get("Content-Range", "").rpartition("/")[2]
+    return int(total) if total.isdigit() else None
+
+
+class SegmentedDownload:
+    """
+    Baixa um arquivo em segmentos HTTP Range paralelos, gravados em um arquivo pré-alocado.
+
+    O progresso de cada segmento é salvo em um ponto de retomada (``<destino>.part.json``);
+    se o download for interrompido, a próxima tentativa continua de onde cada segmento
+    parou, desde que o servidor informe o mesmo tamanho e o mesmo validador (ETag ou
+    Last-Modified). O arquivo só é movido para o caminho final depois de conferido o tamanho.
+
+    Args:
+        http (urllib3.PoolManager): Cliente HTTP compartilhado.
+        url (str): URL do arquivo.
+        dest_path (str): Caminho final do arquivo.
+        headers (dict): Cabeçalhos da sessão autenticada.
+        size (int): Tamanho total do arquivo (em bytes).
+        validator (str): ETag ou Last-Modified do arquivo, usado para invalidar pontos de retomada antigos.
+        segments (int): Número máximo de segmentos simultâneos.
+        on_progress (callable): Função chamada com o número de bytes de cada bloco recebido.
+        cancel_event (threading.Event): Se sinalizado, os segmentos param e o ponto de retomada é mantido.
+        limiter (RateLimiter): Controle de ritmo das requisições e da largura de banda.
+    """
+
+    def __init__(self, http, url, dest_path, headers, size, validator=None, segments=MAX_SEGMENTS,
+                 on_progress=None, cancel_event=None, limiter=rate_limiter):
+        self.http = http
+        self.url = url
+        self.dest_path = dest_path
+        self.part_path = dest_path + ".part"
+        self.checkpoint_path = self.part_path + ".json"
+        self.headers = headers
+        self.size = size
+        self.validator = validator
+        self.segments = segments
+        self.on_progress = on_progress
+        self.cancel_event = cancel_event
+        self.limiter = limiter
+        self._lock = threading.Lock()
+        # Cada segmento é uma lista [início, fim (inclusivo), bytes já gravados]
+        self._ranges = []
+
+    def _plan(self):
+        count = max(1, min(self.segments, self.size // MIN_SEGMENT_SIZE))
+        step = -(-self.size // count)
+        return [[start, min(start + step, self.size) - 1, 0] for start in range(0, self.size, step)]
+
+    def _load_checkpoint(self):
+        if not os.path.exists(self.part_path):
+            return None
+        try:
+            with open(self.checkpoint_path, encoding="utf-8") as f:
+                checkpoint = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if (checkpoint.get("url"), checkpoint.get("size"), checkpoint.get("validator")) != (
+                self.url, self.size, self.validator):
+            logging.info(f"Ponto de retomada desatualizado, reiniciando o download: {self.dest_path}")
+            return None
+        return checkpoint["ranges"]
+
+    def _save_checkpoint(self):
+        with self._lock:
+            data = {"url": self.url, "size": self.size, "validator": self.validator, "ranges": self._ranges}
+            tmp_path = self.checkpoint_path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(data, f)
+            os.replace(tmp_path, self.checkpoint_path)
+
+    def _cancelled(self):
+        return self.cancel_event is not None and self.cancel_event.is_set()
+
+    def _fetch(self, fd, segment):
+        attempts = 0
+        while segment[0] + segment[2] <= segment[1]:
+            if self._cancelled():
+                raise DownloadInterrupted("Download cancelado.")
+            offset = segment[0] + segment[2]
+            headers = dict(self.headers, Range=f"bytes={offset}-{segment[1]}")
+            with self.limiter.request(self.http, "GET", self.url, self.cancel_event,
+                                      headers=headers, preload_content=False) as response:
+                received = segment[2]
+                try:
+                    if response.status != 206:
+                        raise RuntimeError(f"Resposta HTTP {response.status} ao pedir o intervalo {headers['Range']}")
+                    unsaved = 0
+                    for chunk in response.stream(CHUNK_SIZE):
+                        chunk = chunk[:segment[1] + 1 - offset]
+                        os.pwrite(fd, chunk, offset)
+                        offset += len(chunk)
+                        with self._lock:
+                            segment[2] += len(chunk)
+                        if self.on_progress:
+                            self.on_progress(len(chunk))
+                        self.limiter.throttle(self.url, len(chunk), self.cancel_event)
+                        unsaved += len(chunk)
+                        if unsaved >= CHECKPOINT_INTERVAL:
+                            self._save_checkpoint()
+                            unsaved = 0
+                        if self._cancelled():
+                            raise DownloadInterrupted("Download cancelado.")
+                    if segment[2] == received:
+                        raise RuntimeError(f"Resposta vazia ao pedir o intervalo {headers['Range']}")
+                except (urllib3.exceptions.HTTPError, OSError) as e:
+                    # Conexão interrompida no meio do segmento: retoma a partir do último byte gravado
+                    attempts += 1
+                    if attempts > SEGMENT_RETRIES:
+                        raise
+                    logging.warning(f"Segmento interrompido ({e}), retomando a partir do byte {offset}.")
+                finally:
+                    if segment[0] + segment[2] <= segment[1]:
+                        # A resposta não foi lida até o fim: a conexão não pode voltar ao pool com dados pendentes
+                        response.close()
+                    response.release_conn()
+        self._save_checkpoint()
+
+    def run(self):
+        """
+        Executa o download dos segmentos pendentes.
+
+        Returns:
+            tuple: Quantidade de bytes do arquivo e hash SHA-256 do conteúdo.
+        """
+        self._ranges = self._load_checkpoint() or self._plan()
+        resumed = sum(segment[2] for segment in self._ranges)
+        if resumed:
+            logging.info(f"Retomando {self.dest_path} a partir de {resumed} de {self.size} bytes.")
+            if self.on_progress:
+                self.on_progress(resumed)
+        fd = os.open(self.part_path, os.O_RDWR | os.O_CREAT)
+        try:
+            if not resumed:
+                # Pré-aloca o arquivo para que os segmentos gravem em posições fixas sem fragmentá-lo
+                os.ftruncate(fd, self.size)
+                if hasattr(os, "posix_fallocate") and self.size:
+                    os.posix_fallocate(fd, 0, self.size)
+            self._save_checkpoint()
+            pending = [segment for segment in self._ranges if segment[0] + segment[2] <= segment[1]]
+            with ThreadPoolExecutor(max_workers=max(len(pending), 1)) as executor:
+                for future in [executor.submit(self._fetch, fd, segment) for segment in pending]:
+                    future.result()
+        finally:
+            os.close(fd)
+        # O tamanho do arquivo pré-alocado sempre confere; o que importa são os bytes gravados em cada segmento
+        written = sum(segment[2] for segment in self._ranges)
+        incomplete = [segment for segment in self._ranges if segment[2] != segment[1] - segment[0] + 1]
+        if written != self.size or incomplete:
+            # O ponto de retomada não descreve o arquivo: a próxima tentativa recomeça do zero
+            for path in (self.part_path, self.checkpoint_path):
+                if os.path.exists(path):
+                    os.remove(path)
+            raise RuntimeError(f"Tamanho final incorreto: {written} bytes gravados, esperado {self.size}.")
+        os.replace(self.part_path, self.dest_path)
+        os.remove(self.checkpoint_path)
+        return self.size, hash_file(self.dest_path)
+
+
+def download_file(http, url, dest_path, headers, on_progress=None, cancel_event=None, limiter=rate_limiter):
+    """
+    Baixa um arquivo via HTTP gravando a resposta diretamente em disco.
+
+    O conteúdo é gravado em um arquivo temporário ``.part`` e só é movido para
+    o caminho final quando o download termina, evitando arquivos incompletos.
+    Arquivos grandes, quando o servidor aceita requisições Range, são baixados em
+    segmentos paralelos por ``SegmentedDownload`` e podem ser retomados.
+
+    Args:
+        http (urllib3.PoolManager): Cliente HTTP compartilhado.
+        url (str): URL do arquivo a ser baixado.
+        dest_path (str): Caminho final do arquivo.
+        headers (dict): Cabeçalhos da sessão autenticada.
+        on_progress (callable): Função chamada com o número de bytes de cada bloco recebido.
+        cancel_event (threading.Event): Se sinalizado, o download é interrompido com ``DownloadInterrupted``.
+        limiter (RateLimiter): Controle de ritmo das requisições e da largura de banda.
+
+    Returns:
+        tuple: Quantidade de bytes gravados e hash SHA-256 do conteúdo.
+    """
+    part_path = dest_path + ".part"
+    checkpoint_path = part_path + ".json"
+    segmented = None
+    start = time.perf_counter()
+    try:
+        # Pede o arquivo inteiro como intervalo: a resposta 206 informa o tamanho e o suporte a Range
+        with limiter.request(http, "GET", url, cancel_event, headers=dict(headers, Range="bytes=0-"),
+                             preload_content=False) as response:
+            DOWNLOAD_TTFB_SECONDS.observe(time.perf_counter() - start, mode="direct")
+            try:
+                if response.status not in (200, 206):
+                    raise RuntimeError(f"Resposta HTTP {response.status} para o URL: {url}")
+                total = content_range_total(response) if response.status == 206 else None
+                if total is not None and (total >= SEGMENT_THRESHOLD or os.path.exists(checkpoint_path)):
+                    # Descarta a resposta aberta: os segmentos fazem suas próprias requisições
+                    response.close()
+                    validator = response.headers.get("ETag") or response.headers.get("Last-Modified")
+                    segmented = SegmentedDownload(http, url, dest_path, headers, total, validator,
+                                                  on_progress=on_progress, cancel_event=cancel_event,
+                                                  limiter=limiter)
+                else:
+                    size = 0
+                    digest = hashlib.sha256()
+                    with open(part_path, "wb") as f:
+                        for chunk in response.stream(CHUNK_SIZE):
+                            f.write(chunk)
+                            digest.update(chunk)
+                            size += len(chunk)
+                            if on_progress:
+                                on_progress(len(chunk))
+                            limiter.throttle(url, len(chunk), cancel_event)
+                            if cancel_event is not None and cancel_event.is_set():
+                                raise DownloadInterrupted("Download cancelado.")
+                    expected = total if total is not None else response.headers.get("Content-Length")
+                    if expected is not None and size != int(expected):
+                        raise RuntimeError(f"Tamanho final incorreto: {size} bytes, esperado {expected}.")
+            except Exception:
+                response.close()
+                raise
+            finally:
+                response.release_conn()
+    except Exception:
+        DOWNLOAD_FAILURES.inc(mode="direct")
+        if os.path.exists(part_path) and not segmented:
+            os.remove(part_path)
+        raise
+    if segmented:
+        try:
+            size, sha256 = segmented.run()
+        except Exception:
+            # O arquivo parcial e o ponto de retomada são mantidos para a próxima tentativa
+            DOWNLOAD_FAILURES.inc(mode="direct")
+            raise
+    else:
+        os.replace(part_path, dest_path)
+        if os.path.exists(checkpoint_path):
+            os.remove(checkpoint_path)
+        sha256 = digest.hexdigest()
+    invalid = check_pdf(dest_path) if dest_path.lower().endswith(".pdf") else None
+    if invalid:
+        # O tamanho confere, mas o conteúdo não é um PDF (por exemplo, uma página de erro do servidor)
+        os.remove(dest_path)
+        INVALID_PDFS.inc(mode="direct")
+        DOWNLOAD_FAILURES.inc(mode="direct")
+        raise RuntimeError(f"PDF inválido: {invalid}")
+    elapsed = time.perf_counter() - start
+    DOWNLOAD_SECONDS.observe(elapsed, mode="direct")
+    DOWNLOAD_THROUGHPUT.observe(size / max(elapsed, 1e-6), mode="direct")
+    DOWNLOAD_BYTES.inc(size, mode="direct")
+    return size, sha256
+
+
+class HttpDownloader:
+    """
+    Baixa arquivos em paralelo à medida que são entregues, usando os cookies da sessão do WebDriver.
+
+    Os arquivos podem ser entregues com ``submit`` enquanto as aulas ainda estão sendo
+    percorridas: os downloads começam imediatamente, e ``submit`` só bloqueia quando há
+    mais arquivos aguardando do que o dobro do número de downloads simultâneos.
+
+    Args:
+        driver (WebDriver): Instância do WebDriver já autenticada.
+        max_workers (int): Número de downloads simultâneos.
+        on_result (callable): Função chamada com o resultado de cada download assim que ele termina,
+            na thread que fez o download.
+        cancel_event (threading.Event): Se sinalizado, os downloads ainda não iniciados são descartados.
+        on_progress (callable): Função chamada com o número de bytes de cada bloco recebido.
+        limiter (RateLimiter): Controle de ritmo das requisições, compartilhado entre os downloads do processo.
+    """
+
+    def __init__(self, driver, max_workers=4, on_result=None, cancel_event=None, on_progress=None,
+                 limiter=rate_limiter):
+        self.driver = driver
+        self.max_workers = max_workers
+        self.on_result = on_result
+        self.cancel_event = cancel_event
+        self.on_progress = on_progress
+        self.limiter = limiter
+        self.results = []
+        self._lock = threading.Lock()
+        self._headers = None
+        self._http = None
+        self._stage = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def submit(self, url, dest_path):
+        """
+        Entrega um arquivo para download. Deve ser chamado na thread que controla o WebDriver.
+
+        Returns:
+            bool: True se o arquivo foi aceito, False se os downloads foram cancelados.
+        """
+        if self._stage is None:
+            # A sessão só é copiada do navegador quando o primeiro arquivo chega
+            self._headers = get_session_headers(self.driver)
+            self._http = create_http_pool(self.max_workers)
+            self._stage = PipelineStage(self._fetch, workers=self.max_workers, name="download")
+        return self._stage.put((url, dest_path), self.cancel_event)
+
+    def join(self):
+        """
+        Aguarda o término dos downloads entregues até agora.
+        """
+        if self._stage is not None:
+            self._stage.join()
+
+    def close(self):
+        """
+        Aguarda os downloads pendentes e libera as conexões.
+
+        Returns:
+            list: Lista de dicionários com o URL, o caminho, o tamanho, o hash e o erro (se houver) de cada download.
+        """
+        if self._stage is not None:
+            self._stage.close()
+            self._http.clear()
+            self.limiter.log_stats()
+            self._stage = None
+        return self.results
+
+    def _fetch(self, item):
+        url, dest_path = item
+        try:
+            if self.cancel_event is not None and self.cancel_event.is_set():
+                raise DownloadInterrupted("Download cancelado.")
+            size, sha256 = download_file(self._http, url, dest_path, self._headers, self.on_progress,
+                                         self.cancel_event, self.limiter)
+            logging.info(f"Arquivo baixado: {dest_path} ({size} bytes)")
+            result = {"url": url, "path": dest_path, "size": size, "sha256": sha256, "error": None}
+        except Exception as e:
+            logging.error(f"Erro ao baixar o arquivo do URL: {url} - {e}")
+            result = {"url": url, "path": dest_path, "size": 0, "sha256": None, "error": str(e)}
+        with self._lock:
+            self.results.append(result)
+        if self.on_result:
+            self.on_result(result)
@@ -0,0 +1,102 @@
+import logging
+import threading
+from queue import Queue, Empty
+from main import setup_chrome_driver, quit_chrome_driver, set_download_dir
+
+
+class DriverPool:
+    """
+    Mantém navegadores já iniciados, prontos para os próximos jobs.
+
+    Iniciar o Chrome é a etapa mais lenta da abertura de um job; o pool deixa até
+    ``size`` navegadores aquecidos em espera e repõe cada um assim que é retirado.
+    Os navegadores não voltam ao pool depois de usados: cada job recebe um navegador
+    sem cookies nem dados de outros usuários, e é encerrado ao ser devolvido.
+
+    Args:
+        download_dir (str): Diretório de downloads inicial dos navegadores em espera.
+        size (int): Número de navegadores mantidos em espera; 0 desativa o aquecimento.
+        **options: Opções repassadas a ``setup_chrome_driver``.
+    """
+
+    def __init__(self, download_dir, size=1, **options):
+        self.download_dir = download_dir
+        self.size = size
+        self.options = options
+        self._idle = Queue()
+        self._lock = threading.Lock()
+        self._starting = 0
+        self._closed = False
+
+    def start(self):
+        """
+        Inicia, em segundo plano, os navegadores que ficam em espera.
+        """
+        with self._lock:
+            missing = 0 if self._closed else self.size - self._idle.qsize() - self._starting
+            self._starting += max(missing, 0)
+        for _ in range(missing):
+            threading.Thread(target=self._warm, daemon=True).start()
+
+    def _warm(self):
+        try:
+            driver = setup_chrome_driver(self.download_dir, **self.options)
+        except Exception as e:
+            logging.error(f"Erro ao aquecer navegador: {e}")
+            driver = None
+        with self._lock:
+            self._starting -= 1
+            if driver is not None and not self._closed:
+                self._idle.put(driver)
+                return
+        if driver is not None:
+            quit_chrome_driver(driver)
+
+    def acquire(self, download_dir):
+        """
+        Retira um navegador aquecido, ou inicia um novo se não houver nenhum em espera.
+
+        Args:
+            download_dir (str): Diretório onde o navegador deve salvar os downloads.
+
+        Returns:
+            WebDriver: Navegador pronto para uso.
+        """
+        driver = None
+        while driver is None:
+            try:
+                driver = self._idle.get_nowait()
+            except Empty:
+                break
+            try:
+                set_download_dir(driver, download_dir)
+            except Exception as e:
+                # O navegador em espera pode ter sido encerrado pelo sistema
+                logging.warning(f"Navegador aquecido indisponível, descartando: {e}")
+                try:
+                    quit_chrome_driver(driver)
+                except Exception:
+                    pass
+                driver = None
+        self.start()
+        if driver is None:
+            driver = setup_chrome_driver(download_dir, **self.options)
+        return driver
+
+    def release(self, driver):
+        """
+        Encerra um navegador retirado do pool.
+        """
+        quit_chrome_driver(driver)
+
+    def close(self):
+        """
+        Encerra os navegadores em espera.
+        """
+        with self._lock:
+            self._closed = True
+        while True:
+            try:
+                quit_chrome_driver(self._idle.get_nowait())
+            except Empty:
+                break
@@ -0,0 +1,477 @@
+import re
+import json
+import time
+import random
+import secrets
+import threading
+from html import escape
+from urllib.parse import urlsplit, parse_qs
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+# Caminhos dos links de download de PDF e de vídeo, iguais aos da API real
+PDF_PATH = "/api/aluno/pdf/download/"
+VIDEO_PATH = "/api/aluno/video/download/"
+# Caminho da API com os dados do curso consultada pelo painel do aluno
+COURSE_API_PATH = "/api/aluno/curso/"
+# Nome do cookie de sessão emitido após o login
+SESSION_COOKIE = "fake_session"
+# Tamanho dos blocos enviados no corpo dos PDFs
+CHUNK_SIZE = 16 * 1024
+
+LOGIN_PAGE = """<!DOCTYPE html>
+<html lang="pt-br">
+<head><meta charset="UTF-8"><title>Login</title></head>
+<body>
+    <form method="post" action="/login">
+        <input type="hidden" name="next" value="{next}">
+        <input type="text" name="loginField">
+        <input type="password" name="passwordField">
+        <button type="submit"><span>Continuar</span></button>
+    </form>
+</body>
+</html>
+"""
+
+COURSE_PAGE = """<!DOCTYPE html>
+<html lang="pt-br">
+<head><meta charset="UTF-8"><title>{title}</title></head>
+<body>
+    <div class="CourseInfo"><div class="CourseInfo-content"><h2 class="CourseInfo-content-title">{title}</h2></div></div>
+    <div class="LessonList">{lessons}</div>
+    <script>
+        const surveyRate = {survey_rate};
+        const renderDelay = {render_delay};
+        const urls = {urls};
+        const answered = new Set();
+
+        // Renderiza os botões de download de uma aula, como o site faz ao expandi-la
+        function renderButtons(item) {{
+            if (item.querySelector('.LessonButton')) return;
+            const body = document.createElement('div');
+            body.className = 'Collapse-body';
+            urls[item.dataset.index].forEach(([url, label]) => {{
+                const link = document.createElement('a');
+                link.className = 'LessonButton';
+                link.href = url;
+                link.textContent = label;
+                body.append(link);
+            }});
+            item.append(body);
+        }}
+
+        document.querySelectorAll('.LessonList-item').forEach((item) => {{
+            item.querySelector('.Collapse-header').addEventListener('click', () => {{
+                setTimeout(() => renderButtons(item), renderDelay);
+            }});
+        }});
+
+        // Modal de pesquisa que intercepta o primeiro clique em alguns downloads
+        function showSurvey() {{
+            const portal = document.createElement('div');
+            portal.className = 'ReactModalPortal';
+            const ignore = document.createElement('button');
+            ignore.textContent = 'Ignorar pesquisa';
+            const close = document.createElement('button');
+            close.setAttribute('aria-label', 'Fechar Modal');
+            close.textContent = 'x';
+            ignore.addEventListener('click', () => ignore.remove());
+            close.addEventListener('click', () => portal.remove());
+            portal.append(ignore, close);
+            document.body.append(portal);
+        }}
+
+        document.addEventListener('click', (event) => {{
+            const link = event.target.closest('.LessonButton');
+            if (!link || answered.has(link.href)) return;
+            answered.add(link.href);
+            if (Math.random() < surveyRate) {{
+                event.preventDefault();
+                showSurvey();
+            }}
+        }}, true);
+    </script>
+</body>
+</html>
+"""
+
+LESSON_ITEM = """
+        <div class="LessonList-item" data-index="{index}">
+            <div class="Collapse-header"><h2>{title}</h2><p>{subtitle}</p></div>{body}
+        </div>"""
+
+
+def fake_file(size, seed):
+    """
+    Gera o conteúdo de um arquivo falso (com cabeçalho de PDF) com o tamanho pedido.
+
+    Args:
+        size (int): Tamanho do arquivo em bytes.
+        seed (int | str): Semente que torna o conteúdo de cada arquivo diferente e reproduzível.
+
+    Returns:
+        bytes: Conteúdo do arquivo.
+    """
+    header = b"%PDF-1.4\n"
+    trailer = b"\n%%EOF\n"
+    padding = max(size - len(header) - len(trailer), 0)
+    return header + random.Random(seed).randbytes(padding) + trailer
+
+
+def fake_pdf(size, seed, text):
+    """
+    Gera um PDF válido de uma página com o texto informado, completado até o tamanho pedido.
+
+    O preenchimento fica em um stream não referenciado pelas páginas, de modo que o arquivo
+    tem o tamanho desejado e ainda pode ser lido por extratores de texto.
+
+    Args:
+        size (int): Tamanho aproximado do arquivo em bytes (nunca menor que o PDF mínimo).
+        seed (int | str): Semente do preenchimento.
+        text (str): Texto da página.
+
+    Returns:
+        bytes: Conteúdo do arquivo.
+    """
+    escaped = text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+    content = f"BT /F1 12 Tf 72 720 Td ({escaped}) Tj ET".encode("latin-1", "replace")
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+        b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Contents 4 0 R "
+        b"/Resources << /Font << /F1 5 0 R >> >> >>",
+        b"<< /Length %d >>\nstream\n%s\nendstream" % (len(content), content),
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>",
+    ]
+
+    def build(padding):
+        body = [b"%PDF-1.4\n"]
+        offsets = []
+        for number, obj in enumerate(objects + [b"<< /Length %d >>\nstream\n%s\nendstream" % (len(padding), padding)], 1):
+            offsets.append(sum(map(len, body)))
+            body.append(b"%d 0 obj\n%s\nendobj\n" % (number, obj))
+        xref = sum(map(len, body))
+        body.append(b"xref\n0 %d\n0000000000 65535 f \n" % (len(offsets) + 1))
+        body.extend(b"%010d 00000 n \n" % offset for offset in offsets)
+        body.append(b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(offsets) + 1, xref))
+        return b"".join(body)
+
+    overhead = len(build(b""))
+    # O comprimento do preenchimento altera o número de dígitos do PDF; uma segunda passagem corrige a diferença
+    padding_size = max(size - overhead, 0)
+    padding_size = max(padding_size - (len(build(b"0" * padding_size)) - overhead - padding_size), 0)
+    return build(random.Random(seed).randbytes(padding_size))
+
+
+class FakeSite:
+    """
+    Servidor HTTP local que imita as páginas de curso e a API de PDFs do Estratégia Concursos.
+
+    Serve a página de login (``loginField``/``passwordField``), a página de aulas com a
+    mesma marcação usada pelo script (``LessonList-item``, ``Collapse-header``,
+    ``.LessonButton``, ``h2.CourseInfo-content-title``) e o modal de pesquisa opcional
+    (``ReactModalPortal``), além da API JSON do curso que o painel consulta para montar a
+    lista de aulas. Os PDFs e vídeos têm tamanho, latência, largura de banda e
+    taxa de falhas configuráveis e aceitam requisições Range, permitindo medir o
+    desempenho sem acessar o site real.
+
+    Args:
+        lessons (int): Número de aulas do curso.
+        files_per_lesson (int): Número de PDFs por aula.
+        pdf_size (int): Tamanho de cada PDF (em bytes).
+        videos_per_lesson (int): Número de vídeos por aula.
+        video_size (int): Tamanho de cada vídeo (em bytes).
+        latency (float): Atraso antes da resposta de cada arquivo (em segundos).
+        bandwidth (float): Largura de banda de cada download (em bytes por segundo); 0 para ilimitada.
+        failure_rate (float): Fração dos downloads que respondem com erro 503.
+        max_concurrent (int): Downloads simultâneos aceitos; os excedentes recebem 429 com
+            ``Retry-After``, como faz um servidor que limita os clientes. 0 para ilimitado.
+        survey_rate (float): Fração dos cliques em download interceptados pelo modal de pesquisa.
+        expanded (int): Número de aulas que já vêm expandidas; as demais exibem os botões
+            apenas após o clique em ``Collapse-header``.
+        render_delay (int): Atraso da renderização dos botões ao expandir uma aula (em milissegundos).
+        require_login (bool): Se True, a página do curso exige login.
+        course_id (int): Identificador do curso usado na URL.
+        host (str): Endereço em que o servidor escuta.
+        port (int): Porta do servidor; 0 para escolher uma porta livre.
+        seed (int): Semente das falhas simuladas.
+    """
+
+    def __init__(self, lessons=20, files_per_lesson=1, pdf_size=1024 * 1024, videos_per_lesson=0,
+                 video_size=64 * 1024 * 1024, latency=0.0, bandwidth=0, failure_rate=0.0, max_concurrent=0, survey_rate=0.0,
+                 expanded=1, render_delay=50, require_login=True, course_id=123456, host="127.0.0.1", port=0,
+                 seed=0):
+        self.lessons = lessons
+        self.files_per_lesson = files_per_lesson
+        self.pdf_size = pdf_size
+        self.videos_per_lesson = videos_per_lesson
+        self.video_size = video_size
+        self.latency = latency
+        self.bandwidth = bandwidth
+        self.failure_rate = failure_rate
+        self.max_concurrent = max_concurrent
+        self._in_flight = 0
+        self.survey_rate = survey_rate
+        self.expanded = expanded
+        self.render_delay = render_delay
+        self.require_login = require_login
+        self.course_id = course_id
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._sessions = set()
+        self._files = {}
+        self.stats = {"pages": 0, "logins": 0, "file_requests": 0, "file_failures": 0, "throttled": 0, "api_requests": 0,
+                      "bytes_sent": 0}
+        self.server = ThreadingHTTPServer((host, port), self._handler_class())
+        self.server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def host(self):
+        return self.server.server_address[0]
+
+    @property
+    def base_url(self):
+        return f"http://{self.host}:{self.server.server_address[1]}"
+
+    @property
+    def course_url(self):
+        return f"{self.base_url}/app/dashboard/cursos/{self.course_id}/aulas"
+
+    @property
+    def course_api_url(self):
+        return f"{self.base_url}{COURSE_API_PATH}{{course_id}}"
+
+    @property
+    def pdf_url_prefix(self):
+        return f"{self.base_url}{PDF_PATH}"
+
+    @property
+    def video_url_prefix(self):
+        return f"{self.base_url}{VIDEO_PATH}"
+
+    @property
+    def total_files(self):
+        return self.lessons * (self.files_per_lesson + self.videos_per_lesson)
+
+    def start(self):
+        """
+        Inicia o servidor em uma thread separada.
+        """
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """
+        Encerra o servidor.
+        """
+        self.server.shutdown()
+        self.server.server_close()
+        if self._thread:
+            self._thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+
+    def _count(self, key, amount=1):
+        with self._lock:
+            self.stats[key] += amount
+
+    def _should_fail(self):
+        with self._lock:
+            return self._random.random() < self.failure_rate
+
+    def _file(self, path, file_id):
+        if path == PDF_PATH:
+            count, size = self.lessons * self.files_per_lesson, self.pdf_size
+        else:
+            count, size = self.lessons * self.videos_per_lesson, self.video_size
+        if not 0 < file_id <= count:
+            return None
+        with self._lock:
+            data = self._files.get((path, file_id))
+            if data is None:
+                if path == PDF_PATH:
+                    data = fake_pdf(size, f"{path}{file_id}", f"Arquivo {file_id} do curso de teste {self.course_id}")
+                else:
+                    data = fake_file(size, f"{path}{file_id}")
+                self._files[(path, file_id)] = data
+            return data
+
+    def _lesson_links(self, index):
+        pdfs = [(f"{self.pdf_url_prefix}{index * self.files_per_lesson + n + 1}", "Baixar PDF")
+                for n in range(self.files_per_lesson)]
+        videos = [(f"{self.video_url_prefix}{index * self.videos_per_lesson + n + 1}", "Baixar vídeo")
+                  for n in range(self.videos_per_lesson)]
+        return pdfs + videos
+
+    def render_course_api(self):
+        """
+        Monta a resposta da API com os dados do curso.
+
+        Returns:
+            dict: Dados do curso e das aulas, com os arquivos de cada uma.
+        """
+        lessons = []
+        for index in range(self.lessons):
+            pdfs = [{"id": index * self.files_per_lesson + n + 1, "url": url}
+                    for n, (url, _) in enumerate(self._lesson_links(index)[:self.files_per_lesson])]
+            videos = [{"id": index * self.videos_per_lesson + n + 1, "url": url}
+                      for n, (url, _) in enumerate(self._lesson_links(index)[self.files_per_lesson:])]
+            lessons.append({"id": index + 1, "nome": f"Aula {index:02d}", "conteudo": f"Conteúdo da aula {index:02d}",
+                            "pdfs": pdfs, "videos": videos})
+        return {"data": {"id": self.course_id, "nome": f"Curso de Teste {self.course_id}", "aulas": lessons}}
+
+    def render_course(self):
+        """
+        Monta a página de aulas do curso.
+
+        Returns:
+            str: HTML da página.
+        """
+        urls = {}
+        items = []
+        for index in range(self.lessons):
+            urls[index] = self._lesson_links(index)
+            body = ""
+            if index < self.expanded:
+                links = "".join(f'<a class="LessonButton" href="{url}">{label}</a>' for url, label in urls[index])
+                body = f'<div class="Collapse-body">{links}</div>'
+            items.append(LESSON_ITEM.format(
+                index=index, title=f"Aula {index:02d}", subtitle=escape(f"Conteúdo da aula {index:02d}"), body=body
+            ))
+        return COURSE_PAGE.format(
+            title=f"Curso de Teste {self.course_id}", lessons="".join(items), urls=json.dumps(urls),
+            survey_rate=self.survey_rate, render_delay=self.render_delay,
+        )
+
+    def _handler_class(self):
+        site = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):
+                pass
+
+            def _logged_in(self):
+                if not site.require_login:
+                    return True
+                for part in self.headers.get("Cookie", "").split(";"):
+                    name, _, value = part.strip().partition("=")
+                    if name == SESSION_COOKIE and value in site._sessions:
+                        return True
+                return False
+
+            def _send(self, status, body=b"", content_type="text/html; charset=utf-8", headers=None):
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                if body and self.command != "HEAD":
+                    self.wfile.write(body)
+
+            def do_GET(self):
+                path = urlsplit(self.path).path
+                match = re.fullmatch(f"({PDF_PATH}|{VIDEO_PATH})(\\d+)", path)
+                if match:
+                    self._send_file(match.group(1), int(match.group(2)))
+                elif path == f"{COURSE_API_PATH}{site.course_id}":
+                    site._count("api_requests")
+                    if self._logged_in():
+                        self._send(200, json.dumps(site.render_course_api()).encode(), "application/json")
+                    else:
+                        self._send(401, b'{"message": "Unauthenticated."}', "application/json")
+                elif path == urlsplit(site.course_url).path:
+                    site._count("pages")
+                    page = site.render_course() if self._logged_in() else LOGIN_PAGE.format(next=escape(path))
+                    self._send(200, page.encode())
+                else:
+                    self._send(404, b"Not Found", "text/plain")
+
+            def do_POST(self):
+                if urlsplit(self.path).path != "/login":
+                    self._send(404, b"Not Found", "text/plain")
+                    return
+                length = int(self.headers.get("Content-Length", 0))
+                form = parse_qs(self.rfile.read(length).decode())
+                if not form.get("loginField") or not form.get("passwordField"):
+                    self._send(200, LOGIN_PAGE.format(next=escape(form.get("next", ["/"])[0])).encode())
+                    return
+                token = secrets.token_hex(16)
+                with site._lock:
+                    site._sessions.add(token)
+                site._count("logins")
+                self._send(303, headers={
+                    "Location": form.get("next", ["/"])[0],
+                    "Set-Cookie": f"{SESSION_COOKIE}={token}; Path=/",
+                })
+
+            def _send_file(self, path, file_id):
+                site._count("file_requests")
+                with site._lock:
+                    throttled = site.max_concurrent and site._in_flight >= site.max_concurrent
+                    if not throttled:
+                        site._in_flight += 1
+                if throttled:
+                    site._count("throttled")
+                    self._send(429, b"Too Many Requests", "text/plain", {"Retry-After": "1"})
+                    return
+                try:
+                    self._serve_file(path, file_id)
+                finally:
+                    with site._lock:
+                        site._in_flight -= 1
+
+            def _serve_file(self, path, file_id):
+                data = site._file(path, file_id)
+                if data is None:
+                    self._send(404, b"Not Found", "text/plain")
+                    return
+                if not self._logged_in():
+                    self._send(401, b"Unauthorized", "text/plain")
+                    return
+                if site.latency:
+                    time.sleep(site.latency)
+                if site._should_fail():
+                    site._count("file_failures")
+                    self._send(503, b"Service Unavailable", "text/plain")
+                    return
+                first, last = 0, len(data) - 1
+                match = re.fullmatch(r"bytes=(\d+)-(\d*)", self.headers.get("Range", ""))
+                if match:
+                    first, last = int(match.group(1)), min(int(match.group(2) or last), last)
+                    if first > last:
+                        self._send(416, headers={"Content-Range": f"bytes */{len(data)}"})
+                        return
+                self.send_response(206 if match else 200)
+                self.send_header("Content-Type", "application/pdf" if path == PDF_PATH else "video/mp4")
+                self.send_header("Content-Length", str(last - first + 1))
+                self.send_header("Accept-Ranges", "bytes")
+                self.send_header("ETag", f'"{path.strip("/").replace("/", "-")}-{file_id}"')
+                if match:
+                    self.send_header("Content-Range", f"bytes {first}-{last}/{len(data)}")
+                extension = "pdf" if path == PDF_PATH else "mp4"
+                self.send_header("Content-Disposition", f'attachment; filename="aula-{file_id}.{extension}"')
+                self.end_headers()
+                # Limita a vazão enviando blocos em intervalos compatíveis com a largura de banda
+                start = time.monotonic()
+                try:
+                    for offset in range(first, last + 1, CHUNK_SIZE):
+                        chunk = data[offset:min(offset + CHUNK_SIZE, last + 1)]
+                        self.wfile.write(chunk)
+                        site._count("bytes_sent", len(chunk))
+                        if site.bandwidth:
+                            delay = start + (offset - first + len(chunk)) / site.bandwidth - time.monotonic()
+                            if delay > 0:
+                                time.sleep(delay)
+                except (BrokenPipeError, ConnectionResetError):
+                    # O cliente desistiu da resposta (por exemplo, ao trocar para downloads em segmentos)
+                    self.close_connection = True
+
+        return Handler
@@ -0,0 +1,146 @@
+import os
+import logging
+import mimetypes
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import quote
+from flask import Response, send_file
+from manifest import hash_file
+
+# Modo de envio dos arquivos: vazio envia pelo próprio servidor WSGI (sendfile quando o servidor
+# oferece wsgi.file_wrapper, como o gunicorn); "x-accel" delega ao nginx (X-Accel-Redirect) e
+# "x-sendfile" ao Apache/lighttpd (X-Sendfile)
+FILES_SERVE_MODE = os.getenv("FILES_SERVE_MODE", "").lower()
+SERVE_MODES = ("", "x-accel", "x-sendfile")
+if FILES_SERVE_MODE not in SERVE_MODES:
+    raise ValueError(f"FILES_SERVE_MODE inválido: {FILES_SERVE_MODE!r} (use x-accel, x-sendfile ou vazio).")
+# Prefixo da location interna do nginx que aponta para DOWNLOAD_DIR, usado no modo x-accel
+FILES_ACCEL_PREFIX = os.getenv("FILES_ACCEL_PREFIX", "/protected-files").rstrip("/")
+# Tempo de cache dos links versionados (?v=<sha256>), cujo conteúdo nunca muda
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+
+
+class ContentHashes:
+    """
+    Cache dos hashes SHA-256 dos arquivos servidos, usados como ETag e versão dos links.
+
+    Cada hash fica associado ao tamanho e ao mtime do arquivo e é descartado quando
+    eles mudam. Os arquivos ainda sem hash são calculados em segundo plano, para que
+    nenhuma requisição espere a leitura de um arquivo grande.
+
+    Args:
+        workers (int): Número de threads que calculam os hashes em segundo plano.
+    """
+
+    def __init__(self, workers=1):
+        self._lock = threading.Lock()
+        self._hashes = {}
+        self._pending = set()
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="file-hash")
+
+    def get(self, path, stat=None):
+        """
+        Retorna o hash já calculado de um arquivo, ou None se ele ainda não é conhecido.
+
+        Args:
+            path (str): Caminho do arquivo.
+            stat (os.stat_result): Resultado de ``os.stat`` do arquivo, se já disponível.
+        """
+        try:
+            stat = stat or os.stat(path)
+        except OSError:
+            return None
+        with self._lock:
+            cached = self._hashes.get(path)
+        if cached and cached[:2] == (stat.st_size, stat.st_mtime_ns):
+            return cached[2]
+        return None
+
+    def compute(self, path):
+        """
+        Calcula e guarda o hash de um arquivo.
+
+        Returns:
+            str: Hash SHA-256 do arquivo, ou None se ele não pôde ser lido.
+        """
+        try:
+            stat = os.stat(path)
+            sha256 = hash_file(path)
+        except OSError as e:
+            logging.warning(f"Não foi possível calcular o hash de {path}: {e}")
+            return None
+        with self._lock:
+            self._hashes[path] = (stat.st_size, stat.st_mtime_ns, sha256)
+        return sha256
+
+    def schedule(self, path):
+        """
+        Agenda o cálculo do hash de um arquivo, se ele ainda não estiver na fila.
+        """
+        with self._lock:
+            if path in self._pending:
+                return
+            self._pending.add(path)
+
+        def run():
+            try:
+                self.compute(path)
+            finally:
+                with self._lock:
+                    self._pending.discard(path)
+
+        self._executor.submit(run)
+
+
+def send_download(request, path, rel_path, hashes, mode=FILES_SERVE_MODE):
+    """
+    Envia um arquivo baixado, com suporte a requisições condicionais e a intervalos de bytes.
+
+    O ETag é o hash SHA-256 do conteúdo. Enquanto o hash não é conhecido, o arquivo é
+    enviado com o ETag derivado de tamanho e mtime, e o hash é calculado em segundo plano.
+    Links com ``?v=<sha256>`` correspondente ao conteúdo atual são marcados como imutáveis
+    e guardados em cache por um ano; os demais são sempre revalidados (``no-cache``), o que
+    custa apenas uma resposta 304 quando o arquivo não mudou.
+
+    Args:
+        request (flask.Request): Requisição atual.
+        path (str): Caminho absoluto do arquivo.
+        rel_path (str): Caminho relativo a DOWNLOAD_DIR, usado no modo x-accel.
+        hashes (ContentHashes): Cache dos hashes dos arquivos.
+        mode (str): Modo de envio (veja FILES_SERVE_MODE).
+
+    Returns:
+        flask.Response: Resposta com o arquivo, o intervalo pedido (206) ou 304.
+    """
+    stat = os.stat(path)
+    sha256 = hashes.get(path, stat)
+    if sha256 is None:
+        hashes.schedule(path)
+    etag = sha256 or f"{stat.st_mtime_ns:x}-{stat.st_size:x}"
+    download_name = os.path.basename(path)
+
+    if mode in ("x-accel", "x-sendfile"):
+        # O proxy lê o arquivo e trata os intervalos; aqui só são resolvidas as condicionais
+        mimetype = mimetypes.guess_type(download_name)[0] or "application/octet-stream"
+        response = Response(mimetype=mimetype)
+        if mode == "x-accel":
+            response.headers["X-Accel-Redirect"] = f"{FILES_ACCEL_PREFIX}/{quote(rel_path)}"
+        else:
+            response.headers["X-Sendfile"] = path
+        response.headers["Content-Disposition"] = f"attachment; filename*=UTF-8''{quote(download_name)}"
+        response.last_modified = stat.st_mtime
+        response.set_etag(etag)
+    else:
+        # O send_file do Werkzeug usa o wsgi.file_wrapper do servidor, quando existe,
+        # e responde às requisições Range e condicionais a partir do ETag e do mtime
+        response = send_file(path, as_attachment=True, download_name=download_name,
+                             etag=etag, last_modified=stat.st_mtime)
+
+    if sha256 and request.args.get("v") == sha256:
+        response.cache_control.no_cache = None
+        response.cache_control.public = True
+        response.cache_control.max_age = IMMUTABLE_MAX_AGE
+        response.cache_control.immutable = True
+    else:
+        response.cache_control.no_cache = True
+    return response.make_conditional(request) if mode else response
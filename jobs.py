@@ -0,0 +1,180 @@
+import os
+import time
+import uuid
+import shutil
+import logging
+import threading
+from collections import OrderedDict
+from queue import Queue
+
+# Estados possíveis de um job
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+FINISHED_STATES = (DONE, FAILED, CANCELLED)
+
+
+class JobQueueFull(Exception):
+    """
+    Lançada quando a fila de jobs atingiu o limite e um novo job não pode ser admitido.
+    """
+
+
+class Job:
+    """
+    Job de download com identificador, diretório de trabalho e estado próprios.
+    """
+
+    def __init__(self, params, work_dir):
+        self.id = uuid.uuid4().hex[:12]
+        self.params = params
+        self.work_dir = os.path.join(work_dir, self.id)
+        self.status = QUEUED
+        self.error = None
+        self.result = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.cancel_event = threading.Event()
+
+    def to_dict(self):
+        """
+        Retorna o estado público do job (sem as credenciais recebidas em ``params``).
+        """
+        return {
+            "id": self.id,
+            "url": self.params.get("url"),
+            "status": self.status,
+            "error": self.error,
+            "result": self.result,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+
+
+class JobScheduler:
+    """
+    Executa jobs em um conjunto limitado de threads, com fila de tamanho máximo e cancelamento.
+
+    Args:
+        runner (callable): Função que executa um job; recebe o ``Job`` e retorna o resultado.
+        work_dir (str): Diretório onde cada job recebe um subdiretório de trabalho.
+        max_workers (int): Número de jobs executados ao mesmo tempo.
+        max_queue (int): Número máximo de jobs aguardando execução.
+        history (int): Número de jobs finalizados mantidos para consulta.
+
+    As threads são iniciadas apenas no primeiro ``submit``: criar o agendador, como na
+    importação de ``app.py``, não inicia nenhuma thread.
+    """
+
+    def __init__(self, runner, work_dir, max_workers=2, max_queue=10, history=100):
+        self.runner = runner
+        self.work_dir = work_dir
+        self.max_workers = max_workers
+        self.history = history
+        self.max_queue = max_queue
+        # A fila em si não tem limite: a admissão é contada à parte, para que um job cancelado
+        # enquanto aguarda libere sua vaga antes de ser retirado da fila por um worker
+        self._queue = Queue()
+        self._queued = 0
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+        self._started = False
+
+    def submit(self, **params):
+        """
+        Admite um novo job na fila.
+
+        Returns:
+            Job: Job criado.
+
+        Raises:
+            JobQueueFull: Se a fila estiver cheia.
+        """
+        job = Job(params, self.work_dir)
+        with self._lock:
+            if self._queued >= self.max_queue:
+                raise JobQueueFull("A fila de downloads está cheia. Tente novamente mais tarde.")
+            if not self._started:
+                for n in range(self.max_workers):
+                    threading.Thread(target=self._worker, name=f"job-worker-{n + 1}", daemon=True).start()
+                self._started = True
+            self._queued += 1
+            self._queue.put(job)
+            self._jobs[job.id] = job
+            self._prune()
+        logging.info(f"Job {job.id} adicionado à fila.")
+        return job
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def list(self):
+        with self._lock:
+            return list(self._jobs.values())
+
+    def count(self, status):
+        """
+        Conta os jobs em um determinado estado.
+        """
+        with self._lock:
+            return sum(1 for job in self._jobs.values() if job.status == status)
+
+    def cancel(self, job_id):
+        """
+        Cancela um job. Jobs na fila não chegam a ser executados e liberam na hora sua
+        vaga na fila; jobs em execução são interrompidos pelo runner na próxima
+        verificação de ``cancel_event``.
+
+        Returns:
+            bool: True se o job existia e ainda não havia terminado.
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job.status in FINISHED_STATES:
+                return False
+            job.cancel_event.set()
+            if job.status == QUEUED:
+                self._queued -= 1
+                self._finish(job, CANCELLED)
+        logging.info(f"Cancelamento solicitado para o job {job_id}.")
+        return True
+
+    def _prune(self):
+        finished = [job_id for job_id, job in self._jobs.items() if job.status in FINISHED_STATES]
+        for job_id in finished[:max(len(finished) - self.history, 0)]:
+            del self._jobs[job_id]
+
+    def _finish(self, job, status, error=None):
+        job.status = status
+        job.error = error
+        job.finished_at = time.time()
+
+    def _worker(self):
+        while True:
+            job = self._queue.get()
+            with self._lock:
+                if job.status != QUEUED:
+                    continue
+                self._queued -= 1
+                job.status = RUNNING
+                job.started_at = time.time()
+            os.makedirs(job.work_dir, exist_ok=True)
+            try:
+                result = self.runner(job)
+                status, error = (CANCELLED, None) if job.cancel_event.is_set() else (DONE, None)
+            except Exception as e:
+                result = None
+                status, error = (CANCELLED, None) if job.cancel_event.is_set() else (FAILED, str(e))
+                if status == FAILED:
+                    logging.error(f"Job {job.id} falhou: {e}")
+            finally:
+                shutil.rmtree(job.work_dir, ignore_errors=True)
+            with self._lock:
+                job.result = result
+                self._finish(job, status, error)
+            logging.info(f"Job {job.id} finalizado com estado: {status}")
@@ -1,14 +1,30 @@
 import os
-import time
 import re
+import time
 import logging
+import argparse
+from urllib.parse import unquote, urlsplit
 from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.remote.webelement import WebElement
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import NoAlertPresentException
 from dotenv import load_dotenv  # Importa a biblioteca dotenv
+from downloader import API_HOST, HttpDownloader
+from ratelimit import rate_limiter
+from watcher import DownloadWatcher
+from retries import RetryQueue
+from course_api import fetch_course_lessons
+from pipeline import PipelineStage
+from waits import wait_policy
+from session import SESSION_FILE, restore_session, save_session
+from manifest import MANIFEST_FILE, Manifest, hash_file
+from blobstore import BLOB_STORE_DIR, BlobStore
+from pdfindex import check_pdf
+from metrics import (LOGIN_SECONDS, OPEN_COURSE_SECONDS, LESSON_EXTRACTION_SECONDS, LESSON_API_FALLBACKS,
+                     DOWNLOAD_SECONDS, DOWNLOAD_THROUGHPUT, DOWNLOAD_BYTES, DOWNLOAD_FAILURES, SURVEY_MODAL_HITS,
+                     DOWNLOAD_TIMEOUTS, RENAME_FAILURES, INVALID_PDFS, ACTIVE_BROWSERS, DEDUP_BYTES)
 
 # Configuração do logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -16,13 +32,171 @@ logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(
 # Carrega as variáveis de ambiente do arquivo .env
 load_dotenv()
 
-def setup_chrome_driver(download_dir, headless=False):
+# Prefixo dos links de download de PDF das aulas (pode ser trocado para apontar para um servidor de testes)
+PDF_URL_PREFIX = os.getenv("ESTRATEGIA_PDF_URL_PREFIX", f"https://{API_HOST}/api/aluno/pdf/download/")
+# Prefixos dos links de download dos vídeos e dos materiais complementares das aulas
+VIDEO_URL_PREFIX = os.getenv("ESTRATEGIA_VIDEO_URL_PREFIX", f"https://{API_HOST}/api/aluno/video/download/")
+MATERIAL_URL_PREFIX = os.getenv("ESTRATEGIA_MATERIAL_URL_PREFIX", f"https://{API_HOST}/api/aluno/material/download/")
+
+# Tipos de arquivo das aulas: prefixo dos links, extensão e sufixo acrescentado ao nome do arquivo
+ASSET_TYPES = {
+    "pdf": {"prefix": PDF_URL_PREFIX, "extension": ".pdf", "suffix": ""},
+    "video": {"prefix": VIDEO_URL_PREFIX, "extension": ".mp4", "suffix": ""},
+    "material": {"prefix": MATERIAL_URL_PREFIX, "extension": ".pdf", "suffix": " - Material"},
+}
+# Tipos baixados quando nenhum outro é pedido
+DEFAULT_ASSET_TYPES = ("pdf",)
+# Tipos que podem ser baixados clicando no botão; os demais (arquivos grandes) são sempre baixados via HTTP
+BROWSER_ASSET_TYPES = ("pdf", "material")
+# Downloads pelo navegador iniciados e ainda não concluídos antes que a varredura das aulas aguarde
+MAX_PENDING_BROWSER_DOWNLOADS = int(os.getenv("ESTRATEGIA_MAX_PENDING_BROWSER_DOWNLOADS", "8"))
+# Tempo máximo de espera (em segundos) para que um download sem nome conhecido comece antes do próximo clique
+DOWNLOAD_START_TIMEOUT = float(os.getenv("ESTRATEGIA_DOWNLOAD_START_TIMEOUT", "30"))
+
+# Script que expande as aulas fechadas e extrai, em uma única chamada, os dados de todas as aulas.
+# Argumentos: pares [tipo, prefixo dos links], se deve expandir as aulas e tempo limite da expansão (ms).
+EXTRACT_LESSONS_SCRIPT = """
+const [assetTypes, expand, timeoutMs, only, sequential] = arguments;
+const done = arguments[arguments.length - 1];
+const items = Array.from(document.querySelectorAll('.LessonList-item'));
+const hasButtons = (item) => item.querySelector('.LessonButton') !== null;
+const kindOf = (href) => {
+    const match = assetTypes.find(([kind, prefix]) => href && href.startsWith(prefix));
+    return match ? match[0] : null;
+};
+const assetsOf = (item) => {
+    const seen = new Set();
+    return Array.from(item.querySelectorAll('a[href]'))
+        .map((link) => ({url: link.href, kind: kindOf(link.href)}))
+        .filter((asset) => asset.kind && !seen.has(asset.url) && seen.add(asset.url));
+};
+const textOf = (item, tag) => {
+    const element = item.querySelector(tag);
+    return element ? element.innerText.trim() : null;
+};
+const expandHeader = (item) => {
+    const header = item.querySelector('.Collapse-header');
+    if (header) header.click();
+};
+// Os arquivos de cada aula são guardados assim que seus botões aparecem, pois, em um acordeão,
+// expandir uma aula fecha as demais
+const found = new Map();
+const harvest = () => items.forEach((item, index) => {
+    if (!found.has(index) && hasButtons(item)) found.set(index, assetsOf(item));
+});
+const selected = items.filter((item, index) => !only || only.includes(index + 1));
+const collapsed = expand ? selected.filter((item) => !hasButtons(item)) : [];
+const isPending = (item) => !found.has(items.indexOf(item));
+const finish = () => {
+    harvest();
+    done({
+        lessons: selected.map((item) => {
+            const index = items.indexOf(item);
+            return {
+                index: index + 1,
+                title: textOf(item, 'h2'),
+                subtitle: textOf(item, 'p'),
+                assets: found.has(index) ? found.get(index) : assetsOf(item),
+            };
+        }),
+        pending: collapsed.filter(isPending).map((item) => items.indexOf(item) + 1),
+    });
+};
+// Espera até que todas as aulas indicadas exibam os botões ou que o tempo limite se esgote
+const waitFor = (targets, next) => {
+    const started = Date.now();
+    const poll = () => {
+        harvest();
+        if (targets.some(isPending) && Date.now() - started < timeoutMs) {
+            setTimeout(poll, 100);
+            return;
+        }
+        next();
+    };
+    poll();
+};
+harvest();
+if (sequential) {
+    const queue = collapsed.filter(isPending);
+    const step = () => {
+        const item = queue.shift();
+        if (!item) {
+            finish();
+            return;
+        }
+        if (!isPending(item)) {
+            step();
+            return;
+        }
+        expandHeader(item);
+        waitFor([item], step);
+    };
+    step();
+} else {
+    collapsed.forEach(expandHeader);
+    waitFor(collapsed, finish);
+}
+"""
+
+# Script que clica no link de download com o URL informado. Se a aula não estiver expandida (como
+# quando as aulas vêm da API), o link não existe na página e um link temporário é criado para o URL.
+CLICK_LINK_SCRIPT = """
+let link = Array.from(document.querySelectorAll('a[href]')).find((a) => a.href === arguments[0]);
+let temporary = false;
+if (!link) {
+    link = document.createElement('a');
+    link.href = arguments[0];
+    link.style.display = 'none';
+    document.body.appendChild(link);
+    temporary = true;
+}
+link.click();
+if (temporary) link.remove();
+return true;
+"""
+
+# Recursos que o script não usa e que o navegador enxuto deixa de baixar: imagens, mídia, fontes e rastreadores
+BLOCKED_URL_PATTERNS = [
+    "*.png", "*.jpg", "*.jpeg", "*.gif", "*.webp", "*.avif", "*.svg", "*.ico",
+    "*.mp4", "*.webm", "*.m3u8", "*.mp3", "*.ogg",
+    "*.woff", "*.woff2", "*.ttf", "*.otf", "*.eot",
+    "*google-analytics.com*", "*googletagmanager.com*", "*doubleclick.net*", "*facebook.net*",
+    "*facebook.com/tr*", "*hotjar.com*", "*clarity.ms*", "*hubspot.com*", "*hs-scripts.com*",
+    "*tiktok.com*", "*linkedin.com/px*", "*snap.licdn.com*", "*intercom.io*", "*zendesk.com*",
+]
+
+# Opções do Chrome que reduzem o tempo de inicialização e o consumo de memória do navegador enxuto
+LEAN_CHROME_ARGUMENTS = [
+    "--blink-settings=imagesEnabled=false",
+    "--disable-extensions",
+    "--disable-background-networking",
+    "--disable-background-timer-throttling",
+    "--disable-component-update",
+    "--disable-default-apps",
+    "--disable-sync",
+    "--disable-features=Translate,MediaRouter,OptimizationHints,AutofillServerCommunication",
+    "--metrics-recording-only",
+    "--mute-audio",
+    "--no-first-run",
+    "--no-default-browser-check",
+]
+
+class DownloadCancelled(Exception):
+    """
+    Lançada quando o processamento de um curso é cancelado.
+    """
+
+def setup_chrome_driver(download_dir, headless=True, profile_dir=None, lean=True):
     """
     Configura o driver do Chrome com as opções necessárias para o download de arquivos PDF.
     
     Args:
         download_dir (str): Diretório onde os arquivos serão baixados.
         headless (bool): Se True, o navegador será executado em modo headless (sem interface gráfica).
+        profile_dir (str): Diretório de perfil persistente do Chrome. Mantém a sessão
+            autenticada entre execuções; cada navegador simultâneo precisa do seu próprio diretório.
+        lean (bool): Se True, usa o perfil enxuto: carregamento ``eager`` das páginas, janela
+            menor e bloqueio de imagens, mídia, fontes e rastreadores, que o script não usa.
     
     Returns:
         WebDriver: Instância do WebDriver configurada.
@@ -35,11 +209,58 @@ def setup_chrome_driver(download_dir, headless=False):
         "plugins.always_open_pdf_externally": True,
     }
     chrome_options.add_experimental_option("prefs", prefs)
+    if lean:
+        prefs["profile.managed_default_content_settings.images"] = 2
+        # Retorna do driver.get assim que o DOM estiver pronto; as esperas explícitas cuidam do restante
+        chrome_options.page_load_strategy = "eager"
+        for argument in LEAN_CHROME_ARGUMENTS:
+            chrome_options.add_argument(argument)
     if headless:
-        chrome_options.add_argument("--headless")  # Adiciona a opção para rodar em modo headless
+        chrome_options.add_argument("--headless=new")  # Adiciona a opção para rodar em modo headless
     chrome_options.add_argument("--disable-gpu")  # Necessário para algumas versões do Chrome
-    chrome_options.add_argument("--window-size=1920x1080")  # Define o tamanho da janela
-    return webdriver.Chrome(options=chrome_options)
+    # Define o tamanho da janela
+    chrome_options.add_argument("--window-size=1280,800" if lean else "--window-size=1920,1080")
+    if profile_dir:
+        os.makedirs(profile_dir, exist_ok=True)
+        chrome_options.add_argument(f"--user-data-dir={profile_dir}")
+    driver = webdriver.Chrome(options=chrome_options)
+    ACTIVE_BROWSERS.inc()
+    if lean:
+        block_resources(driver)
+    return driver
+
+def block_resources(driver, patterns=BLOCKED_URL_PATTERNS):
+    """
+    Impede o navegador de baixar os recursos cujos URLs correspondam aos padrões informados.
+    
+    Args:
+        driver (WebDriver): Instância do WebDriver.
+        patterns (list): Padrões de URL (com ``*`` como curinga) a bloquear.
+    """
+    driver.execute_cdp_cmd("Network.enable", {})
+    driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": list(patterns)})
+
+def quit_chrome_driver(driver):
+    """
+    Encerra o navegador criado por ``setup_chrome_driver``.
+    
+    Args:
+        driver (WebDriver): Instância do WebDriver.
+    """
+    try:
+        driver.quit()
+    finally:
+        ACTIVE_BROWSERS.dec()
+
+def set_download_dir(driver, download_dir):
+    """
+    Altera o diretório de downloads de um navegador já em execução.
+    
+    Args:
+        driver (WebDriver): Instância do WebDriver.
+        download_dir (str): Novo diretório onde os arquivos serão baixados.
+    """
+    driver.execute_cdp_cmd("Browser.setDownloadBehavior", {"behavior": "allow", "downloadPath": download_dir})
 
 def handle_alert(driver):
     """
@@ -60,22 +281,24 @@ def login(driver, username, password):
     """
     Realiza o login automático na página usando as credenciais do arquivo .env.
     """
+    start = time.perf_counter()
     try:
         # Localiza os campos de login e senha e o botão de login
         try:
-            username_field = WebDriverWait(driver, 10).until(
-            EC.presence_of_element_located((By.NAME, "loginField"))
+            username_field = wait_policy.until(
+                driver, EC.presence_of_element_located((By.NAME, "loginField")), "login_form", timeout=10
             )
             username_field.clear()  # Limpa o campo antes de preencher
             username_field.send_keys(username)  # Preenche o campo com o usuário
-            time.sleep(2)
         except Exception as e:
             logging.error(f"Erro ao localizar o campo de usuário: {e}")
             raise
         try:
             # Localiza o campo de senha
-            password_field = WebDriverWait(driver, 10).until(
-                EC.presence_of_element_located((By.XPATH, "//input[@type='password' and @name='passwordField']"))
+            password_field = wait_policy.until(
+                driver,
+                EC.presence_of_element_located((By.XPATH, "//input[@type='password' and @name='passwordField']")),
+                "login_form", timeout=10
             )
             password_field.clear()
 
@@ -86,13 +309,14 @@ def login(driver, username, password):
                 # Fallback: usa JavaScript para preencher o campo de senha
                 driver.execute_script("arguments[0].value = arguments[1];", password_field, password)
                 logging.info("Campo de senha preenchido usando JavaScript.")
-                time.sleep(2)
         except Exception as e:
             logging.error(f"Erro ao localizar o campo de senha: {e}")
             raise
         try:
-            login_button = WebDriverWait(driver, 10).until(
-                EC.element_to_be_clickable((By.XPATH, "//button[span[contains(text(), 'Continuar')]]"))
+            login_button = wait_policy.until(
+                driver,
+                EC.element_to_be_clickable((By.XPATH, "//button[span[contains(text(), 'Continuar')]]")),
+                "login_form", timeout=10
             )
         except Exception as e:
             logging.error(f"Erro ao localizar o botão de login: {e}")
@@ -101,7 +325,13 @@ def login(driver, username, password):
         # Clica no botão de login
         login_button.click()
         logging.info("Autenticando usuário...")
-        time.sleep(10)
+        # Aguarda a saída da página de login (ou o alerta exibido após a autenticação)
+        wait_policy.until(
+            driver,
+            EC.any_of(EC.alert_is_present(), EC.staleness_of(login_button)),
+            "login_submit", timeout=30
+        )
+        LOGIN_SECONDS.observe(time.perf_counter() - start)
         logging.info("Login realizado com sucesso!")
     except Exception as e:
         logging.error(f"Erro ao realizar o login: {e}")
@@ -135,11 +365,122 @@ def truncate_filename(filename, max_length=150):
         filename = filename[:max_length]
     return filename
 
+def wait_for_lessons_page(driver, timeout=30):
+    """
+    Aguarda o carregamento da lista de aulas, fechando o alerta exibido após o login, se houver.
+    
+    Args:
+        driver (WebDriver): Instância do WebDriver.
+        timeout (int): Tempo máximo de espera usado enquanto não houver medições (em segundos).
+    """
+    lessons_locator = (By.CLASS_NAME, "LessonList-item")
+    wait_policy.until(
+        driver,
+        EC.any_of(EC.alert_is_present(), EC.presence_of_element_located(lessons_locator)),
+        "lessons_page_or_alert", timeout=timeout
+    )
+    handle_alert(driver)
+    # Chave própria: após o alerta a lista costuma já estar carregada, e essa espera quase
+    # instantânea não deve encurtar o limite da espera pelo carregamento da página
+    wait_policy.until(driver, EC.presence_of_element_located(lessons_locator), "lessons_page_after_alert",
+                      timeout=timeout)
+    logging.info("Página de lições carregada com sucesso.")
+
+def open_course(driver, url, username, password, session_file=None):
+    """
+    Abre a página de aulas de um curso, realizando o login apenas se o navegador ainda não estiver autenticado.
+    
+    Args:
+        driver (WebDriver): Instância do WebDriver.
+        url (str): URL da página de aulas do curso.
+        username (str): Usuário para o login.
+        password (str): Senha para o login.
+        session_file (str): Arquivo onde a sessão é salva após um novo login.
+    """
+    with OPEN_COURSE_SECONDS.time():
+        _open_course(driver, url, username, password, session_file)
+
+def _open_course(driver, url, username, password, session_file):
+    driver.get(url)
+    page = wait_policy.until(
+        driver,
+        EC.any_of(
+            EC.presence_of_element_located((By.NAME, "loginField")),
+            EC.alert_is_present(),
+            EC.presence_of_element_located((By.CLASS_NAME, "LessonList-item")),
+        ),
+        "course_page", timeout=30
+    )
+    if isinstance(page, WebElement) and page.get_attribute("name") == "loginField":
+        login(driver, username, password)
+        wait_for_lessons_page(driver)
+        if session_file:
+            save_session(driver, session_file)
+        return
+    logging.info("Sessão ainda válida, login dispensado.")
+    wait_for_lessons_page(driver)
+
+def parse_asset_types(value):
+    """
+    Converte a lista de tipos de arquivo informada na linha de comando.
+    
+    Args:
+        value (str): Tipos separados por vírgula, como ``"pdf,video"``.
+    
+    Returns:
+        tuple: Tipos de arquivo (chaves de ``ASSET_TYPES``).
+    """
+    kinds = tuple(kind.strip() for kind in value.split(",") if kind.strip())
+    unknown = [kind for kind in kinds if kind not in ASSET_TYPES]
+    if unknown or not kinds:
+        raise argparse.ArgumentTypeError(f"Tipos de arquivo inválidos: {', '.join(unknown) or value}")
+    return kinds
+
+def add_rate_limit_arguments(parser):
+    """
+    Acrescenta à linha de comando as opções de limite das requisições à API.
+    
+    Args:
+        parser (argparse.ArgumentParser): Analisador da linha de comando.
+    """
+    parser.add_argument("--max-rps", type=float,
+                        help="Máximo de requisições por segundo a cada host (padrão: sem limite).")
+    parser.add_argument("--max-connections", type=int,
+                        help="Máximo de requisições simultâneas a cada host; a janela adaptativa não passa deste valor.")
+    parser.add_argument("--bandwidth-limit", type=float,
+                        help="Limite global de banda dos downloads diretos, em MB/s (padrão: sem limite).")
+
+def configure_rate_limit(args):
+    """
+    Aplica ao controle de ritmo compartilhado as opções de ``add_rate_limit_arguments``.
+    
+    Args:
+        args (argparse.Namespace): Opções da linha de comando.
+    """
+    rate_limiter.configure(
+        rate=args.max_rps, max_window=args.max_connections,
+        bandwidth=args.bandwidth_limit * 1e6 if args.bandwidth_limit is not None else None,
+    )
+
+def get_course_id(url):
+    """
+    Obtém o identificador do curso a partir da URL da página de aulas.
+    
+    Args:
+        url (str): URL da página de aulas do curso.
+    
+    Returns:
+        str | None: Identificador do curso ou None se a URL não contiver um.
+    """
+    match = re.search(r"/cursos/(\d+)", url)
+    return match.group(1) if match else None
+
 def get_course_name(driver):
     try:
         # Aguarda até que o elemento do título do curso esteja presente na página
-        course_title_element = WebDriverWait(driver, 20).until(
-            EC.presence_of_element_located((By.CSS_SELECTOR, "h2.CourseInfo-content-title"))
+        course_title_element = wait_policy.until(
+            driver, EC.presence_of_element_located((By.CSS_SELECTOR, "h2.CourseInfo-content-title")),
+            "course_title", timeout=20
         )
         course_title = course_title_element.text
         sanitized_course_title = sanitize_filename(course_title)
@@ -162,47 +503,181 @@ def get_lesson_name(lesson_element):
     try:
         h2_text = lesson_element.find_element(By.TAG_NAME, "h2").text
         p_text = lesson_element.find_element(By.TAG_NAME, "p").text
-        lesson_name = f"{h2_text} - {p_text}".replace("/", "-").replace("\\", "-")
-        
-        # Limpa e trunca o nome do arquivo
-        lesson_name = sanitize_filename(lesson_name)
-        lesson_name = truncate_filename(lesson_name)
-        logging.info(f"Nome completo da aula: {lesson_name}")  # Imprime o nome completo da aula
-        return lesson_name
+        return build_lesson_name(h2_text, p_text)
     except Exception as e:
         logging.error(f"Erro ao obter o nome da aula: {e}")
         return "Aula_Sem_Nome"
 
-def rename_downloaded_file(download_dir, new_name):
+def build_lesson_name(title, subtitle):
+    """
+    Monta o nome da aula a partir do título e do subtítulo.
+    
+    Args:
+        title (str): Texto do título da aula (h2).
+        subtitle (str): Texto do subtítulo da aula (p).
+    
+    Returns:
+        str: Nome da aula sanitizado e truncado.
+    """
+    lesson_name = f"{title} - {subtitle}".replace("/", "-").replace("\\", "-")
+    
+    # Limpa e trunca o nome do arquivo
+    lesson_name = sanitize_filename(lesson_name)
+    lesson_name = truncate_filename(lesson_name)
+    logging.info(f"Nome completo da aula: {lesson_name}")  # Imprime o nome completo da aula
+    return lesson_name
+
+def extract_lessons_manifest(driver, expand=True, timeout=10, asset_types=DEFAULT_ASSET_TYPES):
+    """
+    Extrai os dados de todas as aulas da página em uma única chamada ao navegador.
+    
+    As aulas fechadas são expandidas pelo próprio script, que aguarda a
+    renderização dos botões de download antes de coletar os dados. As aulas que
+    não abrirem a tempo (como em um acordeão, que fecha as demais ao abrir uma)
+    são expandidas de novo, uma de cada vez, antes de serem dadas como sem arquivos.
+    
+    Args:
+        driver (WebDriver): Instância do WebDriver.
+        expand (bool): Se True, expande as aulas que ainda não exibem os botões de download.
+        timeout (int): Tempo máximo de espera pela expansão das aulas (em segundos).
+        asset_types (tuple): Tipos de arquivo (chaves de ``ASSET_TYPES``) cujos links são coletados.
+    
+    Returns:
+        list: Lista de dicionários com índice, título, subtítulo, nome, URLs de download e
+            arquivos (URL e tipo) de cada aula.
+    """
+    prefixes = [[kind, ASSET_TYPES[kind]["prefix"]] for kind in asset_types]
+    driver.set_script_timeout(timeout + 5)
+    with LESSON_EXTRACTION_SECONDS.time(source="dom"):
+        result = driver.execute_async_script(EXTRACT_LESSONS_SCRIPT, prefixes, expand, timeout * 1000, None, False)
+        raw_lessons, pending = result["lessons"], result["pending"]
+        if pending:
+            logging.info(f"Aulas que não abriram a tempo: {pending}; expandindo uma de cada vez.")
+            driver.set_script_timeout(timeout * len(pending) + 5)
+            retry = driver.execute_async_script(EXTRACT_LESSONS_SCRIPT, prefixes, expand, timeout * 1000,
+                                                pending, True)
+            retried = {lesson["index"]: lesson for lesson in retry["lessons"]}
+            raw_lessons = [retried.get(lesson["index"], lesson) for lesson in raw_lessons]
+            pending = retry["pending"]
+    if pending:
+        logging.warning(f"Aulas que não puderam ser expandidas e ficarão sem arquivos: {pending}")
+    manifest = build_lessons_manifest(raw_lessons)
+    logging.info(f"{len(manifest)} aulas extraídas da página.")
+    return manifest
+
+def fetch_lessons_manifest(driver, course_id, asset_types=DEFAULT_ASSET_TYPES):
+    """
+    Obtém os dados de todas as aulas pela API do curso, sem percorrer a página.
+    
+    O navegador é usado apenas pela sessão autenticada; as aulas e os links de download
+    vêm da mesma API JSON que o painel do aluno consulta para montar a página.
+    
+    Args:
+        driver (WebDriver): Instância do WebDriver já autenticada.
+        course_id (str): Identificador do curso.
+        asset_types (tuple): Tipos de arquivo (chaves de ``ASSET_TYPES``) cujos links são coletados.
+    
+    Returns:
+        list: Aulas no mesmo formato de ``extract_lessons_manifest``.
+    
+    Raises:
+        CourseApiError: Se a API falhar ou a resposta não tiver o formato esperado.
+    """
+    prefixes = [[kind, ASSET_TYPES[kind]["prefix"]] for kind in asset_types]
+    with LESSON_EXTRACTION_SECONDS.time(source="api"):
+        raw_lessons = fetch_course_lessons(driver, course_id, prefixes)
+    return build_lessons_manifest(raw_lessons)
+
+def list_lessons(driver, course_id=None, asset_types=DEFAULT_ASSET_TYPES, use_api=True):
+    """
+    Lista as aulas do curso pela API e, se ela falhar, pela página aberta no navegador.
+    
+    Args:
+        driver (WebDriver): Instância do WebDriver com a página de aulas carregada.
+        course_id (str): Identificador do curso; sem ele, apenas a página é usada.
+        asset_types (tuple): Tipos de arquivo (chaves de ``ASSET_TYPES``) cujos links são coletados.
+        use_api (bool): Se False, as aulas são extraídas apenas da página.
+    
+    Returns:
+        list: Aulas no formato de ``extract_lessons_manifest``.
+    """
+    if use_api and course_id and course_id.isdigit():
+        try:
+            return fetch_lessons_manifest(driver, course_id, asset_types)
+        except Exception as e:
+            LESSON_API_FALLBACKS.inc()
+            logging.warning(f"Não foi possível obter as aulas pela API ({e}); extraindo da página do curso.")
+    return extract_lessons_manifest(driver, asset_types=asset_types)
+
+def build_lessons_manifest(raw_lessons):
     """
-    Renomeia o arquivo PDF mais recente baixado no diretório de downloads.
+    Monta os dados das aulas a partir do índice, título, subtítulo e arquivos de cada uma.
+    
+    Args:
+        raw_lessons (list): Aulas devolvidas pelo script de extração da página ou pela API.
+    
+    Returns:
+        list: Lista de dicionários no formato de ``extract_lessons_manifest``.
+    """
+    manifest = []
+    for raw in raw_lessons:
+        if raw["title"] is None or raw["subtitle"] is None:
+            logging.error(f"Erro ao obter o nome da aula {raw['index']}: título ou subtítulo ausente.")
+            lesson_name = "Aula_Sem_Nome"
+        else:
+            lesson_name = build_lesson_name(raw["title"], raw["subtitle"])
+        manifest.append({
+            "index": raw["index"],
+            "title": raw["title"],
+            "subtitle": raw["subtitle"],
+            "name": lesson_name,
+            "urls": [asset["url"] for asset in raw["assets"]],
+            "assets": raw["assets"],
+        })
+    return manifest
+
+def rename_downloaded_file(download_dir, new_name, file_path=None, extension=".pdf"):
+    """
+    Renomeia um arquivo baixado no diretório de downloads.
     
     Args:
         download_dir (str): Diretório onde os arquivos são baixados.
-        new_name (str): Novo nome para o arquivo baixado.
+        new_name (str): Novo nome para o arquivo baixado, sem a extensão.
+        file_path (str): Caminho do arquivo produzido pelo download. Se omitido,
+            o arquivo PDF mais recente do diretório é usado.
+        extension (str): Extensão do novo nome do arquivo.
+    
+    Returns:
+        str | None: Novo caminho do arquivo ou None se ele não pôde ser renomeado.
     """
-    files = os.listdir(download_dir)
-    pdf_files = [f for f in files if f.endswith(".pdf")]
-    if not pdf_files:
-        logging.warning("Nenhum arquivo PDF novo encontrado para renomear.")
-        return
+    if file_path:
+        newest_file = os.path.basename(file_path)
+    else:
+        files = os.listdir(download_dir)
+        pdf_files = [f for f in files if f.endswith(".pdf")]
+        if not pdf_files:
+            logging.warning("Nenhum arquivo PDF novo encontrado para renomear.")
+            return None
 
-    # Pega o arquivo PDF mais antigo que ainda não foi renomeado
-    newest_file = max(pdf_files, key=lambda f: os.path.getctime(os.path.join(download_dir, f)))
+        # Pega o arquivo PDF mais recente
+        newest_file = max(pdf_files, key=lambda f: os.path.getctime(os.path.join(download_dir, f)))
     new_name = sanitize_filename(new_name)  # Remove caracteres inválidos
-    new_path = os.path.join(download_dir, f"{new_name}.pdf")
+    new_path = os.path.join(download_dir, f"{new_name}{extension}")
 
     try:
         # Renomeia o arquivo
         os.rename(os.path.join(download_dir, newest_file), new_path)
         logging.info(f"Arquivo renomeado para: {new_path}")
+        return new_path
     except Exception as e:
+        RENAME_FAILURES.inc()
         logging.error(f"Erro ao renomear o arquivo: {e}")
         try:
             os.remove(os.path.join(download_dir, newest_file))
             logging.info(f"Arquivo deletado: {newest_file}")
         except Exception as delete_error:
             logging.error(f"Erro ao deletar o arquivo: {delete_error}")
+        return None
 
 def click_ignore_survey(driver):
     """
@@ -214,23 +689,23 @@ def click_ignore_survey(driver):
     Returns:
         bool: True se o botão foi clicado com sucesso, False caso contrário.
     """
+    # Verifica o modal sem bloquear: na maioria dos downloads ele não aparece
+    ignore_buttons = driver.find_elements(
+        By.XPATH, "//*[contains(@class, 'ReactModalPortal')]//button[text()='Ignorar pesquisa']"
+    )
+    if not ignore_buttons:
+        return False
+    SURVEY_MODAL_HITS.inc()
     try:
-        # Espera até que o modal esteja presente
-        modal = WebDriverWait(driver, 10).until(
-            EC.presence_of_element_located((By.CLASS_NAME, "ReactModalPortal"))
-        )
-        # Espera até que o botão "Ignorar pesquisa" esteja presente e clicável
-        ignore_button = WebDriverWait(modal, 10).until(
-            EC.element_to_be_clickable((By.XPATH, "//button[text()='Ignorar pesquisa']"))
-        )
+        ignore_button = wait_policy.until(driver, EC.element_to_be_clickable(ignore_buttons[0]), "survey_modal", timeout=10)
         ignore_button.click()
         logging.info("Botão 'Ignorar pesquisa' clicado.")
-        logging.info("Aguardando 2 segundos para fechar o modal...")
-        time.sleep(2)
         try:
             # Espera até que o botão de fechar o modal esteja presente e clicável
-            close_button = WebDriverWait(driver, 10).until(
-                EC.element_to_be_clickable((By.XPATH, "//button[@aria-label='Fechar Modal']"))
+            close_button = wait_policy.until(
+                driver,
+                EC.element_to_be_clickable((By.XPATH, "//button[@aria-label='Fechar Modal']")),
+                "survey_modal", timeout=10
             )
             close_button.click()
             logging.info("Botão de fechar modal clicado.")
@@ -242,181 +717,651 @@ def click_ignore_survey(driver):
         logging.error("Erro ao clicar no botão 'Ignorar pesquisa'.")
         return False
 
-def process_lesson_buttons(driver, lesson_element, download_dir, wait_time=1):
+def lesson_file_name(lesson_name, position, kind="pdf"):
+    """
+    Monta o nome do arquivo de uma aula; arquivos extras do mesmo tipo na aula recebem um sufixo numérico.
+    
+    Args:
+        lesson_name (str): Nome da aula.
+        position (int): Posição do arquivo entre os arquivos do mesmo tipo na aula, a partir de 1.
+        kind (str): Tipo do arquivo (chave de ``ASSET_TYPES``).
+    
+    Returns:
+        str: Nome do arquivo com a extensão do tipo.
+    """
+    asset_type = ASSET_TYPES[kind]
+    file_name = lesson_name + asset_type["suffix"]
+    if position > 1:
+        file_name = f"{file_name} ({position})"
+    return f"{sanitize_filename(file_name)}{asset_type['extension']}"
+
+def lesson_files(lesson, kinds=None):
+    """
+    Lista os arquivos de uma aula com os nomes sob os quais serão salvos.
+    
+    Args:
+        lesson (dict): Aula extraída por ``extract_lessons_manifest``.
+        kinds (tuple): Se informado, apenas os arquivos desses tipos são listados.
+    
+    Returns:
+        list: Lista de tuplas (url, nome do arquivo, tipo).
+    """
+    files = []
+    positions = {}
+    for asset in lesson.get("assets") or [{"url": url, "kind": "pdf"} for url in lesson["urls"]]:
+        positions[asset["kind"]] = positions.get(asset["kind"], 0) + 1
+        if kinds is None or asset["kind"] in kinds:
+            files.append((asset["url"], lesson_file_name(lesson["name"], positions[asset["kind"]], asset["kind"]),
+                          asset["kind"]))
+    return files
+
+def process_lesson_buttons(driver, lesson, download_dir, watcher, manifest=None, course_id=None,
+                           verify_hash=False, on_file=None, progress=None, retry_queue=None, finish=None,
+                           store=None):
     """
     Processa os botões de download de uma aula e renomeia os arquivos baixados.
     
+    Todos os downloads da aula são iniciados antes da espera; cada um é
+    acompanhado por um ticket do observador, de modo que os arquivos são
+    renomeados individualmente mesmo quando os downloads se sobrepõem.
+    
     Args:
         driver (WebDriver): Instância do WebDriver.
-        lesson_element (WebElement): Elemento da aula contendo os botões de download.
+        lesson (dict): Aula extraída por ``extract_lessons_manifest``.
         download_dir (str): Diretório onde os arquivos são baixados.
-        wait_time (int): Tempo de espera entre downloads.
+        watcher (DownloadWatcher): Observador do diretório de downloads.
+        manifest (Manifest): Registro dos arquivos baixados. Se informado, arquivos já
+            concluídos são ignorados e cada novo arquivo é registrado ao terminar.
+        course_id (str): Identificador do curso no registro.
+        verify_hash (bool): Se True, confere o hash dos arquivos já concluídos.
+        on_file (callable): Função chamada com o caminho de cada arquivo concluído.
+        progress (ProgressTracker): Acompanhamento do progresso do download.
+        retry_queue (RetryQueue): Fila onde os downloads que falharam são registrados para nova tentativa.
+        finish (callable): Função que recebe cada download iniciado para concluí-lo, como o
+            ``put`` de uma ``PipelineStage``. Se omitida, os downloads da aula são aguardados
+            aqui mesmo com ``finish_browser_download``.
+        store (BlobStore): Armazenamento por conteúdo. Se informado, os arquivos baixados são
+            deduplicados, e os já conhecidos pelo manifesto são vinculados sem clique.
     
     Returns:
         list: Lista de URLs dos arquivos baixados.
     """
-    pdf_buttons = find_pdf_buttons(lesson_element)
-    if not pdf_buttons:
+    files = lesson_files(lesson, BROWSER_ASSET_TYPES)
+    if not files:
         logging.info("Nenhum botão relevante encontrado na aula.")
         return []
 
-    lesson_name = get_lesson_name(lesson_element)
-    num_files = len(os.listdir(download_dir))
+    if finish is None:
+        def finish(pending):
+            finish_browser_download(pending, download_dir, watcher, manifest, course_id, on_file, progress,
+                                    retry_queue, store=store)
+
     links = []
-    for button in pdf_buttons:
-        url = button.get_attribute("href")
-        if url:
-            links.append(url)
-            try:
-                initiate_download(driver, button, url)
-                if wait_for_download(download_dir, num_files):
-                    rename_downloaded_file(download_dir, lesson_name)
-            except Exception as e:
-                logging.error(f"Erro ao clicar no botão de download: {e}")
-        else:
-            logging.error("Erro: URL do botão não encontrado.")
+    started = []
+    for url, file_name, _ in files:
+        links.append(url)
+        if manifest and manifest.is_complete(course_id, url, download_dir, verify_hash):
+            logging.info(f"Arquivo já sincronizado: {file_name}")
+            if progress:
+                progress.file_done(file_name)
+            continue
+        if progress:
+            progress.file_started(file_name)
+        if store:
+            watcher.ignore(file_name)
+        # O conteúdo é procurado antes de o registro voltar a "pending", pois só downloads
+        # concluídos são encontrados; o registro é criado em seguida para receber o resultado
+        stored = link_stored_file(store, manifest, url, os.path.join(download_dir, file_name))
+        if manifest:
+            manifest.mark_pending(course_id, lesson, url, file_name)
+        if stored:
+            record_browser_file(url, file_name, os.path.join(download_dir, file_name), None, manifest, course_id,
+                                on_file, progress, sha256=stored[1])
+            continue
+        ticket = expect_download(watcher, url)
+        if not initiate_download(driver, url):
+            watcher.cancel(ticket)
+            ticket = None
+        started.append((url, file_name, ticket, lesson["name"], None))
+
+    for pending in started:
+        finish(pending)
     return links
 
-def find_pdf_buttons(lesson_element):
+def finish_browser_download(pending, download_dir, watcher, manifest=None, course_id=None, on_file=None,
+                            progress=None, retry_queue=None, cancel_event=None, store=None):
     """
-    Encontra os botões de download de PDF em um elemento de aula.
+    Conclui um download iniciado pelo navegador: aguarda o arquivo, renomeia, registra o
+    resultado e, se o download falhou, agenda uma nova tentativa.
     
     Args:
-        lesson_element (WebElement): Elemento da aula contendo os botões de download.
+        pending (tuple): URL, nome do arquivo, ticket (None se o download não foi iniciado),
+            nome da aula e item da fila de novas tentativas (None na primeira tentativa).
+        download_dir (str): Diretório onde os arquivos são baixados.
+        watcher (DownloadWatcher): Observador do diretório de downloads.
+        manifest (Manifest): Registro dos arquivos baixados.
+        course_id (str): Identificador do curso no registro.
+        on_file (callable): Função chamada com o caminho de cada arquivo concluído.
+        progress (ProgressTracker): Acompanhamento do progresso do download.
+        retry_queue (RetryQueue): Fila de novas tentativas.
+        cancel_event (threading.Event): Se sinalizado, o download é descartado sem espera.
+        store (BlobStore): Armazenamento por conteúdo onde o arquivo baixado é guardado.
+    """
+    url, file_name, ticket, lesson_name, item = pending
+    if cancel_event is not None and cancel_event.is_set():
+        if ticket is not None:
+            watcher.cancel(ticket)
+        return
+    if ticket is None:
+        DOWNLOAD_FAILURES.inc(mode="browser")
+        new_path, error = None, "Download não iniciado."
+    else:
+        new_path, error = complete_browser_download(download_dir, file_name, ticket, watcher)
+    record_browser_file(url, file_name, new_path, error, manifest, course_id, on_file, progress, store)
+    if retry_queue is None:
+        # Sem fila de novas tentativas, a falha é definitiva
+        if error and progress:
+            progress.file_failed(file_name)
+        return
+    if item is None and error:
+        retry_queue.add(lesson_name, url, file_name, error, mode="browser")
+    elif item is not None and error:
+        retry_queue.fail(item, error)
+    elif item is not None:
+        retry_queue.done(item)
+
+def complete_browser_download(download_dir, file_name, ticket, watcher):
+    """
+    Aguarda um download iniciado pelo navegador e dá ao arquivo o nome definitivo.
+    
+    Args:
+        download_dir (str): Diretório onde os arquivos são baixados.
+        file_name (str): Nome definitivo do arquivo.
+        ticket (DownloadTicket): Ticket do download retornado por ``DownloadWatcher.expect``.
+        watcher (DownloadWatcher): Observador do diretório de downloads.
     
     Returns:
-        list: Lista de elementos de botão de download.
+        tuple: Caminho do arquivo renomeado (ou None) e o motivo da falha (ou None).
     """
-    return lesson_element.find_elements(By.CSS_SELECTOR,
-        '.LessonButton[href^="https://api.estrategiaconcursos.com.br/api/aluno/pdf/download/"]'
-    )
+    file_path = wait_for_download(ticket)
+    if not file_path:
+        watcher.cancel(ticket)
+        DOWNLOAD_FAILURES.inc(mode="browser")
+        return None, ticket.error or "Download não concluído no tempo esperado."
+    name, extension = os.path.splitext(file_name)
+    new_path = rename_downloaded_file(download_dir, name, file_path, extension)
+    if not new_path:
+        DOWNLOAD_FAILURES.inc(mode="browser")
+        return None, "Arquivo baixado não pôde ser renomeado."
+    invalid = check_pdf(new_path) if extension.lower() == ".pdf" else None
+    if invalid:
+        # Um PDF truncado ou uma página de erro não contam como download concluído
+        os.remove(new_path)
+        INVALID_PDFS.inc(mode="browser")
+        DOWNLOAD_FAILURES.inc(mode="browser")
+        return None, f"PDF inválido: {invalid}"
+    size = os.path.getsize(new_path)
+    elapsed = max(ticket.completed_at - ticket.created_at, 1e-6)
+    DOWNLOAD_SECONDS.observe(elapsed, mode="browser")
+    DOWNLOAD_THROUGHPUT.observe(size / elapsed, mode="browser")
+    DOWNLOAD_BYTES.inc(size, mode="browser")
+    return new_path, None
+
+def record_browser_file(url, file_name, new_path, error, manifest=None, course_id=None, on_file=None, progress=None,
+                        store=None, sha256=None):
+    """
+    Registra o resultado de um download pelo navegador no armazenamento, no manifesto e no progresso.
+    
+    O hash do arquivo é calculado aqui, a menos que já seja conhecido (``sha256``). ``on_file``
+    é chamada por último, pois pode mover o arquivo para fora da pasta do curso.
+    """
+    if new_path and sha256 is None and (manifest or store):
+        sha256 = hash_file(new_path)
+    if new_path and store:
+        store.add(new_path, sha256)
+    size = os.path.getsize(new_path) if new_path else None
+    if new_path and progress:
+        progress.file_done(file_name, size)
+    if manifest:
+        if new_path:
+            manifest.mark_done(course_id, url, file_name, size, sha256)
+        else:
+            manifest.mark_failed(course_id, url, error)
+    if new_path and on_file:
+        on_file(new_path)
+
+def link_stored_file(store, manifest, url, dest_path):
+    """
+    Cria o arquivo como vínculo para o armazenamento, sem baixá-lo, se o conteúdo do URL já é conhecido.
+    
+    Args:
+        store (BlobStore): Armazenamento por conteúdo.
+        manifest (Manifest): Registro dos arquivos baixados, onde o hash de cada URL é procurado.
+        url (str): URL de download do arquivo.
+        dest_path (str): Caminho do arquivo na pasta do curso.
+    
+    Returns:
+        tuple | None: Tamanho e hash do arquivo vinculado, ou None se ele precisa ser baixado.
+    """
+    if store is None or manifest is None:
+        return None
+    known = manifest.find_content(url)
+    if known is None or not store.has(known["sha256"], known["size"]):
+        return None
+    store.link(known["sha256"], dest_path)
+    DEDUP_BYTES.inc(known["size"], reason="download")
+    logging.info(f"Conteúdo já armazenado, vinculado sem download: {os.path.basename(dest_path)}")
+    return known["size"], known["sha256"]
 
-def initiate_download(driver, button, url):
+def retry_browser_downloads(driver, watcher, retry_queue, finish):
     """
-    Inicia o download de um arquivo PDF clicando no botão correspondente.
+    Clica de novo nos botões dos downloads pelo navegador cujo prazo de nova tentativa já chegou.
+    
+    Apenas os itens prontos são retirados da fila, e a conclusão de cada download é entregue
+    a ``finish``, de modo que a chamada entre uma aula e outra não atrasa a varredura.
+    
+    Args:
+        driver (WebDriver): Instância do WebDriver com a página de aulas carregada.
+        watcher (DownloadWatcher): Observador do diretório de downloads.
+        retry_queue (RetryQueue): Fila de downloads que falharam.
+        finish (callable): Função que recebe cada download iniciado, como em ``process_lesson_buttons``.
+    """
+    for item in retry_queue.take("browser"):
+        logging.info(f"Nova tentativa ({item.attempts + 1}) de download pelo navegador: {item.file_name}")
+        ticket = expect_download(watcher, item.url)
+        if not initiate_download(driver, item.url):
+            watcher.cancel(ticket)
+            ticket = None
+        finish((item.url, item.file_name, ticket, item.lesson, item))
+
+def expect_download(watcher, url):
+    """
+    Registra no observador o download que o clique no URL vai iniciar.
+    
+    Quando o URL termina em um nome de arquivo, o download é associado apenas ao arquivo com
+    esse nome. Caso contrário, a chamada aguarda que o download anterior sem nome comece, para
+    que um clique que não gerou download não troque os arquivos seguintes de aula; os downloads
+    via HTTP continuam enquanto isso.
+    
+    Args:
+        watcher (DownloadWatcher): Observador do diretório de downloads.
+        url (str): URL do arquivo a ser baixado.
+    
+    Returns:
+        DownloadTicket: Ticket do download.
+    """
+    name = unquote(urlsplit(url).path.rstrip("/").rpartition("/")[2])
+    return watcher.expect(name if os.path.splitext(name)[1] else None, timeout=DOWNLOAD_START_TIMEOUT)
+
+def initiate_download(driver, url):
+    """
+    Inicia o download de um arquivo clicando no botão correspondente, ou em um link
+    temporário para o URL quando a aula não está expandida na página.
     
     Args:
         driver (WebDriver): Instância do WebDriver.
-        button (WebElement): Elemento do botão de download.
         url (str): URL do arquivo a ser baixado.
+    
+    Returns:
+        bool: True se o download foi iniciado, False caso contrário.
     """
     try:
-        driver.execute_script("arguments[0].click();", button)
+        if not driver.execute_script(CLICK_LINK_SCRIPT, url):
+            logging.error(f"Erro: não foi possível clicar no link de download do URL: {url}")
+            return False
         logging.info(f"Primeira tentativa de download para o URL: {url}")
         if click_ignore_survey(driver):
-            driver.execute_script("arguments[0].click();", button)
+            driver.execute_script(CLICK_LINK_SCRIPT, url)
             logging.info(f"Segunda tentativa de download para o URL: {url}")
     except Exception as e:
         logging.error(f"Erro ao iniciar o download para o URL: {url} - {e}")
-    else:
-        logging.info(f"Download iniciado para o URL: {url}")
+        return False
+    logging.info(f"Download iniciado para o URL: {url}")
+    return True
 
-def wait_for_download(download_dir, old_num_files=0, timeout=60):
+def wait_for_download(ticket, timeout=60):
     """
     Aguarda até que o download de um arquivo seja concluído.
     
     Args:
-        download_dir (str): Diretório onde os arquivos são baixados.
-        old_num_files (int): Número de arquivos no diretório antes do download.
+        ticket (DownloadTicket): Ticket do download retornado por ``DownloadWatcher.expect``.
         timeout (int): Tempo máximo de espera pelo download (em segundos).
+    
+    Returns:
+        str | None: Caminho do arquivo baixado ou None se o download não foi concluído.
     """
-    for _ in range(timeout):
-        files = os.listdir(download_dir)
-        new_num_files = len(files)
-        if files and (files[-1].endswith('.pdf') and new_num_files > old_num_files):
-            logging.info("Download concluído!")
-            return True
-        time.sleep(1)
-    logging.warning(f"Aviso: O download do arquivo demorou mais do que o esperado. Passando para próxima aula...")
-    return False
+    file_path = ticket.wait(timeout)
+    if file_path:
+        logging.info(f"Download concluído: {file_path}")
+        return file_path
+    if ticket.error:
+        logging.warning(f"Aviso: {ticket.error}. Passando para próxima aula...")
+    else:
+        DOWNLOAD_TIMEOUTS.inc()
+        logging.warning(f"Aviso: O download do arquivo demorou mais do que o esperado. Passando para próxima aula...")
+    return None
 
-def open_lesson(driver, lesson_element):
+def collect_lesson_downloads(lesson, download_dir, kinds=None):
     """
-    Abre uma aula clicando no cabeçalho correspondente.
+    Monta a lista de downloads de uma aula sem clicar nos botões.
     
     Args:
-        driver (WebDriver): Instância do WebDriver.
-        lesson_element (WebElement): Elemento da aula a ser aberta.
+        lesson (dict): Aula extraída por ``extract_lessons_manifest``.
+        download_dir (str): Diretório onde os arquivos serão salvos.
+        kinds (tuple): Se informado, apenas os arquivos desses tipos são incluídos.
+    
+    Returns:
+        list: Lista de tuplas (url, caminho de destino) nomeadas a partir do nome da aula.
     """
-    try:
-        lesson_header = lesson_element.find_element(By.CLASS_NAME, "Collapse-header")
-        driver.execute_script("arguments[0].scrollIntoView({block: 'center'});", lesson_header)
-        try:
-            WebDriverWait(driver, 10).until(EC.element_to_be_clickable(lesson_header)).click()
-        except:
-            driver.execute_script("arguments[0].click();", lesson_header)
-        time.sleep(2)
-    except Exception as e:
-        logging.error(f"Erro ao tentar abrir a aula: {e}")
+    files = lesson_files(lesson, kinds)
+    if not files and kinds is None:
+        logging.info("Nenhum botão relevante encontrado na aula.")
+    return [(url, os.path.join(download_dir, file_name)) for url, file_name, _ in files]
 
-def process_lessons(driver, download_dir):
+def process_lessons(driver, download_dir, direct_download=False, max_workers=4, manifest=None,
+                    course_id=None, verify_hash=False, on_file=None, cancel_event=None, progress=None,
+                    asset_types=DEFAULT_ASSET_TYPES, retry_queue=None, use_api=True, store=None):
     """
     Processa todas as aulas na página, baixando e renomeando os arquivos PDF.
     
+    O processamento é feito em pipeline: enquanto a thread principal percorre as aulas e
+    clica nos botões, os downloads HTTP já começam em paralelo e uma etapa separada aguarda
+    e renomeia os arquivos baixados pelo navegador, de modo que a navegação não espera a
+    transferência. As filas entre as etapas são limitadas, e a varredura só pausa quando
+    há downloads demais em andamento.
+    
+    Os downloads que falham vão para uma fila de novas tentativas com recuo exponencial:
+    são tentados de novo entre uma aula e outra, assim que o prazo chega, e os que
+    restarem em uma etapa final, depois da varredura.
+    
     Args:
         driver (WebDriver): Instância do WebDriver.
         download_dir (str): Diretório onde os arquivos são baixados.
+        direct_download (bool): Se True, os arquivos são baixados via HTTP em paralelo
+            usando os cookies da sessão, em vez de clicar em cada botão.
+        max_workers (int): Número de downloads simultâneos no modo direto.
+        manifest (Manifest): Registro dos arquivos baixados. Se informado, apenas os
+            arquivos ainda não concluídos são baixados.
+        course_id (str): Identificador do curso no registro.
+        verify_hash (bool): Se True, confere o hash dos arquivos já concluídos.
+        on_file (callable): Função chamada com o caminho de cada arquivo concluído.
+        cancel_event (threading.Event): Se sinalizado, o processamento é interrompido
+            antes da próxima aula com ``DownloadCancelled``.
+        progress (ProgressTracker): Acompanhamento do progresso do download.
+        asset_types (tuple): Tipos de arquivo a baixar (chaves de ``ASSET_TYPES``). Os tipos fora
+            de ``BROWSER_ASSET_TYPES``, como os vídeos, são sempre baixados via HTTP em segmentos.
+        retry_queue (RetryQueue): Fila de novas tentativas; ao final, guarda os arquivos que não
+            puderam ser recuperados. Se omitida, uma fila própria é usada.
+        use_api (bool): Se True, as aulas são listadas pela API do curso, com a página como reserva.
+        store (BlobStore): Armazenamento por conteúdo. Se informado, cada arquivo é guardado uma
+            única vez e aparece na pasta do curso como vínculo; com o manifesto, os arquivos cujo
+            conteúdo já é conhecido nem chegam a ser baixados.
     
     Returns:
         list: Lista de dicionários contendo os nomes das aulas e os links dos arquivos baixados.
     """
-    lessons = driver.find_elements(By.CLASS_NAME, "LessonList-item")
+    lessons = list_lessons(driver, course_id, asset_types, use_api)
     if not lessons:
         logging.info("Nenhuma aula encontrada na página.")
         return []
 
+    if retry_queue is None:
+        retry_queue = RetryQueue(on_give_up=give_up_hook(progress))
+    if progress:
+        progress.start(len(lessons), sum(len(lesson["urls"]) for lesson in lessons))
     lessons_list = []
-    for lesson in lessons:
-        open_lesson(driver, lesson)
-        time.sleep(3)
-        lesson_links = process_lesson_buttons(driver, lesson, download_dir)
-        lessons_list.append({
-            "lessonName": f"Aula {len(lessons_list) + 1}",
-            "lessonLinks": lesson_links
-        })
-        time.sleep(1)
+    # Aula de cada arquivo baixado via HTTP e itens da fila em nova tentativa
+    lesson_names = {}
+    retrying = {}
+    http_kinds = None if direct_download else tuple(kind for kind in ASSET_TYPES if kind not in BROWSER_ASSET_TYPES)
+
+    def record_result(result):
+        if not result["error"] and store:
+            store.add(result["path"], result["sha256"])
+        if not result["error"] and progress:
+            progress.file_done(os.path.basename(result["path"]))
+        if manifest:
+            if result["error"]:
+                manifest.mark_failed(course_id, result["url"], result["error"])
+            else:
+                manifest.mark_done(course_id, result["url"], os.path.basename(result["path"]),
+                                   result["size"], result["sha256"])
+        # Por último, pois a função pode mover o arquivo para fora da pasta do curso
+        if not result["error"] and on_file:
+            on_file(result["path"])
+        if cancel_event is not None and cancel_event.is_set():
+            return
+        item = retrying.pop(result["url"], None)
+        if item is None and result["error"]:
+            retry_queue.add(lesson_names[result["url"]], result["url"], os.path.basename(result["path"]),
+                            result["error"])
+        elif item is not None and result["error"]:
+            retry_queue.fail(item, result["error"])
+        elif item is not None:
+            retry_queue.done(item)
+
+    def check_cancelled():
+        if cancel_event is not None and cancel_event.is_set():
+            raise DownloadCancelled("Processamento das aulas cancelado.")
+
+    # Pipeline: a thread principal percorre as aulas e inicia os downloads, enquanto as etapas
+    # seguintes aguardam e renomeiam os arquivos do navegador e fazem os downloads HTTP
+    with DownloadWatcher(download_dir) as watcher, \
+            PipelineStage(lambda pending: finish_browser_download(pending, download_dir, watcher, manifest,
+                                                                  course_id, on_file, progress, retry_queue,
+                                                                  cancel_event, store),
+                          maxsize=MAX_PENDING_BROWSER_DOWNLOADS, name="navegador") as browser_stage, \
+            HttpDownloader(driver, max_workers, on_result=record_result, cancel_event=cancel_event,
+                           on_progress=progress.add_bytes if progress else None) as http:
+
+        def retry_due():
+            retry_browser_downloads(driver, watcher, retry_queue, browser_stage.put)
+            for item in retry_queue.take("direct"):
+                retrying[item.url] = item
+                http.submit(item.url, os.path.join(download_dir, item.file_name))
+
+        for lesson in lessons:
+            check_cancelled()
+            if progress:
+                progress.lesson(lesson["index"], lesson["name"])
+            lesson_downloads = collect_lesson_downloads(lesson, download_dir, http_kinds)
+            for url, dest_path in lesson_downloads:
+                if manifest and manifest.is_complete(course_id, url, download_dir, verify_hash):
+                    logging.info(f"Arquivo já sincronizado: {os.path.basename(dest_path)}")
+                    if progress:
+                        progress.file_done(os.path.basename(dest_path))
+                    continue
+                lesson_names[url] = lesson["name"]
+                # Os arquivos baixados via HTTP são gravados na pasta observada, mas não são downloads do navegador
+                watcher.ignore(os.path.basename(dest_path))
+                stored = link_stored_file(store, manifest, url, dest_path)
+                if manifest:
+                    manifest.mark_pending(course_id, lesson, url, os.path.basename(dest_path))
+                if stored:
+                    record_result({"url": url, "path": dest_path, "size": stored[0], "sha256": stored[1],
+                                   "error": None})
+                else:
+                    http.submit(url, dest_path)
+            lesson_links = [url for url, _ in lesson_downloads]
+            if not direct_download:
+                lesson_links = process_lesson_buttons(driver, lesson, download_dir, watcher, manifest, course_id,
+                                                      verify_hash, on_file, progress, retry_queue,
+                                                      browser_stage.put, store) + lesson_links
+            retry_due()
+            lessons_list.append({
+                "lessonName": f"Aula {lesson['index']}",
+                "lessonLinks": lesson_links
+            })
+
+        # Etapa final: aguarda os downloads em andamento e tenta de novo os que falharam, à medida que os prazos chegam
+        browser_stage.join()
+        http.join()
+        if len(retry_queue):
+            logging.info(f"Tentando novamente {len(retry_queue)} downloads que falharam...")
+        while retry_queue.wait(cancel_event):
+            retry_due()
+            browser_stage.join()
+            http.join()
+        check_cancelled()
+    retry_queue.log_summary()
+    if progress:
+        progress.finish()
     logging.info("Processamento das aulas concluído!")
     return lessons_list
 
-if __name__ == "__main__":
+def give_up_hook(progress):
+    """
+    Retorna a função que conta no progresso os arquivos cujas novas tentativas se esgotaram.
+    
+    Args:
+        progress (ProgressTracker): Acompanhamento do progresso do download, ou None.
+    
+    Returns:
+        callable | None: Função para o ``on_give_up`` da ``RetryQueue``.
+    """
+    if progress is None:
+        return None
+    return lambda item: progress.file_failed(item.file_name)
+
+def process_course(driver, url, output_root, direct_download=False, max_workers=4, manifest=None,
+                   verify_hash=False, cancel_event=None, progress=None, asset_types=DEFAULT_ASSET_TYPES,
+                   use_api=True, store=None, on_file=None):
+    """
+    Baixa as aulas do curso aberto no navegador para a pasta do curso dentro de ``output_root``.
+    
+    Args:
+        driver (WebDriver): Instância do WebDriver com a página de aulas já carregada.
+        url (str): URL da página de aulas do curso.
+        output_root (str): Diretório onde as pastas dos cursos são criadas.
+        direct_download (bool): Se True, baixa os arquivos via HTTP em paralelo.
+        max_workers (int): Número de downloads simultâneos no modo direto.
+        manifest (Manifest): Registro dos arquivos baixados, usado para sincronização incremental.
+        verify_hash (bool): Se True, confere o hash dos arquivos já concluídos.
+        cancel_event (threading.Event): Se sinalizado, o processamento é interrompido com ``DownloadCancelled``.
+        progress (ProgressTracker): Acompanhamento do progresso do download.
+        asset_types (tuple): Tipos de arquivo a baixar (chaves de ``ASSET_TYPES``).
+        use_api (bool): Se True, as aulas são listadas pela API do curso, com a página como reserva.
+        store (BlobStore): Armazenamento por conteúdo usado para deduplicar os arquivos entre os cursos.
+        on_file (callable): Função chamada com o caminho de cada arquivo concluído.
+    
+    Returns:
+        dict: Nome do curso, diretório final, dados das aulas processadas e arquivos que não
+        puderam ser baixados.
+    """
+    course_id = get_course_id(url) or sanitize_filename(url)[-50:]
+    course_name = get_course_name(driver)
+    course_dir = os.path.join(output_root, sanitize_filename(course_name))
+    os.makedirs(course_dir, exist_ok=True)
+    set_download_dir(driver, course_dir)
+
+    if manifest:
+        manifest.start_course(course_id, course_name, course_dir)
+    retry_queue = RetryQueue(on_give_up=give_up_hook(progress))
+    lessons_data = process_lessons(driver, course_dir, direct_download=direct_download, max_workers=max_workers,
+                                   manifest=manifest, course_id=course_id, verify_hash=verify_hash,
+                                   cancel_event=cancel_event, progress=progress, asset_types=asset_types,
+                                   retry_queue=retry_queue, use_api=use_api, store=store, on_file=on_file)
+    if manifest:
+        manifest.finish_course(course_id)
+    logging.info(f"Arquivos do curso {course_name} baixados em: {course_dir}")
+    return {"course": course_name, "dir": course_dir, "lessons": lessons_data, "failed": retry_queue.summary()}
+
+def download_course(driver, url, output_root, username, password, direct_download=False, max_workers=4,
+                    session_file=None, manifest=None, verify_hash=False, asset_types=DEFAULT_ASSET_TYPES,
+                    use_api=True, store=None):
+    """
+    Abre um curso, realizando o login se necessário, e baixa suas aulas para um diretório próprio.
+    
+    Args:
+        driver (WebDriver): Instância do WebDriver.
+        url (str): URL da página de aulas do curso.
+        output_root (str): Diretório onde as pastas dos cursos são criadas.
+        username (str): Usuário para o login.
+        password (str): Senha para o login.
+        direct_download (bool): Se True, baixa os arquivos via HTTP em paralelo.
+        max_workers (int): Número de downloads simultâneos no modo direto.
+        session_file (str): Arquivo onde a sessão é salva após um novo login.
+        manifest (Manifest): Registro dos arquivos baixados, usado para sincronização incremental.
+        verify_hash (bool): Se True, confere o hash dos arquivos já concluídos.
+        asset_types (tuple): Tipos de arquivo a baixar (chaves de ``ASSET_TYPES``).
+        use_api (bool): Se True, as aulas são listadas pela API do curso, com a página como reserva.
+        store (BlobStore): Armazenamento por conteúdo usado para deduplicar os arquivos entre os cursos.
     
-    # Cria o diretório de downloads
-    download_dir = os.path.join(os.getcwd(), "downloads")
-    os.makedirs(download_dir, exist_ok=True)
+    Returns:
+        dict: Nome do curso, diretório final e dados das aulas processadas.
+    """
+    open_course(driver, url, username, password, session_file)
+    return process_course(driver, url, output_root, direct_download=direct_download, max_workers=max_workers,
+                          manifest=manifest, verify_hash=verify_hash, asset_types=asset_types, use_api=use_api,
+                          store=store)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Baixa os PDFs das aulas de um curso do Estratégia Concursos.")
+    parser.add_argument("--url", default="https://www.estrategiaconcursos.com.br/app/dashboard/cursos/327492/aulas",
+                        help="URL da página de aulas do curso.")
+    parser.add_argument("--direct", action="store_true",
+                        help="Baixa os arquivos via HTTP em paralelo, sem clicar nos botões.")
+    parser.add_argument("--workers", type=int, default=4,
+                        help="Número de downloads simultâneos no modo direto.")
+    parser.add_argument("--profile-dir", help="Diretório de perfil persistente do Chrome.")
+    add_rate_limit_arguments(parser)
+    parser.add_argument("--assets", type=parse_asset_types, default=DEFAULT_ASSET_TYPES,
+                        help=f"Tipos de arquivo a baixar, separados por vírgula ({', '.join(ASSET_TYPES)}).")
+    parser.add_argument("--show-browser", action="store_true",
+                        help="Executa o Chrome com interface gráfica, permitindo o login manual.")
+    parser.add_argument("--full-browser", action="store_true",
+                        help="Não bloqueia imagens, fontes e rastreadores nem usa o carregamento antecipado das páginas.")
+    parser.add_argument("--no-session", action="store_true",
+                        help="Não reaproveita nem salva a sessão autenticada.")
+    parser.add_argument("--no-api", action="store_true",
+                        help="Extrai as aulas da página do curso em vez de consultá-las pela API.")
+    parser.add_argument("--sync", action="store_true",
+                        help="Baixa apenas os arquivos novos ou incompletos, registrando-os no manifesto.")
+    parser.add_argument("--manifest", default=MANIFEST_FILE, help="Arquivo SQLite do manifesto de sincronização.")
+    parser.add_argument("--verify", action="store_true",
+                        help="Na sincronização, confere também o hash dos arquivos já baixados.")
+    parser.add_argument("--store", default=BLOB_STORE_DIR or None,
+                        help="Diretório do armazenamento por conteúdo que deduplica os arquivos entre os cursos.")
+    args = parser.parse_args()
+    configure_rate_limit(args)
+
+    # Diretório onde a pasta do curso é criada
+    download_dir = os.getcwd()
 
     # URL da página do curso
-    url = "https://www.estrategiaconcursos.com.br/app/dashboard/cursos/327492/aulas"
+    url = args.url
 
-    # Inicializa o navegador sem headless para login manual
-    driver = setup_chrome_driver(download_dir, headless=False)
-    driver.get(url)
+    # Inicializa o navegador; o login manual só é possível com a interface gráfica
+    driver = setup_chrome_driver(download_dir, headless=not args.show_browser, profile_dir=args.profile_dir,
+                                 lean=not args.full_browser)
+    # Reaproveita a sessão salva, se houver
+    session_file = None if args.no_session else SESSION_FILE
+    if session_file:
+        restore_session(driver, session_file)
     # Processa as aulas e arquivos
     try:
         try:
-            logging.info("Aguardando 5 segundos para carregar a página...")
-            time.sleep(5)
             # Carrega as credenciais do arquivo .env
             username = os.getenv("login")
             password = os.getenv("password")            
-            login(driver, username, password) # Realiza o login automático         
+            open_course(driver, url, username, password, session_file) # Realiza o login automático, se necessário
         except Exception as e:
+            if not args.show_browser:
+                raise RuntimeError("Login automático falhou; use --show-browser para fazer o login manualmente.") from e
             logging.info("Por favor, faça o login manualmente e pressione Enter para continuar...")
             input()
-        # Fecha alertas, se presentes
-        handle_alert(driver)
-        # Processa as aulas
-        lessons_data = process_lessons(driver, download_dir)
-        
-        # Renomeia a pasta de downloads para o nome do curso
-        try:
-            course_name = get_course_name(driver) # Obtém o nome do curso
-            course_name_dir = os.path.join(os.getcwd(), sanitize_filename(course_name))
-            os.rename(download_dir, course_name_dir)
-        except Exception as e:
-            logging.error(f"Erro ao renomear a pasta de downloads: {e}")
-        logging.info(f"Dados coletados: {lessons_data}")
-        logging.info(f"Arquivos baixados em: {course_name_dir}")
+            # Aguarda a lista de aulas, fechando alertas, se presentes
+            wait_for_lessons_page(driver)
+            if session_file:
+                save_session(driver, session_file)
+        # Processa as aulas na pasta do curso
+        manifest = Manifest(args.manifest) if args.sync else None
+        course = process_course(driver, url, download_dir, direct_download=args.direct, max_workers=args.workers,
+                                manifest=manifest, verify_hash=args.verify, asset_types=args.assets,
+                                use_api=not args.no_api, store=BlobStore(args.store) if args.store else None)
+        logging.info(f"Dados coletados: {course['lessons']}")
+        logging.info(f"Arquivos baixados em: {course['dir']}")
     except Exception as e:
         logging.error(f"Erro durante o processamento das aulas: {e}")
     finally:
-        driver.quit()
+        quit_chrome_driver(driver)
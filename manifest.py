@@ -0,0 +1,203 @@
+import os
+import time
+import sqlite3
+import hashlib
+import threading
+
+# Banco de dados padrão com o registro dos arquivos baixados
+MANIFEST_FILE = os.path.join(os.getcwd(), "manifest.db")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS courses (
+    course_id TEXT PRIMARY KEY,
+    name TEXT,
+    dir TEXT,
+    last_sync REAL
+);
+CREATE TABLE IF NOT EXISTS files (
+    course_id TEXT NOT NULL,
+    url TEXT NOT NULL,
+    lesson_index INTEGER,
+    lesson_name TEXT,
+    file_name TEXT,
+    size INTEGER,
+    sha256 TEXT,
+    status TEXT NOT NULL,
+    error TEXT,
+    updated_at REAL,
+    PRIMARY KEY (course_id, url)
+);
+CREATE INDEX IF NOT EXISTS files_url ON files (url);
+"""
+
+
+def hash_file(path):
+    """
+    Calcula o SHA-256 de um arquivo.
+
+    Args:
+        path (str): Caminho do arquivo.
+
+    Returns:
+        str: Hash em hexadecimal.
+    """
+    with open(path, "rb") as f:
+        return hashlib.file_digest(f, "sha256").hexdigest()
+
+
+class Manifest:
+    """
+    Registro persistente (SQLite) dos cursos e arquivos baixados.
+
+    Cada arquivo é identificado pelo curso e pelo URL de download e passa pelos
+    estados ``pending``, ``done`` e ``failed``. Como cada arquivo é marcado como
+    concluído assim que termina, uma execução interrompida retoma do ponto onde
+    parou, e sincronizações seguintes baixam apenas o que ainda não foi concluído.
+    """
+
+    def __init__(self, path=MANIFEST_FILE):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(SCHEMA)
+
+    def close(self):
+        self._conn.close()
+
+    def _execute(self, sql, params=()):
+        with self._lock, self._conn:
+            return self._conn.execute(sql, params).fetchall()
+
+    def start_course(self, course_id, name, course_dir):
+        """
+        Registra (ou atualiza) um curso antes do início da sincronização.
+
+        Args:
+            course_id (str): Identificador do curso.
+            name (str): Nome do curso.
+            course_dir (str): Diretório onde os arquivos do curso são salvos.
+        """
+        self._execute(
+            "INSERT INTO courses (course_id, name, dir) VALUES (?, ?, ?) "
+            "ON CONFLICT(course_id) DO UPDATE SET name = excluded.name, dir = excluded.dir",
+            (course_id, name, course_dir),
+        )
+
+    def finish_course(self, course_id):
+        """
+        Registra o horário da última sincronização concluída do curso.
+
+        Args:
+            course_id (str): Identificador do curso.
+        """
+        self._execute("UPDATE courses SET last_sync = ? WHERE course_id = ?", (time.time(), course_id))
+
+    def get_file(self, course_id, url):
+        """
+        Obtém o registro de um arquivo.
+
+        Args:
+            course_id (str): Identificador do curso.
+            url (str): URL de download do arquivo.
+
+        Returns:
+            sqlite3.Row | None: Registro do arquivo ou None se ele ainda não foi registrado.
+        """
+        rows = self._execute("SELECT * FROM files WHERE course_id = ? AND url = ?", (course_id, url))
+        return rows[0] if rows else None
+
+    def find_content(self, url):
+        """
+        Procura, em qualquer curso, um download concluído do mesmo URL.
+
+        Args:
+            url (str): URL de download do arquivo.
+
+        Returns:
+            sqlite3.Row | None: Tamanho e hash do conteúdo, ou None se o URL nunca foi baixado.
+        """
+        rows = self._execute(
+            "SELECT size, sha256 FROM files WHERE url = ? AND status = 'done' AND sha256 IS NOT NULL "
+            "ORDER BY updated_at DESC LIMIT 1",
+            (url,),
+        )
+        return rows[0] if rows else None
+
+    def is_complete(self, course_id, url, course_dir, verify_hash=False):
+        """
+        Verifica se um arquivo já foi baixado e continua íntegro em disco.
+
+        A verificação padrão compara apenas o tamanho do arquivo; com ``verify_hash``
+        o SHA-256 também é recalculado.
+
+        Args:
+            course_id (str): Identificador do curso.
+            url (str): URL de download do arquivo.
+            course_dir (str): Diretório onde os arquivos do curso são salvos.
+            verify_hash (bool): Se True, confere também o hash do arquivo.
+
+        Returns:
+            bool: True se o arquivo está completo.
+        """
+        row = self.get_file(course_id, url)
+        if row is None or row["status"] != "done":
+            return False
+        path = os.path.join(course_dir, row["file_name"])
+        try:
+            if os.path.getsize(path) != row["size"]:
+                return False
+        except OSError:
+            return False
+        return not verify_hash or hash_file(path) == row["sha256"]
+
+    def mark_pending(self, course_id, lesson, url, file_name):
+        """
+        Registra um arquivo prestes a ser baixado.
+
+        Args:
+            course_id (str): Identificador do curso.
+            lesson (dict): Aula extraída por ``extract_lessons_manifest``.
+            url (str): URL de download do arquivo.
+            file_name (str): Nome do arquivo dentro do diretório do curso.
+        """
+        self._execute(
+            "INSERT INTO files (course_id, url, lesson_index, lesson_name, file_name, status, updated_at) "
+            "VALUES (?, ?, ?, ?, ?, 'pending', ?) "
+            "ON CONFLICT(course_id, url) DO UPDATE SET lesson_index = excluded.lesson_index, "
+            "lesson_name = excluded.lesson_name, file_name = excluded.file_name, "
+            "status = 'pending', error = NULL, updated_at = excluded.updated_at",
+            (course_id, url, lesson["index"], lesson["name"], file_name, time.time()),
+        )
+
+    def mark_done(self, course_id, url, file_name, size, sha256):
+        """
+        Registra um arquivo baixado com sucesso.
+
+        Args:
+            course_id (str): Identificador do curso.
+            url (str): URL de download do arquivo.
+            file_name (str): Nome final do arquivo dentro do diretório do curso.
+            size (int): Tamanho do arquivo em bytes.
+            sha256 (str): Hash SHA-256 do arquivo.
+        """
+        self._execute(
+            "UPDATE files SET file_name = ?, size = ?, sha256 = ?, status = 'done', error = NULL, updated_at = ? "
+            "WHERE course_id = ? AND url = ?",
+            (file_name, size, sha256, time.time(), course_id, url),
+        )
+
+    def mark_failed(self, course_id, url, error):
+        """
+        Registra uma falha no download de um arquivo.
+
+        Args:
+            course_id (str): Identificador do curso.
+            url (str): URL de download do arquivo.
+            error (str): Motivo da falha.
+        """
+        self._execute(
+            "UPDATE files SET status = 'failed', error = ?, updated_at = ? WHERE course_id = ? AND url = ?",
+            (error, time.time(), course_id, url),
+        )
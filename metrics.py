@@ -0,0 +1,214 @@
+import time
+import bisect
+import threading
+from contextlib import contextmanager
+
+# Limites padrão dos histogramas de duração (em segundos)
+DURATION_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+# Limites dos histogramas de vazão (em bytes por segundo)
+THROUGHPUT_BUCKETS = (64e3, 256e3, 1e6, 4e6, 16e6, 64e6, 256e6)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names, values, extra=None):
+    pairs = list(zip(names, values))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+class Metric:
+    """
+    Base das métricas: nome, descrição, rótulos e trava para atualizações concorrentes.
+    """
+
+    type = None
+
+    def __init__(self, name, help, labels=()):
+        self.name = name
+        self.help = help
+        self.label_names = tuple(labels)
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        return tuple(str(labels.get(name, "")) for name in self.label_names)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.type}"]
+        lines.extend(self._samples())
+        return "\n".join(lines)
+
+
+class Counter(Metric):
+    """
+    Contador que só aumenta.
+    """
+
+    type = "counter"
+
+    def __init__(self, name, help, labels=()):
+        super().__init__(name, help, labels)
+        self._values = {}
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def _samples(self):
+        with self._lock:
+            values = dict(self._values) or ({(): 0} if not self.label_names else {})
+        return [f"{self.name}{_format_labels(self.label_names, key)} {value}" for key, value in values.items()]
+
+
+class Gauge(Metric):
+    """
+    Valor que pode subir e descer, ou ser calculado por uma função no momento da coleta.
+
+    Com rótulos, o valor só pode vir da função, que retorna um dicionário com o valor de cada combinação de rótulos.
+    """
+
+    type = "gauge"
+
+    def __init__(self, name, help, function=None, labels=()):
+        super().__init__(name, help, labels)
+        self.function = function
+        self._value = 0
+
+    def inc(self, amount=1):
+        with self._lock:
+            self._value += amount
+
+    def dec(self, amount=1):
+        self.inc(-amount)
+
+    def set_function(self, function):
+        self.function = function
+
+    def _samples(self):
+        value = self.function() if self.function else self._value
+        if not self.label_names:
+            return [f"{self.name} {value}"]
+        # Com rótulos, a função retorna um dicionário {valores dos rótulos: valor}
+        return [f"{self.name}{_format_labels(self.label_names, key)} {sample}" for key, sample in value.items()]
+
+
+class Histogram(Metric):
+    """
+    Histograma com limites fixos, no formato cumulativo do Prometheus.
+    """
+
+    type = "histogram"
+
+    def __init__(self, name, help, labels=(), buckets=DURATION_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(buckets)
+        self._series = {}
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        """
+        Mede a duração do bloco e a registra no histograma.
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def _samples(self):
+        with self._lock:
+            series = {key: (list(counts), total, count) for key, (counts, total, count) in self._series.items()}
+        lines = []
+        for key, (counts, total, count) in series.items():
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                le = "+Inf" if bound == float("inf") else repr(float(bound))
+                lines.append(f"{self.name}_bucket{_format_labels(self.label_names, key, ('le', le))} {cumulative}")
+            labels = _format_labels(self.label_names, key)
+            lines.append(f"{self.name}_sum{labels} {total}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+class Registry:
+    """
+    Conjunto de métricas exportadas em formato de texto do Prometheus.
+    """
+
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def render(self):
+        return "\n".join(metric.render() for metric in self._metrics) + "\n"
+
+
+REGISTRY = Registry()
+
+LOGIN_SECONDS = REGISTRY.register(Histogram(
+    "estrategia_login_duration_seconds", "Duração do login."))
+OPEN_COURSE_SECONDS = REGISTRY.register(Histogram(
+    "estrategia_open_course_duration_seconds", "Tempo até a lista de aulas de um curso ficar disponível."))
+LESSON_EXTRACTION_SECONDS = REGISTRY.register(Histogram(
+    "estrategia_lesson_extraction_duration_seconds", "Tempo para obter a lista de aulas, pela API ou pela página.",
+    labels=("source",)))
+LESSON_API_FALLBACKS = REGISTRY.register(Counter(
+    "estrategia_lesson_api_fallbacks_total", "Vezes em que a API do curso falhou e as aulas foram extraídas da página."))
+DOWNLOAD_TTFB_SECONDS = REGISTRY.register(Histogram(
+    "estrategia_download_ttfb_seconds", "Tempo até o primeiro byte de cada download.", labels=("mode",)))
+DOWNLOAD_SECONDS = REGISTRY.register(Histogram(
+    "estrategia_download_duration_seconds", "Duração total de cada download.", labels=("mode",)))
+DOWNLOAD_THROUGHPUT = REGISTRY.register(Histogram(
+    "estrategia_download_throughput_bytes_per_second", "Vazão de cada download.", labels=("mode",),
+    buckets=THROUGHPUT_BUCKETS))
+DOWNLOAD_BYTES = REGISTRY.register(Counter(
+    "estrategia_download_bytes_total", "Bytes baixados.", labels=("mode",)))
+DOWNLOAD_FAILURES = REGISTRY.register(Counter(
+    "estrategia_download_failures_total", "Downloads que falharam.", labels=("mode",)))
+SURVEY_MODAL_HITS = REGISTRY.register(Counter(
+    "estrategia_survey_modal_total", "Vezes em que o modal de pesquisa apareceu."))
+DOWNLOAD_TIMEOUTS = REGISTRY.register(Counter(
+    "estrategia_download_timeouts_total", "Downloads pelo navegador que excederam o tempo de espera."))
+INVALID_PDFS = REGISTRY.register(Counter(
+    "estrategia_invalid_pdfs_total", "Downloads descartados por não serem PDFs válidos (truncados ou páginas HTML).",
+    labels=("mode",)))
+RENAME_FAILURES = REGISTRY.register(Counter(
+    "estrategia_rename_failures_total", "Falhas ao renomear arquivos baixados."))
+ACTIVE_BROWSERS = REGISTRY.register(Gauge(
+    "estrategia_active_browsers", "Navegadores em execução."))
+ACTIVE_JOBS = REGISTRY.register(Gauge(
+    "estrategia_active_jobs", "Jobs de download em execução."))
+QUEUED_JOBS = REGISTRY.register(Gauge(
+    "estrategia_queued_jobs", "Jobs de download aguardando na fila."))
+RATE_LIMIT_WINDOW = REGISTRY.register(Gauge(
+    "estrategia_rate_limit_window", "Requisições simultâneas permitidas a cada host.", labels=("host",),
+    function=dict))
+RATE_LIMIT_THROTTLED = REGISTRY.register(Counter(
+    "estrategia_rate_limit_throttled_total", "Respostas 429/5xx recebidas de cada host.", labels=("host", "status")))
+DOWNLOAD_RETRIES = REGISTRY.register(Counter(
+    "estrategia_download_retries_total", "Novas tentativas de downloads que falharam, por resultado.",
+    labels=("mode", "outcome")))
+DEDUP_BYTES = REGISTRY.register(Counter(
+    "estrategia_dedup_bytes_total", "Bytes que deixaram de ser baixados ou gravados graças à deduplicação.",
+    labels=("reason",)))
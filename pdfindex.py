@@ -0,0 +1,347 @@
+import os
+import html
+import time
+import sqlite3
+import logging
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    from pypdf import PdfReader
+except ImportError:
+    # Sem o pypdf, os PDFs ainda são verificados, mas o texto não é indexado
+    PdfReader = None
+
+# Banco de dados padrão do índice de busca
+SEARCH_INDEX_FILE = os.getenv("SEARCH_INDEX_FILE", os.path.join(os.getcwd(), "search.db"))
+# Processos dedicados à verificação e à extração de texto dos PDFs
+INDEX_WORKERS = int(os.getenv("INDEX_WORKERS", max((os.cpu_count() or 2) // 2, 1)))
+# Bytes lidos do início e do fim do arquivo na verificação da estrutura
+PDF_PROBE_SIZE = 1024
+# Marcadores dos termos encontrados nos trechos: caracteres de controle, retirados do texto dos PDFs
+# na indexação e trocados por <mark> só depois que o texto do trecho é escapado
+MATCH_START, MATCH_END = "\x02", "\x03"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    path TEXT PRIMARY KEY,
+    course TEXT,
+    lesson TEXT,
+    size INTEGER,
+    mtime REAL,
+    pages INTEGER,
+    error TEXT,
+    indexed_at REAL
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS pages USING fts5(
+    text,
+    path UNINDEXED,
+    course UNINDEXED,
+    lesson UNINDEXED,
+    page UNINDEXED,
+    tokenize = 'unicode61 remove_diacritics 2'
+);
+"""
+
+
+def check_pdf(path):
+    """
+    Confere a estrutura básica de um PDF: cabeçalho ``%PDF-`` no início e marcador ``%%EOF`` no fim.
+
+    Detecta arquivos truncados e páginas de erro HTML salvas com a extensão ``.pdf``
+    lendo apenas os primeiros e os últimos bytes do arquivo.
+
+    Args:
+        path (str): Caminho do arquivo.
+
+    Returns:
+        str | None: Motivo pelo qual o arquivo não é um PDF válido, ou None se ele é válido.
+    """
+    try:
+        size = os.path.getsize(path)
+        with open(path, "rb") as f:
+            head = f.read(PDF_PROBE_SIZE)
+            f.seek(max(size - PDF_PROBE_SIZE, 0))
+            tail = f.read()
+    except OSError as e:
+        return f"arquivo ilegível: {e}"
+    if not size:
+        return "arquivo vazio"
+    if b"%PDF-" not in head:
+        if head.lstrip()[:15].lower().startswith((b"<!doctype", b"<html")):
+            return "página HTML salva como PDF"
+        return "cabeçalho %PDF- ausente"
+    if b"%%EOF" not in tail:
+        return "marcador %%EOF ausente (arquivo truncado)"
+    return None
+
+
+def extract_pdf(path):
+    """
+    Verifica um PDF e extrai o seu texto página por página. Executada nos processos do ``PdfIndexer``.
+
+    Args:
+        path (str): Caminho do arquivo.
+
+    Returns:
+        dict: Número de páginas, lista de pares (página, texto) das páginas com texto e o erro, se houver.
+    """
+    error = check_pdf(path)
+    if error or PdfReader is None:
+        return {"pages": None, "texts": [], "error": error}
+    try:
+        reader = PdfReader(path)
+        texts = []
+        for number, page in enumerate(reader.pages, 1):
+            text = page.extract_text() or ""
+            if text.strip():
+                texts.append((number, text))
+        return {"pages": len(reader.pages), "texts": texts, "error": None}
+    except Exception as e:
+        return {"pages": None, "texts": [], "error": f"PDF ilegível: {e}"}
+
+
+def fts_query(query):
+    """
+    Converte o texto digitado pelo usuário em uma consulta FTS5, buscando todos os termos.
+
+    Cada termo é colocado entre aspas para que caracteres especiais da sintaxe do FTS5 não
+    causem erros; um ``*`` no fim de um termo é mantido como busca por prefixo.
+    """
+    terms = []
+    for term in query.split():
+        prefix = term.endswith("*")
+        term = term.rstrip("*").replace('"', '""')
+        if term:
+            terms.append(f'"{term}"' + ("*" if prefix else ""))
+    return " ".join(terms)
+
+
+def highlight(snippet):
+    """
+    Escapa o texto de um trecho do FTS5 e troca os marcadores dos termos encontrados por ``<mark>``.
+    """
+    return html.escape(snippet).replace(MATCH_START, "<mark>").replace(MATCH_END, "</mark>")
+
+
+class SearchIndex:
+    """
+    Índice de busca de texto completo (SQLite FTS5) das páginas dos PDFs da biblioteca.
+
+    Cada página com texto é uma linha do índice, associada ao curso e à aula do arquivo;
+    a tabela ``documents`` guarda o tamanho e o mtime de cada arquivo indexado, para que
+    apenas os arquivos novos ou alterados sejam processados de novo. O banco só é aberto
+    no primeiro acesso.
+
+    Args:
+        root (str): Diretório da biblioteca; os caminhos são guardados relativos a ele.
+        path (str): Arquivo SQLite do índice.
+    """
+
+    def __init__(self, root, path=SEARCH_INDEX_FILE):
+        self.root = root
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = None
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def _connect(self):
+        # Chamado com self._lock adquirido
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.row_factory = sqlite3.Row
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(SCHEMA)
+        return self._conn
+
+    def _execute(self, sql, params=()):
+        with self._lock, self._connect() as conn:
+            return conn.execute(sql, params).fetchall()
+
+    def key(self, path):
+        """
+        Retorna o caminho relativo, o curso e a aula de um arquivo da biblioteca, como no ``FileCatalog``.
+        """
+        rel_path = os.path.relpath(path, self.root)
+        parts = rel_path.split(os.sep)
+        course = parts[0] if len(parts) > 1 else os.path.basename(self.root)
+        return rel_path.replace(os.sep, "/"), course, os.path.splitext(parts[-1])[0]
+
+    def is_current(self, path):
+        """
+        Verifica se o arquivo já foi indexado com o tamanho e o mtime atuais.
+        """
+        stat = os.stat(path)
+        rows = self._execute("SELECT size, mtime FROM documents WHERE path = ?", (self.key(path)[0],))
+        return bool(rows) and rows[0]["size"] == stat.st_size and rows[0]["mtime"] == stat.st_mtime
+
+    def add(self, path, result):
+        """
+        Substitui as páginas indexadas de um arquivo pelo resultado de ``extract_pdf``.
+
+        Args:
+            path (str): Caminho do arquivo.
+            result (dict): Resultado de ``extract_pdf``.
+        """
+        rel_path, course, lesson = self.key(path)
+        stat = os.stat(path)
+        with self._lock, self._connect() as conn:
+            conn.execute("DELETE FROM pages WHERE path = ?", (rel_path,))
+            conn.executemany(
+                "INSERT INTO pages (text, path, course, lesson, page) VALUES (?, ?, ?, ?, ?)",
+                [(text.replace(MATCH_START, "").replace(MATCH_END, ""), rel_path, course, lesson, number)
+                 for number, text in result["texts"]],
+            )
+            conn.execute(
+                "INSERT OR REPLACE INTO documents (path, course, lesson, size, mtime, pages, error, indexed_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (rel_path, course, lesson, stat.st_size, stat.st_mtime, result["pages"], result["error"], time.time()),
+            )
+
+    def remove(self, path):
+        """
+        Remove um arquivo do índice.
+        """
+        rel_path = self.key(path)[0]
+        with self._lock, self._connect() as conn:
+            conn.execute("DELETE FROM pages WHERE path = ?", (rel_path,))
+            conn.execute("DELETE FROM documents WHERE path = ?", (rel_path,))
+
+    def paths(self):
+        """
+        Lista os caminhos relativos de todos os arquivos indexados.
+        """
+        return [row["path"] for row in self._execute("SELECT path FROM documents")]
+
+    def search(self, query, course=None, limit=20):
+        """
+        Busca as páginas que contêm todos os termos da consulta, das mais relevantes para as menos.
+
+        Args:
+            query (str): Termos buscados.
+            course (str): Se informado, limita a busca a um curso.
+            limit (int): Número máximo de resultados.
+
+        Returns:
+            list: Lista de dicionários com curso, aula, caminho, página e trecho de cada resultado.
+                O trecho é HTML seguro: o texto do PDF é escapado e os termos encontrados
+                ficam entre ``<mark>`` e ``</mark>``.
+        """
+        match = fts_query(query)
+        if not match:
+            return []
+        sql = ("SELECT course, lesson, path, page, snippet(pages, 0, ?, ?, '…', 16) AS snippet "
+               "FROM pages WHERE pages MATCH ?")
+        params = [MATCH_START, MATCH_END, match]
+        if course:
+            sql += " AND course = ?"
+            params.append(course)
+        sql += " ORDER BY bm25(pages) LIMIT ?"
+        params.append(limit)
+        return [dict(row, snippet=highlight(row["snippet"])) for row in self._execute(sql, params)]
+
+    def invalid(self):
+        """
+        Lista os arquivos que falharam na verificação.
+
+        Returns:
+            list: Lista de dicionários com o caminho, o curso, a aula e o erro de cada arquivo.
+        """
+        rows = self._execute("SELECT path, course, lesson, error FROM documents WHERE error IS NOT NULL ORDER BY path")
+        return [dict(row) for row in rows]
+
+
+class PdfIndexer:
+    """
+    Verifica e indexa os PDFs da biblioteca em um pool de processos.
+
+    A extração de texto é cara e presa à CPU; executada em processos separados, ela não
+    disputa o GIL com os downloads e a interface web. ``submit`` apenas enfileira o arquivo,
+    e o resultado é gravado no índice quando o processo termina.
+
+    Args:
+        index (SearchIndex): Índice onde os resultados são gravados.
+        workers (int): Número de processos.
+    """
+
+    def __init__(self, index, workers=INDEX_WORKERS):
+        self.index = index
+        self.workers = workers
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def _pool(self):
+        if self._executor is None:
+            if PdfReader is None:
+                logging.warning("pypdf não está instalado: os PDFs serão verificados, mas não indexados.")
+            # spawn evita copiar para os processos o estado das threads do servidor. Cada processo
+            # importa de novo o script principal (como o app.py), que por isso não deve iniciar threads
+            # nem abrir arquivos na importação, apenas sob ``if __name__ == '__main__'`` ou no primeiro uso
+            self._executor = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context("spawn"))
+        return self._executor
+
+    def submit(self, path):
+        """
+        Enfileira um PDF para verificação e indexação.
+
+        Args:
+            path (str): Caminho do arquivo na biblioteca.
+
+        Returns:
+            concurrent.futures.Future: Resultado de ``extract_pdf``.
+        """
+        # Com spawn, os processos do pool são criados dentro do submit
+        with self._lock:
+            future = self._pool().submit(extract_pdf, path)
+        future.add_done_callback(lambda done: self._store(path, done))
+        return future
+
+    def _store(self, path, future):
+        try:
+            result = future.result()
+            if not os.path.exists(path):
+                return
+            self.index.add(path, result)
+        except Exception as e:
+            logging.error(f"Erro ao indexar {path}: {e}")
+            return
+        if result["error"]:
+            logging.warning(f"PDF inválido na biblioteca: {path} - {result['error']}")
+
+    def scan(self):
+        """
+        Enfileira os PDFs da biblioteca ainda não indexados ou alterados desde a última indexação
+        e remove do índice os arquivos que não existem mais.
+
+        Returns:
+            int: Número de arquivos enfileirados.
+        """
+        for rel_path in self.index.paths():
+            path = os.path.join(self.index.root, rel_path)
+            if not os.path.exists(path):
+                self.index.remove(path)
+        count = 0
+        for dirpath, _, filenames in os.walk(self.index.root):
+            for filename in filenames:
+                path = os.path.join(dirpath, filename)
+                if filename.lower().endswith(".pdf") and not self.index.is_current(path):
+                    self.submit(path)
+                    count += 1
+        if count:
+            logging.info(f"{count} PDFs enfileirados para indexação.")
+        return count
+
+    def close(self):
+        """
+        Aguarda as indexações pendentes e encerra os processos.
+        """
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown()
+                self._executor = None
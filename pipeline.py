@@ -0,0 +1,84 @@
+import logging
+import threading
+from queue import Queue, Full
+
+# Marca de encerramento enviada a cada thread da etapa
+_STOP = object()
+
+
+class PipelineStage:
+    """
+    Etapa de um pipeline: threads que consomem itens de uma fila limitada.
+
+    A etapa anterior entrega os itens com ``put`` e segue adiante; quando a fila está
+    cheia, ``put`` bloqueia, de modo que o produtor não se distancia demais dos
+    consumidores e a memória ocupada pelos itens em espera fica limitada.
+
+    Args:
+        handler (callable): Função chamada com cada item, em uma das threads da etapa.
+        workers (int): Número de threads consumidoras.
+        maxsize (int): Itens aguardando na fila; 0 para o dobro do número de threads.
+        name (str): Nome da etapa, usado nas threads e no log.
+    """
+
+    def __init__(self, handler, workers=1, maxsize=0, name="etapa"):
+        self.handler = handler
+        self.name = name
+        self._queue = Queue(maxsize=maxsize or workers * 2)
+        self._threads = [
+            threading.Thread(target=self._run, name=f"{name}-{n + 1}", daemon=True) for n in range(workers)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def put(self, item, cancel_event=None):
+        """
+        Entrega um item à etapa, aguardando enquanto a fila estiver cheia.
+
+        Args:
+            item: Item a processar.
+            cancel_event (threading.Event): Se sinalizado, a espera é interrompida.
+
+        Returns:
+            bool: True se o item foi entregue, False se a espera foi cancelada.
+        """
+        while cancel_event is None or not cancel_event.is_set():
+            try:
+                self._queue.put(item, timeout=0.25)
+                return True
+            except Full:
+                continue
+        return False
+
+    def join(self):
+        """
+        Aguarda até que todos os itens entregues tenham sido processados.
+        """
+        self._queue.join()
+
+    def close(self):
+        """
+        Processa os itens restantes e encerra as threads da etapa.
+        """
+        for _ in self._threads:
+            self._queue.put(_STOP)
+        for thread in self._threads:
+            thread.join()
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            try:
+                if item is _STOP:
+                    return
+                self.handler(item)
+            except Exception as e:
+                logging.error(f"Erro na etapa {self.name}: {e}")
+            finally:
+                self._queue.task_done()
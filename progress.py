@@ -0,0 +1,147 @@
+import time
+import threading
+
+
+class ProgressTracker:
+    """
+    Acompanha o progresso de um download e publica instantâneos com frequência limitada.
+
+    As atualizações (aula atual, arquivo atual, bytes recebidos) apenas alteram o
+    estado em memória; um instantâneo é publicado no máximo a cada ``min_interval``
+    segundos, de modo que o laço de download não espera pela publicação e os
+    clientes não são inundados de eventos.
+
+    Args:
+        publish (callable): Função que recebe o dicionário com o instantâneo do progresso.
+        min_interval (float): Intervalo mínimo entre duas publicações (em segundos).
+    """
+
+    def __init__(self, publish, min_interval=0.5):
+        self.publish = publish
+        self.min_interval = min_interval
+        self._lock = threading.Lock()
+        self._started_at = time.monotonic()
+        self._last_emit = 0
+        self._last_bytes = 0
+        self.lesson_index = 0
+        self.lesson_total = 0
+        self.lesson_name = None
+        self.current_file = None
+        self.files_done = 0
+        self.files_failed = 0
+        self.files_total = 0
+        self.bytes_downloaded = 0
+
+    def start(self, lesson_total, files_total):
+        """
+        Registra o total de aulas e de arquivos a baixar.
+        """
+        with self._lock:
+            self._started_at = time.monotonic()
+            self.lesson_total = lesson_total
+            self.files_total = files_total
+        self._maybe_publish(force=True)
+
+    def lesson(self, index, name):
+        """
+        Registra a aula em processamento.
+        """
+        with self._lock:
+            self.lesson_index = index
+            self.lesson_name = name
+        self._maybe_publish()
+
+    def file_started(self, name):
+        """
+        Registra o arquivo em download.
+        """
+        with self._lock:
+            self.current_file = name
+        self._maybe_publish()
+
+    def add_bytes(self, count):
+        """
+        Soma bytes recebidos ao total baixado.
+        """
+        with self._lock:
+            self.bytes_downloaded += count
+        self._maybe_publish()
+
+    def file_done(self, name=None, size=0):
+        """
+        Registra a conclusão de um arquivo.
+
+        Args:
+            name (str): Nome do arquivo concluído.
+            size (int): Bytes ainda não contabilizados por ``add_bytes`` (downloads feitos pelo navegador).
+        """
+        with self._lock:
+            self.files_done += 1
+            self.bytes_downloaded += size
+            if name:
+                self.current_file = name
+        self._maybe_publish()
+
+    def file_failed(self, name=None):
+        """
+        Registra um arquivo que não pôde ser baixado e não será mais tentado.
+
+        Os arquivos desistidos contam como finalizados no progresso e no tempo restante,
+        que assim chegam ao fim mesmo quando algum download falha.
+
+        Args:
+            name (str): Nome do arquivo.
+        """
+        with self._lock:
+            self.files_failed += 1
+            if name:
+                self.current_file = name
+        self._maybe_publish()
+
+    def finish(self):
+        """
+        Publica o estado final, independentemente do intervalo mínimo.
+        """
+        self._maybe_publish(force=True)
+
+    def snapshot(self):
+        """
+        Monta o instantâneo do progresso, com vazão instantânea, vazão média e tempo restante estimado.
+
+        Returns:
+            dict: Estado atual do progresso.
+        """
+        with self._lock:
+            return self._snapshot(time.monotonic())
+
+    def _snapshot(self, now):
+        elapsed = max(now - self._started_at, 1e-6)
+        # A vazão instantânea considera os bytes recebidos desde a última publicação
+        interval = max(now - self._last_emit, 1e-6) if self._last_emit else elapsed
+        finished = self.files_done + self.files_failed
+        eta = None
+        if finished and self.files_total:
+            eta = elapsed / finished * max(self.files_total - finished, 0)
+        return {
+            "lesson_index": self.lesson_index,
+            "lesson_total": self.lesson_total,
+            "lesson_name": self.lesson_name,
+            "current_file": self.current_file,
+            "files_done": self.files_done,
+            "files_failed": self.files_failed,
+            "files_total": self.files_total,
+            "bytes_downloaded": self.bytes_downloaded,
+            "throughput": (self.bytes_downloaded - self._last_bytes) / interval,
+            "avg_throughput": self.bytes_downloaded / elapsed,
+            "eta": eta,
+        }
+
+    def _maybe_publish(self, force=False):
+        now = time.monotonic()
+        with self._lock:
+            if not force and now - self._last_emit < self.min_interval:
+                return
+            data = self._snapshot(now)
+            self._last_emit = now
+            self._last_bytes = self.bytes_downloaded
+        self.publish(data)
@@ -0,0 +1,376 @@
+import os
+import time
+import logging
+import threading
+from contextlib import contextmanager
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit
+from metrics import RATE_LIMIT_WINDOW, RATE_LIMIT_THROTTLED
+
+# Respostas que indicam que o servidor está sobrecarregado ou limitando as requisições
+THROTTLE_STATUSES = (429, 500, 502, 503, 504)
+
+
+class RequestCancelled(Exception):
+    """
+    Lançada quando a espera por uma vaga para a requisição é cancelada.
+    """
+
+
+def parse_retry_after(value):
+    """
+    Converte o cabeçalho ``Retry-After`` em segundos.
+
+    Args:
+        value (str): Valor do cabeçalho (segundos ou data HTTP).
+
+    Returns:
+        float | None: Tempo de espera pedido pelo servidor ou None se ausente ou inválido.
+    """
+    if not value:
+        return None
+    if value.strip().isdigit():
+        return float(value)
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+
+class TokenBucket:
+    """
+    Balde de fichas: permite rajadas de até ``burst`` unidades e uma taxa média de ``rate`` unidades por segundo.
+
+    Args:
+        rate (float): Unidades repostas por segundo; 0 desativa o limite.
+        burst (float): Capacidade do balde. Se omitida, equivale a um segundo de taxa.
+    """
+
+    def __init__(self, rate=0, burst=None):
+        self._lock = threading.Lock()
+        self.configure(rate, burst)
+
+    def configure(self, rate, burst=None):
+        with self._lock:
+            self.rate = rate
+            self.burst = burst or max(rate, 1)
+            self._tokens = self.burst
+            self._updated = time.monotonic()
+
+    def acquire(self, amount=1, cancel_event=None):
+        """
+        Retira ``amount`` unidades do balde, aguardando a reposição quando necessário.
+
+        Quantidades maiores que a capacidade são permitidas e deixam o balde negativo,
+        o que atrasa as retiradas seguintes na proporção do excesso.
+
+        Args:
+            amount (float): Unidades a retirar.
+            cancel_event (threading.Event): Se sinalizado, a espera é interrompida.
+        """
+        while True:
+            with self._lock:
+                if not self.rate:
+                    return
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens > 0:
+                    self._tokens -= amount
+                    return
+                delay = -self._tokens / self.rate
+            if cancel_event is None:
+                time.sleep(delay)
+            elif cancel_event.wait(delay):
+                return
+
+
+class HostLimiter:
+    """
+    Controla as requisições a um host: taxa máxima e janela de concorrência AIMD.
+
+    A janela cresce aditivamente (cerca de uma requisição a mais por janela concluída)
+    enquanto as respostas chegam sem erro e com latência próxima da mínima observada,
+    e é reduzida à metade diante de respostas 429/5xx, de um ``Retry-After`` ou de uma
+    latência muito acima da linha de base. Um ``Retry-After`` também suspende novas
+    requisições ao host até o prazo pedido.
+
+    Args:
+        host (str): Nome do host.
+        rate (float): Requisições por segundo permitidas; 0 para ilimitado.
+        min_window (int): Menor número de requisições simultâneas.
+        max_window (int): Maior número de requisições simultâneas.
+        initial_window (float): Janela inicial.
+        latency_factor (float): Razão entre a latência atual e a linha de base a partir da qual a janela é reduzida.
+    """
+
+    def __init__(self, host, rate=0, min_window=1, max_window=16, initial_window=4, latency_factor=3.0):
+        self.host = host
+        self.min_window = min_window
+        self.max_window = max_window
+        self.latency_factor = latency_factor
+        self.window = float(min(max(initial_window, min_window), max_window))
+        self.bucket = TokenBucket(rate)
+        self._cond = threading.Condition()
+        self._in_flight = 0
+        self._blocked_until = 0.0
+        self._last_decrease = 0.0
+        self._latency = None
+        self._base_latency = None
+        self._stats = {"requests": 0, "throttled": 0, "errors": 0, "decreases": 0, "bytes": 0, "wait_seconds": 0.0}
+
+    def acquire(self, cancel_event=None):
+        """
+        Aguarda uma vaga na janela de concorrência e uma ficha do balde.
+
+        Returns:
+            bool: False se ``cancel_event`` foi sinalizado durante a espera; nesse caso nenhuma
+                vaga fica ocupada e ``release`` não deve ser chamado.
+        """
+        start = time.monotonic()
+        with self._cond:
+            while True:
+                if cancel_event is not None and cancel_event.is_set():
+                    return False
+                delay = self._blocked_until - time.monotonic()
+                if delay <= 0 and self._in_flight < int(self.window):
+                    self._in_flight += 1
+                    break
+                self._cond.wait(min(delay, 0.5) if delay > 0 else 0.5)
+        self.bucket.acquire(cancel_event=cancel_event)
+        if cancel_event is not None and cancel_event.is_set():
+            # A vaga já reservada é devolvida, pois quem chamou não chegará a liberá-la
+            self.release()
+            return False
+        with self._cond:
+            self._stats["requests"] += 1
+            self._stats["wait_seconds"] += time.monotonic() - start
+        return True
+
+    def release(self):
+        """
+        Libera a vaga ocupada por uma requisição cuja resposta já foi consumida.
+        """
+        with self._cond:
+            self._in_flight -= 1
+            self._cond.notify_all()
+
+    def record(self, status, latency, retry_after=None):
+        """
+        Ajusta a janela a partir do resultado de uma requisição.
+
+        Args:
+            status (int | None): Código HTTP da resposta ou None se a requisição falhou.
+            latency (float): Tempo até a resposta (em segundos).
+            retry_after (float): Tempo de espera pedido pelo servidor, se houver.
+        """
+        now = time.monotonic()
+        with self._cond:
+            congested = status is None or status in THROTTLE_STATUSES or retry_after is not None
+            if status is None:
+                self._stats["errors"] += 1
+            elif status in THROTTLE_STATUSES:
+                self._stats["throttled"] += 1
+                RATE_LIMIT_THROTTLED.inc(host=self.host, status=status)
+            if status is not None and not congested:
+                self._latency = latency if self._latency is None else 0.8 * self._latency + 0.2 * latency
+                if self._base_latency is None or self._latency < self._base_latency:
+                    self._base_latency = self._latency
+                else:
+                    # A linha de base acompanha lentamente mudanças duradouras na latência
+                    self._base_latency += (self._latency - self._base_latency) * 0.01
+                congested = self._latency > self._base_latency * self.latency_factor + 0.05
+            if retry_after:
+                self._blocked_until = max(self._blocked_until, now + retry_after)
+            if congested:
+                # Uma única redução por período de latência, para que as respostas de uma mesma rajada não zerem a janela
+                if now - self._last_decrease > max(self._latency or 0, 0.5):
+                    self.window = max(self.min_window, self.window / 2)
+                    self._last_decrease = now
+                    self._stats["decreases"] += 1
+                    if status is None:
+                        reason = "erro de conexão"
+                    elif status in THROTTLE_STATUSES or retry_after is not None:
+                        reason = f"resposta {status}"
+                    else:
+                        reason = f"latência de {self._latency * 1000:.0f} ms"
+                    logging.info(f"Limite de {self.host}: janela reduzida para {int(self.window)} ({reason}).")
+            else:
+                self.window = min(self.max_window, self.window + 1 / self.window)
+            self._cond.notify_all()
+
+    def pause(self, seconds):
+        """
+        Suspende novas requisições ao host pelo tempo informado.
+        """
+        with self._cond:
+            self._blocked_until = max(self._blocked_until, time.monotonic() + seconds)
+
+    def add_bytes(self, count):
+        with self._cond:
+            self._stats["bytes"] += count
+
+    def stats(self):
+        """
+        Retorna as estatísticas do host.
+
+        Returns:
+            dict: Janela atual, requisições em andamento, latências e contadores.
+        """
+        with self._cond:
+            return {
+                **self._stats,
+                "window": int(self.window),
+                "in_flight": self._in_flight,
+                "latency": self._latency,
+                "base_latency": self._base_latency,
+                "blocked_for": max(self._blocked_until - time.monotonic(), 0.0),
+            }
+
+
+class RateLimiter:
+    """
+    Ponto único por onde passam as requisições HTTP feitas aos servidores do site.
+
+    Mantém um ``HostLimiter`` por host e um limite global opcional de largura de banda,
+    compartilhado por todos os downloads do processo.
+
+    Args:
+        rate (float): Requisições por segundo permitidas a cada host; 0 para ilimitado.
+        bandwidth (float): Limite global de bytes por segundo; 0 para ilimitado.
+        max_window (int): Maior número de requisições simultâneas a cada host.
+        max_retries (int): Tentativas extras após respostas 429/5xx.
+    """
+
+    def __init__(self, rate=0, bandwidth=0, max_window=16, max_retries=3):
+        self.rate = rate
+        self.max_window = max_window
+        self.max_retries = max_retries
+        self.bandwidth = TokenBucket()
+        self._hosts = {}
+        self._lock = threading.Lock()
+        self.configure(bandwidth=bandwidth)
+        RATE_LIMIT_WINDOW.set_function(self._windows)
+
+    def configure(self, rate=None, bandwidth=None, max_window=None):
+        """
+        Altera os limites; os hosts já conhecidos passam a usar os novos valores.
+        """
+        with self._lock:
+            if rate is not None:
+                self.rate = rate
+            if max_window is not None:
+                self.max_window = max_window
+            hosts = list(self._hosts.values())
+        for limiter in hosts:
+            limiter.bucket.configure(self.rate)
+            limiter.max_window = self.max_window
+            limiter.window = min(limiter.window, self.max_window)
+        if bandwidth is not None:
+            # O balde comporta um quarto de segundo de banda, suavizando a vazão sem atrasar blocos pequenos
+            self.bandwidth.configure(bandwidth, bandwidth / 4 if bandwidth else None)
+
+    def host(self, url):
+        """
+        Obtém o controle do host de um URL.
+        """
+        name = urlsplit(url).hostname or ""
+        with self._lock:
+            limiter = self._hosts.get(name)
+            if limiter is None:
+                limiter = self._hosts[name] = HostLimiter(name, self.rate, max_window=self.max_window)
+            return limiter
+
+    def _windows(self):
+        with self._lock:
+            return {(name,): int(limiter.window) for name, limiter in self._hosts.items()}
+
+    @contextmanager
+    def request(self, http, method, url, cancel_event=None, **kwargs):
+        """
+        Faz uma requisição respeitando os limites do host, repetindo-a após respostas 429/5xx.
+
+        A vaga na janela de concorrência fica ocupada até o fim do bloco ``with``, isto é,
+        enquanto o corpo da resposta é consumido.
+
+        Args:
+            http (urllib3.PoolManager): Cliente HTTP.
+            method (str): Método HTTP.
+            url (str): URL da requisição.
+            cancel_event (threading.Event): Se sinalizado, a espera por uma vaga é interrompida.
+            **kwargs: Argumentos repassados a ``http.request``.
+
+        Yields:
+            urllib3.BaseHTTPResponse: Resposta final (a última tentativa, mesmo que com erro).
+        """
+        limiter = self.host(url)
+        for attempt in range(self.max_retries + 1):
+            if not limiter.acquire(cancel_event):
+                raise RequestCancelled("Requisição cancelada.")
+            start = time.monotonic()
+            try:
+                response = http.request(method, url, **kwargs)
+            except Exception:
+                limiter.record(None, time.monotonic() - start)
+                limiter.release()
+                raise
+            retry_after = parse_retry_after(response.headers.get("Retry-After"))
+            limiter.record(response.status, time.monotonic() - start, retry_after)
+            if response.status in THROTTLE_STATUSES and attempt < self.max_retries:
+                if retry_after is None:
+                    # Sem Retry-After, aguarda um recuo exponencial antes da próxima tentativa
+                    limiter.pause(0.5 * 2 ** attempt)
+                logging.warning(f"Resposta {response.status} de {limiter.host}, tentando novamente "
+                                f"({attempt + 1}/{self.max_retries})...")
+                response.drain_conn()
+                response.release_conn()
+                limiter.release()
+                continue
+            break
+        try:
+            yield response
+        finally:
+            limiter.release()
+
+    def throttle(self, url, count, cancel_event=None):
+        """
+        Contabiliza bytes recebidos de um host e aplica o limite global de largura de banda.
+
+        Args:
+            url (str): URL de onde os bytes vieram.
+            count (int): Número de bytes recebidos.
+            cancel_event (threading.Event): Se sinalizado, a espera é interrompida.
+        """
+        self.host(url).add_bytes(count)
+        self.bandwidth.acquire(count, cancel_event)
+
+    def stats(self):
+        """
+        Retorna as estatísticas de todos os hosts.
+
+        Returns:
+            dict: Estatísticas de cada host, indexadas pelo nome do host.
+        """
+        with self._lock:
+            hosts = dict(self._hosts)
+        return {name: limiter.stats() for name, limiter in hosts.items()}
+
+    def log_stats(self):
+        """
+        Registra no log as estatísticas de cada host, para ajuste dos limites.
+        """
+        for name, stats in self.stats().items():
+            latency = f"{stats['latency'] * 1000:.0f} ms" if stats["latency"] is not None else "-"
+            logging.info(
+                f"Host {name}: {stats['requests']} requisições, {stats['throttled']} limitadas, "
+                f"{stats['errors']} erros, janela {stats['window']}, latência {latency}, "
+                f"{stats['bytes'] / 1e6:.1f} MB, {stats['wait_seconds']:.1f} s de espera"
+            )
+
+
+# Controle compartilhado por todos os downloads do processo
+rate_limiter = RateLimiter(
+    rate=float(os.getenv("ESTRATEGIA_MAX_RPS", 0)),
+    bandwidth=float(os.getenv("ESTRATEGIA_BANDWIDTH_LIMIT", 0)),
+    max_window=int(os.getenv("ESTRATEGIA_MAX_CONNECTIONS", 16)),
+)
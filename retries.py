@@ -0,0 +1,194 @@
+import os
+import time
+import random
+import logging
+import threading
+from metrics import DOWNLOAD_RETRIES
+
+# Tentativas de cada arquivo, contando a primeira
+RETRY_ATTEMPTS = int(os.getenv("ESTRATEGIA_RETRY_ATTEMPTS", "4"))
+# Espera base e máxima entre as tentativas (em segundos)
+RETRY_BASE_DELAY = float(os.getenv("ESTRATEGIA_RETRY_BASE_DELAY", "2"))
+RETRY_MAX_DELAY = float(os.getenv("ESTRATEGIA_RETRY_MAX_DELAY", "60"))
+
+
+def backoff_delay(attempt, base=RETRY_BASE_DELAY, cap=RETRY_MAX_DELAY):
+    """
+    Calcula a espera antes de uma nova tentativa, com recuo exponencial e variação aleatória.
+
+    A espera é sorteada entre metade e o total de ``base * 2 ** (attempt - 1)``, limitado a
+    ``cap``, para que os arquivos que falharam juntos não sejam tentados de novo ao mesmo tempo.
+
+    Args:
+        attempt (int): Número de tentativas já feitas.
+        base (float): Espera após a primeira falha (em segundos).
+        cap (float): Espera máxima (em segundos).
+
+    Returns:
+        float: Tempo de espera (em segundos).
+    """
+    delay = min(cap, base * 2 ** max(attempt - 1, 0))
+    return random.uniform(delay / 2, delay)
+
+
+class FailedDownload:
+    """
+    Arquivo cujo download falhou, com o motivo e as tentativas feitas.
+
+    Args:
+        lesson (str): Nome da aula.
+        url (str): URL do arquivo.
+        file_name (str): Nome com que o arquivo é salvo.
+        reason (str): Motivo da última falha.
+        mode (str): Forma do download: ``browser`` (clique no botão) ou ``direct`` (HTTP).
+    """
+
+    def __init__(self, lesson, url, file_name, reason, mode):
+        self.lesson = lesson
+        self.url = url
+        self.file_name = file_name
+        self.reason = reason
+        self.mode = mode
+        self.attempts = 1
+        self.next_attempt = 0.0
+
+    def to_dict(self):
+        return {
+            "lesson": self.lesson,
+            "url": self.url,
+            "file": self.file_name,
+            "reason": self.reason,
+            "mode": self.mode,
+            "attempts": self.attempts,
+        }
+
+
+class RetryQueue:
+    """
+    Fila de downloads que falharam, tentados de novo com recuo exponencial.
+
+    As falhas são registradas durante a varredura das aulas sem interrompê-la; cada arquivo
+    fica na fila até o seu prazo de nova tentativa. Os que esgotam as tentativas passam para
+    a lista de irrecuperáveis, apresentada no resumo do final do job.
+
+    Args:
+        max_attempts (int): Tentativas de cada arquivo, contando a primeira.
+        base_delay (float): Espera após a primeira falha (em segundos).
+        max_delay (float): Espera máxima entre tentativas (em segundos).
+        on_give_up (callable): Função chamada com cada item que esgotou as tentativas.
+    """
+
+    def __init__(self, max_attempts=RETRY_ATTEMPTS, base_delay=RETRY_BASE_DELAY, max_delay=RETRY_MAX_DELAY,
+                 on_give_up=None):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.on_give_up = on_give_up
+        self._pending = []
+        self._failed = []
+        self._recovered = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._pending)
+
+    def add(self, lesson, url, file_name, reason, mode="direct"):
+        """
+        Registra a primeira falha de um arquivo e agenda a nova tentativa.
+
+        Returns:
+            FailedDownload: Item registrado.
+        """
+        item = FailedDownload(lesson, url, file_name, reason, mode)
+        self._schedule(item)
+        return item
+
+    def fail(self, item, reason):
+        """
+        Registra mais uma falha de um item retirado da fila, agendando-o de novo ou
+        descartando-o se as tentativas se esgotaram.
+        """
+        item.attempts += 1
+        item.reason = reason
+        DOWNLOAD_RETRIES.inc(mode=item.mode, outcome="failed")
+        self._schedule(item)
+
+    def done(self, item):
+        """
+        Registra que um item retirado da fila foi baixado.
+        """
+        DOWNLOAD_RETRIES.inc(mode=item.mode, outcome="recovered")
+        logging.info(f"Arquivo recuperado na tentativa {item.attempts + 1}: {item.file_name}")
+        with self._lock:
+            self._recovered += 1
+
+    def _schedule(self, item):
+        with self._lock:
+            if item.attempts >= self.max_attempts:
+                self._failed.append(item)
+                logging.error(f"Download desistido após {item.attempts} tentativas: {item.file_name} - {item.reason}")
+                if self.on_give_up:
+                    self.on_give_up(item)
+                return
+            delay = backoff_delay(item.attempts, self.base_delay, self.max_delay)
+            item.next_attempt = time.monotonic() + delay
+            self._pending.append(item)
+        logging.warning(f"Falha no download de {item.file_name} ({item.reason}); "
+                        f"nova tentativa em {delay:.1f} s.")
+
+    def take(self, mode=None):
+        """
+        Retira da fila os itens cujo prazo de nova tentativa já chegou.
+
+        Args:
+            mode (str): Se informado, apenas os itens dessa forma de download são retirados.
+
+        Returns:
+            list: Itens prontos para uma nova tentativa.
+        """
+        now = time.monotonic()
+        with self._lock:
+            due = [item for item in self._pending
+                   if item.next_attempt <= now and (mode is None or item.mode == mode)]
+            self._pending = [item for item in self._pending if item not in due]
+        return due
+
+    def wait(self, cancel_event=None):
+        """
+        Aguarda até o prazo do próximo item da fila.
+
+        Returns:
+            bool: True se há itens à espera, False se a fila está vazia ou a espera foi cancelada.
+        """
+        with self._lock:
+            if not self._pending:
+                return False
+            delay = max(min(item.next_attempt for item in self._pending) - time.monotonic(), 0)
+        if cancel_event is None:
+            time.sleep(delay)
+            return True
+        return not cancel_event.wait(delay)
+
+    def summary(self):
+        """
+        Retorna os arquivos que não puderam ser recuperados.
+
+        Returns:
+            list: Lista de dicionários com aula, URL, nome do arquivo, motivo e tentativas.
+        """
+        with self._lock:
+            return [item.to_dict() for item in self._failed]
+
+    def log_summary(self):
+        """
+        Registra no log o resultado das novas tentativas e os arquivos irrecuperáveis.
+        """
+        failed = self.summary()
+        if self._recovered:
+            logging.info(f"{self._recovered} arquivos recuperados em novas tentativas.")
+        if not failed:
+            return
+        logging.warning(f"{len(failed)} arquivos não puderam ser baixados:")
+        for item in failed:
+            logging.warning(f"  {item['file']} ({item['lesson']}, {item['attempts']} tentativas): {item['reason']}")
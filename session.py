@@ -0,0 +1,95 @@
+import os
+import json
+import time
+import logging
+import tempfile
+
+# Arquivo padrão onde os cookies da sessão autenticada são guardados
+SESSION_FILE = os.path.join(os.getcwd(), ".session", "cookies.json")
+# Campos aceitos pelo comando Network.setCookies do Chrome DevTools Protocol
+COOKIE_FIELDS = ("name", "value", "domain", "path", "secure", "httpOnly", "sameSite", "expires")
+
+
+def save_session(driver, path=SESSION_FILE):
+    """
+    Salva os cookies de todos os domínios do navegador em disco.
+
+    O arquivo é gravado de forma atômica e com permissão restrita ao usuário,
+    pois contém credenciais de acesso.
+
+    Args:
+        driver (WebDriver): Instância do WebDriver já autenticada.
+        path (str): Caminho do arquivo de sessão.
+    """
+    cookies = driver.execute_cdp_cmd("Network.getAllCookies", {})["cookies"]
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    # Nome temporário único: várias threads do mesmo processo podem salvar a sessão ao mesmo tempo
+    fd, tmp_path = tempfile.mkstemp(prefix=f"{os.path.basename(path)}.", suffix=".tmp", dir=os.path.dirname(path))
+    try:
+        os.chmod(tmp_path, 0o600)
+        with open(fd, "w", encoding="utf-8") as f:
+            json.dump({"saved_at": time.time(), "cookies": cookies}, f)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+    logging.info(f"Sessão salva em: {path}")
+
+
+def load_session_cookies(path=SESSION_FILE):
+    """
+    Lê os cookies salvos, descartando os que já expiraram.
+
+    Args:
+        path (str): Caminho do arquivo de sessão.
+
+    Returns:
+        list: Cookies ainda válidos (vazia se não houver sessão salva).
+    """
+    try:
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return []
+    now = time.time()
+    return [
+        cookie for cookie in data.get("cookies", [])
+        if cookie.get("session") or cookie.get("expires", -1) <= 0 or cookie["expires"] > now
+    ]
+
+
+def restore_session(driver, path=SESSION_FILE):
+    """
+    Restaura no navegador os cookies de uma sessão salva anteriormente.
+
+    Os cookies são injetados via DevTools, sem necessidade de navegar até cada
+    domínio. A validade da sessão é confirmada ao abrir a página do curso: se o
+    formulário de login aparecer, o login é refeito normalmente.
+
+    Args:
+        driver (WebDriver): Instância do WebDriver.
+        path (str): Caminho do arquivo de sessão.
+
+    Returns:
+        bool: True se algum cookie válido foi restaurado.
+    """
+    cookies = load_session_cookies(path)
+    if not cookies:
+        logging.info("Nenhuma sessão salva válida encontrada.")
+        return False
+    params = []
+    for cookie in cookies:
+        param = {field: cookie[field] for field in COOKIE_FIELDS if field in cookie}
+        if cookie.get("session") or param.get("expires", -1) <= 0:
+            param.pop("expires", None)
+        params.append(param)
+    try:
+        driver.execute_cdp_cmd("Network.setCookies", {"cookies": params})
+    except Exception as e:
+        logging.warning(f"Erro ao restaurar a sessão salva: {e}")
+        return False
+    logging.info(f"{len(params)} cookies restaurados da sessão salva.")
+    return True
@@ -0,0 +1,44 @@
+import os
+import socket
+
+import pytest
+
+from fake_site import COURSE_API_PATH, PDF_PATH, VIDEO_PATH, FakeSite
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+# Os prefixos dos links e o URL da API são lidos do ambiente na importação de main.py, por isso
+# o servidor de teste usa uma porta fixa, definida antes de qualquer teste importar o projeto
+SITE_PORT = free_port()
+SITE_URL = f"http://127.0.0.1:{SITE_PORT}"
+os.environ.update(
+    ESTRATEGIA_API_HOST="127.0.0.1",
+    ESTRATEGIA_PDF_URL_PREFIX=f"{SITE_URL}{PDF_PATH}",
+    ESTRATEGIA_VIDEO_URL_PREFIX=f"{SITE_URL}{VIDEO_PATH}",
+    ESTRATEGIA_COURSE_API_URL=f"{SITE_URL}{COURSE_API_PATH}{{course_id}}",
+    ESTRATEGIA_RETRY_BASE_DELAY="0.01",
+    ESTRATEGIA_RETRY_MAX_DELAY="0.05",
+)
+
+
+@pytest.fixture
+def make_site():
+    """
+    Cria o servidor local de ``fake_site.py`` na porta configurada para os testes.
+    """
+    sites = []
+
+    def make(**options):
+        options.setdefault("require_login", False)
+        site = FakeSite(port=SITE_PORT, **options).start()
+        sites.append(site)
+        return site
+
+    yield make
+    for site in sites:
+        site.stop()
@@ -0,0 +1,45 @@
+import os
+import subprocess
+import sys
+import textwrap
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def run_script(tmp_path, code):
+    script = tmp_path / "script.py"
+    script.write_text(f"import sys\nsys.path.insert(0, {ROOT!r})\n" + textwrap.dedent(code))
+    return subprocess.run([sys.executable, str(script)], cwd=tmp_path, capture_output=True, text=True,
+                          timeout=120, check=True).stdout.splitlines()
+
+
+def test_importing_app_starts_no_threads_and_creates_no_files(tmp_path):
+    output = run_script(tmp_path, """
+        import os, threading
+        import app
+        print(threading.active_count(), len(os.listdir('.')))
+    """)
+    # Apenas o próprio script existe na pasta
+    assert output == ["1 1"]
+
+
+def test_pdfs_are_indexed_in_spawned_processes_from_a_script_that_imports_app(tmp_path):
+    pytest.importorskip("pypdf")
+    # Os processos do pool importam de novo este script, como fariam com o app.py
+    output = run_script(tmp_path, """
+        import os
+        import app
+        if __name__ == "__main__":
+            from pypdf import PdfWriter
+            os.makedirs(os.path.join(app.DOWNLOAD_DIR, "Curso"))
+            path = os.path.join(app.DOWNLOAD_DIR, "Curso", "Aula 1.pdf")
+            writer = PdfWriter()
+            writer.add_blank_page(100, 100)
+            writer.write(path)
+            print(app.pdf_indexer.submit(path).result()["pages"])
+            app.pdf_indexer.close()
+            print(*app.search_index.paths())
+    """)
+    assert output == ["1", "Curso/Aula 1.pdf"]
@@ -0,0 +1,88 @@
+import json
+import os
+import shutil
+import subprocess
+import threading
+import urllib.request
+
+import pytest
+
+import main
+
+# DOM mínimo em que o script de clique é executado: apenas os links das aulas expandidas existem
+# na página, e os cliques em links (inclusive nos criados pelo script) são registrados
+DOM_SHIM = """
+const [rendered, args] = JSON.parse(require('fs').readFileSync(0, 'utf8'));
+const clicked = [];
+const anchors = [];
+const anchor = (href) => ({
+    href, style: {},
+    click() { clicked.push(this.href); },
+    remove() { anchors.splice(anchors.indexOf(this), 1); },
+});
+rendered.forEach((href) => anchors.push(anchor(href)));
+const document = {
+    querySelectorAll: (selector) => selector === 'a[href]' ? anchors.filter((a) => a.href) : [],
+    createElement: () => anchor(''),
+    body: {appendChild: (element) => anchors.push(element)},
+};
+const result = (function () { %s }).apply(null, args);
+console.log(JSON.stringify({result, clicked}));
+"""
+
+
+class FakeBrowser:
+    """
+    WebDriver simulado: executa o script de clique no DOM mínimo e baixa os links clicados
+    como o Chrome, gravando ``.crdownload`` e renomeando o arquivo ao terminar.
+    """
+
+    def __init__(self, site, rendered=()):
+        self.current_url = site.course_url
+        self.rendered = list(rendered)
+        self.download_dir = None
+        self.clicked = []
+
+    def get_cookies(self):
+        return []
+
+    def execute_cdp_cmd(self, command, params):
+        if command == "Browser.setDownloadBehavior":
+            self.download_dir = params["downloadPath"]
+        return {}
+
+    def find_elements(self, *args):
+        return []
+
+    def execute_script(self, script, *args):
+        if script != main.CLICK_LINK_SCRIPT:
+            return "pytest"
+        output = subprocess.run(["node", "-e", DOM_SHIM % script], input=json.dumps([self.rendered, args]),
+                                capture_output=True, text=True, check=True).stdout
+        page = json.loads(output)
+        for url in page["clicked"]:
+            self.clicked.append(url)
+            threading.Thread(target=self._download, args=(url,), daemon=True).start()
+        return page["result"]
+
+    def _download(self, url):
+        name = os.path.join(self.download_dir, url.rstrip("/").rsplit("/", 1)[-1] + ".pdf")
+        with urllib.request.urlopen(url) as response, open(name + ".crdownload", "wb") as f:
+            shutil.copyfileobj(response, f)
+        os.rename(name + ".crdownload", name)
+
+
+@pytest.mark.skipif(shutil.which("node") is None, reason="node não está instalado")
+def test_browser_mode_downloads_lessons_listed_by_api(make_site, tmp_path, monkeypatch):
+    site = make_site(lessons=3, files_per_lesson=1, pdf_size=20_000)
+    # Nenhuma aula expandida: com a lista da API, os links não existem na página
+    browser = FakeBrowser(site)
+    monkeypatch.setattr(main, "get_course_name", lambda driver: "Curso")
+
+    result = main.process_course(browser, site.course_url, str(tmp_path))
+
+    assert result["failed"] == []
+    assert site.stats["api_requests"] == 1
+    assert sorted(browser.clicked) == [f"{site.pdf_url_prefix}{n}" for n in (1, 2, 3)]
+    files = sorted(os.listdir(result["dir"]))
+    assert len(files) == 3 and all(name.endswith(".pdf") for name in files)
@@ -0,0 +1,15 @@
+from catalog import FileCatalog
+
+TEMPORARY_NAMES = ["Aula 2.pdf.crdownload", "video.mp4.part", "video.mp4.part.json", "video.mp4.part.json.tmp",
+                   "Aula 3.pdf.link", ".com.google.Chrome.abc123"]
+
+
+def test_temporary_download_files_are_not_listed(tmp_path):
+    course = tmp_path / "Curso"
+    course.mkdir()
+    for name in ["Aula 1.pdf"] + TEMPORARY_NAMES:
+        (course / name).write_bytes(b"x")
+
+    items = FileCatalog(str(tmp_path)).query()["items"]
+
+    assert [item["name"] for item in items] == ["Aula 1.pdf"]
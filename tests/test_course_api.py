@@ -0,0 +1,20 @@
+import pytest
+
+from course_api import CourseApiError, parse_course_lessons
+
+ASSET_TYPES = [["pdf", "https://api.example/pdf/"]]
+
+
+def course(**fields):
+    return {"data": {"aulas": [dict({"nome": "Aula 00", "conteudo": "Introdução"}, **fields)]}}
+
+
+def test_parse_course_lessons_builds_urls_from_ids():
+    lessons = parse_course_lessons(course(pdfs=[{"id": 7}]), ASSET_TYPES)
+    assert lessons[0]["assets"] == [{"url": "https://api.example/pdf/7", "kind": "pdf"}]
+
+
+def test_parse_course_lessons_rejects_response_without_requested_assets():
+    # Um campo renomeado deixaria todas as aulas sem arquivos; sem erro, a página não seria usada como reserva
+    with pytest.raises(CourseApiError):
+        parse_course_lessons(course(arquivos_pdf=[{"id": 7}]), ASSET_TYPES)
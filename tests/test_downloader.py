@@ -0,0 +1,23 @@
+import json
+import os
+
+import pytest
+
+from downloader import SegmentedDownload
+
+
+def test_segmented_download_rejects_checkpoint_that_does_not_cover_the_file(tmp_path):
+    dest = str(tmp_path / "video.mp4")
+    size = 1000
+    with open(dest + ".part", "wb") as f:
+        f.truncate(size)
+    # Ponto de retomada que dá como concluída apenas a primeira metade do arquivo
+    with open(dest + ".part.json", "w", encoding="utf-8") as f:
+        json.dump({"url": "http://host/video", "size": size, "validator": None, "ranges": [[0, 499, 500]]}, f)
+    download = SegmentedDownload(None, "http://host/video", dest, {}, size)
+
+    with pytest.raises(RuntimeError, match="500 bytes"):
+        download.run()
+
+    assert not os.path.exists(dest)
+    assert not os.path.exists(dest + ".part.json")
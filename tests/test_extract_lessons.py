@@ -0,0 +1,60 @@
+import json
+import shutil
+import subprocess
+
+import pytest
+
+import main
+
+# Lista de aulas em acordeão: abrir uma aula fecha as demais, e os botões de download de cada
+# aula só são renderizados um pouco depois do clique no cabeçalho
+ACCORDION_SHIM = """
+const [lessons, args] = JSON.parse(require('fs').readFileSync(0, 'utf8'));
+const element = (props) => Object.assign({querySelector: () => null, querySelectorAll: () => []}, props);
+const items = lessons.map(([title, urls]) => {
+    const item = {open: false, buttons: []};
+    const header = element({click() {
+        items.forEach((other) => { other.open = false; other.buttons = []; });
+        item.open = true;
+        setTimeout(() => {
+            if (item.open) item.buttons = urls.map((href) => element({href}));
+        }, 30);
+    }});
+    item.querySelector = (selector) => ({
+        '.LessonButton': item.buttons[0] || null,
+        '.Collapse-header': header,
+        'h2': element({innerText: title}),
+    })[selector] || null;
+    item.querySelectorAll = (selector) => selector === 'a[href]' ? item.buttons : [];
+    return item;
+});
+const document = {querySelectorAll: (selector) => selector === '.LessonList-item' ? items : []};
+(function () { %s }).apply(null, [...args, (result) => console.log(JSON.stringify(result))]);
+"""
+
+
+class AccordionDriver:
+    def __init__(self, lessons):
+        self.lessons = lessons
+        self.calls = 0
+
+    def set_script_timeout(self, seconds):
+        pass
+
+    def execute_async_script(self, script, *args):
+        self.calls += 1
+        output = subprocess.run(["node", "-e", ACCORDION_SHIM % script], input=json.dumps([self.lessons, args]),
+                                capture_output=True, text=True, check=True).stdout
+        return json.loads(output)
+
+
+@pytest.mark.skipif(shutil.which("node") is None, reason="node não está instalado")
+def test_lessons_in_accordion_are_expanded_one_at_a_time():
+    prefix = main.ASSET_TYPES["pdf"]["prefix"]
+    lessons = [[f"Aula {n}", [f"{prefix}{n}"]] for n in (1, 2, 3)]
+    driver = AccordionDriver(lessons)
+
+    manifest = main.extract_lessons_manifest(driver, timeout=0.3, asset_types=("pdf",))
+
+    assert driver.calls == 2
+    assert [lesson["urls"] for lesson in manifest] == [[f"{prefix}{n}"] for n in (1, 2, 3)]
@@ -0,0 +1,15 @@
+import pytest
+
+from jobs import CANCELLED, JobQueueFull, JobScheduler
+
+
+def test_cancelled_queued_job_frees_its_queue_slot(tmp_path):
+    scheduler = JobScheduler(lambda job: None, str(tmp_path), max_workers=0, max_queue=2)
+    first = scheduler.submit(url="a")
+    scheduler.submit(url="b")
+    with pytest.raises(JobQueueFull):
+        scheduler.submit(url="c")
+
+    assert scheduler.cancel(first.id)
+    assert first.status == CANCELLED
+    scheduler.submit(url="d")
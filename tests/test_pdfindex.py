@@ -0,0 +1,36 @@
+import os
+
+from catalog import FileCatalog
+from pdfindex import SearchIndex
+
+
+def test_files_removed_from_library_leave_the_search_index(tmp_path):
+    library = tmp_path / "downloads"
+    (library / "Curso").mkdir(parents=True)
+    pdf = library / "Curso" / "Aula 1.pdf"
+    pdf.write_bytes(b"%PDF-1.4\n%%EOF\n")
+    index = SearchIndex(str(library), str(tmp_path / "search.db"))
+    index.add(str(pdf), {"pages": 1, "texts": [(1, "direito constitucional")], "error": None})
+    catalog = FileCatalog(str(library), on_removed=index.remove)
+    catalog.refresh(force=True)
+    assert index.search("constitucional")
+
+    os.remove(pdf)
+    catalog.refresh(force=True)
+
+    assert index.search("constitucional") == []
+    assert index.paths() == []
+
+
+def test_search_snippets_escape_the_pdf_text(tmp_path):
+    pdf = tmp_path / "Curso" / "Aula 1.pdf"
+    pdf.parent.mkdir()
+    pdf.write_bytes(b"%PDF-1.4\n%%EOF\n")
+    index = SearchIndex(str(tmp_path), str(tmp_path / "search.db"))
+    text = 'prazo <img src=x onerror="alert(1)"> recursal \x02 & outros'
+    index.add(str(pdf), {"pages": 1, "texts": [(1, text)], "error": None})
+
+    [result] = index.search("recursal")
+
+    assert result["snippet"] == ("prazo &lt;img src=x onerror=&quot;alert(1)&quot;&gt; <mark>recursal</mark>"
+                                 "  &amp; outros")
@@ -0,0 +1,20 @@
+from main import give_up_hook
+from progress import ProgressTracker
+from retries import RetryQueue
+
+
+def test_files_given_up_count_towards_progress_and_eta():
+    snapshots = []
+    progress = ProgressTracker(snapshots.append, min_interval=0)
+    progress.start(1, 2)
+    retry_queue = RetryQueue(max_attempts=2, base_delay=0, max_delay=0, on_give_up=give_up_hook(progress))
+
+    progress.file_done("Aula 1.pdf", 100)
+    item = retry_queue.add("Aula 2", "http://host/2", "Aula 2.pdf", "HTTP 500")
+    assert progress.snapshot()["files_failed"] == 0
+    retry_queue.take()
+    retry_queue.fail(item, "HTTP 500")
+
+    snapshot = progress.snapshot()
+    assert (snapshot["files_done"], snapshot["files_failed"], snapshot["files_total"]) == (1, 1, 2)
+    assert snapshot["eta"] == 0
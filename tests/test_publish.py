@@ -0,0 +1,27 @@
+import os
+import shutil
+
+import pytest
+
+import main
+from test_browser_download import FakeBrowser
+
+
+@pytest.mark.parametrize("direct_download", [True, False])
+def test_finished_files_can_be_moved_out_as_they_land(make_site, tmp_path, monkeypatch, direct_download):
+    if not direct_download and shutil.which("node") is None:
+        pytest.skip("node não está instalado")
+    site = make_site(lessons=2, files_per_lesson=2, pdf_size=20_000)
+    monkeypatch.setattr(main, "get_course_name", lambda driver: "Curso")
+    published = tmp_path / "published"
+    published.mkdir()
+
+    def publish(path):
+        os.replace(path, published / os.path.basename(path))
+
+    result = main.process_course(FakeBrowser(site), site.course_url, str(tmp_path / "work"),
+                                 direct_download=direct_download, on_file=publish)
+
+    assert result["failed"] == []
+    assert len(os.listdir(published)) == 4
+    assert os.listdir(result["dir"]) == []
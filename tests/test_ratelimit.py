@@ -0,0 +1,62 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from downloader import create_http_pool
+from ratelimit import RateLimiter, RequestCancelled
+
+
+@pytest.fixture
+def throttling_server():
+    """
+    Servidor que responde 429 com Retry-After às duas primeiras requisições e 200 às seguintes.
+    """
+    hits = []
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format, *args):
+            pass
+
+        def do_GET(self):
+            hits.append(self.path)
+            status, body = (429, b"") if len(hits) <= 2 else (200, b"ok")
+            self.send_response(status)
+            self.send_header("Retry-After", "0")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}/arquivo", hits
+    server.shutdown()
+    server.server_close()
+
+
+def test_throttled_responses_reach_the_limiter(throttling_server):
+    url, hits = throttling_server
+    limiter = RateLimiter()
+    with limiter.request(create_http_pool(1), "GET", url) as response:
+        assert response.status == 200
+    stats = limiter.stats()["127.0.0.1"]
+    # O urllib3 não repete as respostas 429 por conta própria: cada uma é vista e contada pelo limitador
+    assert len(hits) == 3
+    assert stats["requests"] == 3
+    assert stats["throttled"] == 2
+
+
+def test_cancelled_wait_for_a_token_frees_the_window_slot():
+    limiter = RateLimiter(rate=0.5)
+    host = limiter.host("http://api.example/arquivo")
+    # Esvazia o balde, de modo que a próxima requisição espere por uma ficha
+    host.bucket.acquire()
+    host.bucket.acquire()
+    cancel_event = threading.Event()
+    threading.Timer(0.1, cancel_event.set).start()
+    with pytest.raises(RequestCancelled):
+        with limiter.request(None, "GET", "http://api.example/arquivo", cancel_event):
+            pass
+    assert host.stats()["in_flight"] == 0
@@ -0,0 +1,33 @@
+import os
+import stat
+import threading
+
+import session
+
+
+class Driver:
+    def execute_cdp_cmd(self, command, params):
+        return {"cookies": [{"name": "sid", "value": "x" * 50_000, "expires": -1}]}
+
+
+def test_concurrent_saves_leave_one_private_session_file(tmp_path):
+    path = str(tmp_path / ".session" / "cookies.json")
+    errors = []
+
+    def save():
+        try:
+            for _ in range(20):
+                session.save_session(Driver(), path)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=save) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert os.listdir(os.path.dirname(path)) == ["cookies.json"]
+    assert stat.S_IMODE(os.stat(path).st_mode) == 0o600
+    assert len(session.load_session_cookies(path)) == 1
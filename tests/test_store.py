@@ -0,0 +1,36 @@
+import os
+
+import main
+from blobstore import BlobStore
+from manifest import Manifest
+
+
+class Driver:
+    def __init__(self, site):
+        self.current_url = site.course_url
+
+    def get_cookies(self):
+        return []
+
+    def execute_script(self, script, *args):
+        return "pytest"
+
+    def execute_cdp_cmd(self, command, params):
+        return {}
+
+
+def test_known_content_is_linked_when_course_is_synced_into_new_dir(make_site, tmp_path, monkeypatch):
+    site = make_site(lessons=2, files_per_lesson=2, pdf_size=20_000)
+    monkeypatch.setattr(main, "get_course_name", lambda driver: "Curso")
+    manifest = Manifest(str(tmp_path / "manifest.db"))
+    store = BlobStore(str(tmp_path / "blobs"))
+    main.process_course(Driver(site), site.course_url, str(tmp_path / "a"), direct_download=True,
+                        manifest=manifest, store=store)
+    before = site.stats["file_requests"]
+
+    result = main.process_course(Driver(site), site.course_url, str(tmp_path / "b"), direct_download=True,
+                                 manifest=manifest, store=store)
+
+    assert result["failed"] == []
+    assert site.stats["file_requests"] == before
+    assert len(os.listdir(result["dir"])) == 4
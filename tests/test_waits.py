@@ -0,0 +1,24 @@
+import pytest
+from selenium.common.exceptions import TimeoutException
+
+from waits import AdaptiveWait
+
+
+def test_fast_sample_does_not_shrink_timeout_below_fraction_of_default():
+    policy = AdaptiveWait()
+    policy.record("login_submit", 1.0)
+    assert policy.timeout_for("login_submit", 30) == pytest.approx(30 * policy.default_fraction)
+
+
+def test_expired_wait_doubles_next_timeout():
+    policy = AdaptiveWait(max_timeout=30)
+    for _ in range(5):
+        policy.record("lessons_page", 0.01)
+    timeout = policy.timeout_for("lessons_page", 8)
+
+    class Driver:
+        pass
+
+    with pytest.raises(TimeoutException):
+        policy.until(Driver(), lambda driver: False, "lessons_page", timeout=8)
+    assert policy.timeout_for("lessons_page", 8) == pytest.approx(2 * timeout)
@@ -0,0 +1,80 @@
+import os
+import time
+
+import pytest
+
+from watcher import DownloadWatcher, load_inotify
+
+MODES = [pytest.param(False, id="poll"),
+         pytest.param(True, id="inotify", marks=pytest.mark.skipif(load_inotify() is None, reason="sem inotify"))]
+
+
+def chrome_download(download_dir, name, data=b"%PDF-1.4\n%%EOF\n"):
+    """
+    Grava um arquivo como o Chrome: primeiro em ``.crdownload``, depois renomeado para o nome final.
+    """
+    temp_path = os.path.join(download_dir, name + ".crdownload")
+    with open(temp_path, "wb") as f:
+        f.write(data)
+    time.sleep(0.05)
+    os.rename(temp_path, os.path.join(download_dir, name))
+
+
+@pytest.mark.parametrize("use_inotify", MODES)
+def test_http_download_files_are_not_bound_to_browser_tickets(tmp_path, use_inotify):
+    with DownloadWatcher(str(tmp_path), poll_interval=0.05, use_inotify=use_inotify) as watcher:
+        ticket = watcher.expect()
+        watcher.ignore("Aula 1.mp4")
+        # Download HTTP na mesma pasta: temporário, ponto de retomada e arquivo final
+        (tmp_path / "Aula 1.mp4.part").write_bytes(b"x" * 10)
+        (tmp_path / "Aula 1.mp4.part.json.tmp").write_text("{}")
+        os.replace(tmp_path / "Aula 1.mp4.part.json.tmp", tmp_path / "Aula 1.mp4.part.json")
+        time.sleep(0.2)
+        os.replace(tmp_path / "Aula 1.mp4.part", tmp_path / "Aula 1.mp4")
+        time.sleep(0.2)
+        assert ticket.path is None
+
+        chrome_download(str(tmp_path), "arquivo.pdf")
+        assert ticket.wait(2) == str(tmp_path / "arquivo.pdf")
+
+
+@pytest.mark.parametrize("use_inotify", MODES)
+def test_renamed_download_is_not_bound_to_the_next_ticket(tmp_path, use_inotify):
+    with DownloadWatcher(str(tmp_path), poll_interval=0.05, use_inotify=use_inotify) as watcher:
+        first = watcher.expect()
+        chrome_download(str(tmp_path), "a.pdf")
+        path = first.wait(2)
+        assert path == str(tmp_path / "a.pdf")
+        second = watcher.expect(timeout=1)
+        # Renomeação feita por rename_downloaded_file enquanto o segundo download ainda não começou
+        os.rename(path, tmp_path / "Aula 1.pdf")
+        time.sleep(0.3)
+        assert second.path is None
+
+        chrome_download(str(tmp_path), "b.pdf")
+        assert second.wait(2) == str(tmp_path / "b.pdf")
+
+
+@pytest.mark.parametrize("use_inotify", MODES)
+def test_click_without_download_does_not_shift_later_files(tmp_path, use_inotify):
+    with DownloadWatcher(str(tmp_path), poll_interval=0.05, use_inotify=use_inotify) as watcher:
+        # O primeiro clique não inicia nenhum download (por exemplo, abriu o modal de pesquisa)
+        first = watcher.expect()
+        second = watcher.expect(timeout=0.3)
+        assert first.error is not None
+
+        chrome_download(str(tmp_path), "b.pdf")
+        assert second.wait(2) == str(tmp_path / "b.pdf")
+        assert first.path is None
+
+
+@pytest.mark.parametrize("use_inotify", MODES)
+def test_tickets_with_expected_name_get_their_own_file(tmp_path, use_inotify):
+    (tmp_path / "a.pdf").write_bytes(b"old")
+    with DownloadWatcher(str(tmp_path), poll_interval=0.05, use_inotify=use_inotify) as watcher:
+        first, second = watcher.expect("a.pdf"), watcher.expect("b.pdf")
+        chrome_download(str(tmp_path), "b.pdf")
+        # Nome já existente na pasta: o Chrome grava o arquivo como "a (1).pdf"
+        chrome_download(str(tmp_path), "a (1).pdf")
+        assert second.wait(2) == str(tmp_path / "b.pdf")
+        assert first.wait(2) == str(tmp_path / "a (1).pdf")
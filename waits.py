@@ -0,0 +1,115 @@
+import time
+import logging
+import threading
+from selenium.common.exceptions import TimeoutException
+from selenium.webdriver.support.ui import WebDriverWait
+
+
+class AdaptiveWait:
+    """
+    Espera explícita por condições do DOM com tempos limite adaptativos.
+
+    Para cada tipo de espera (``key``) é mantida uma média suavizada da latência
+    observada e da sua variação, no mesmo esquema usado pelo TCP para estimar o
+    tempo de retransmissão. O tempo limite da próxima espera é ``média + 4 × variação``,
+    limitado a ``[min_timeout, max_timeout]``, de forma que páginas rápidas não
+    paguem pelos tempos limite folgados necessários em páginas lentas.
+
+    Para que poucas medições rápidas não deixem o limite curto demais, ele nunca fica
+    abaixo de ``default_fraction`` do tempo padrão informado por quem espera, e cada
+    espera esgotada dobra o limite seguinte, como o recuo do TCP após uma retransmissão.
+    """
+
+    def __init__(self, min_timeout=2, max_timeout=30, poll_frequency=0.1, default_fraction=0.25):
+        self.min_timeout = min_timeout
+        self.max_timeout = max_timeout
+        self.default_fraction = default_fraction
+        self.poll_frequency = poll_frequency
+        self._stats = {}
+        self._lock = threading.Lock()
+
+    def timeout_for(self, key, default=None):
+        """
+        Calcula o tempo limite para um tipo de espera a partir das latências observadas.
+
+        Args:
+            key (str): Identificador do tipo de espera.
+            default (float): Tempo limite usado enquanto não houver medições.
+
+        Returns:
+            float: Tempo limite em segundos.
+        """
+        with self._lock:
+            stats = self._stats.get(key)
+        if stats is None:
+            return default if default is not None else self.max_timeout
+        mean, deviation = stats
+        floor = max(self.min_timeout, (default or 0) * self.default_fraction)
+        return min(max(mean + 4 * deviation, floor), self.max_timeout)
+
+    def record(self, key, elapsed):
+        """
+        Registra a latência observada para um tipo de espera.
+
+        Args:
+            key (str): Identificador do tipo de espera.
+            elapsed (float): Tempo decorrido até a condição ser satisfeita (em segundos).
+        """
+        with self._lock:
+            stats = self._stats.get(key)
+            if stats is None:
+                self._stats[key] = (elapsed, elapsed / 2)
+            else:
+                mean, deviation = stats
+                deviation = 0.75 * deviation + 0.25 * abs(mean - elapsed)
+                mean = 0.875 * mean + 0.125 * elapsed
+                self._stats[key] = (mean, deviation)
+
+    def record_timeout(self, key, timeout):
+        """
+        Registra uma espera que esgotou o tempo limite, dobrando o limite seguinte.
+
+        A latência real é de pelo menos ``timeout``; a estimativa passa a ter essa média
+        e uma variação que resulta em ``2 × timeout`` na próxima espera.
+
+        Args:
+            key (str): Identificador do tipo de espera.
+            timeout (float): Tempo limite que se esgotou (em segundos).
+        """
+        with self._lock:
+            mean, deviation = self._stats.get(key, (0.0, 0.0))
+            self._stats[key] = (max(mean, timeout), max(deviation, timeout / 4))
+
+    def until(self, driver, condition, key, timeout=None, message=""):
+        """
+        Aguarda até que a condição seja satisfeita, registrando a latência observada.
+
+        Args:
+            driver (WebDriver | WebElement): Contexto onde a condição é avaliada.
+            condition (callable): Condição no formato de ``expected_conditions``.
+            key (str): Identificador do tipo de espera.
+            timeout (float): Tempo limite usado enquanto não houver medições.
+            message (str): Mensagem da exceção de tempo esgotado.
+
+        Returns:
+            object: Valor retornado pela condição.
+
+        Raises:
+            TimeoutException: Se a condição não for satisfeita dentro do tempo limite.
+        """
+        wait_timeout = self.timeout_for(key, timeout)
+        start = time.monotonic()
+        try:
+            result = WebDriverWait(driver, wait_timeout, poll_frequency=self.poll_frequency).until(condition, message)
+        except TimeoutException:
+            self.record_timeout(key, wait_timeout)
+            logging.debug(f"Espera '{key}' esgotada em {wait_timeout:.2f}s; o próximo limite será maior")
+            raise
+        elapsed = time.monotonic() - start
+        self.record(key, elapsed)
+        logging.debug(f"Espera '{key}' concluída em {elapsed:.2f}s (limite {wait_timeout:.2f}s)")
+        return result
+
+
+# Política de espera compartilhada por todo o fluxo de download
+wait_policy = AdaptiveWait()
@@ -0,0 +1,426 @@
+import os
+import re
+import time
+import select
+import struct
+import logging
+import threading
+import ctypes
+import ctypes.util
+from collections import deque
+
+# Máscaras de eventos do inotify (ver <sys/inotify.h>)
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_NONBLOCK = os.O_NONBLOCK
+IN_CLOEXEC = 0o2000000
+EVENT_HEADER = struct.Struct("iIII")
+# Sufixo " (1)", " (2)"... que o Chrome acrescenta ao nome quando já existe um arquivo com o mesmo nome
+CHROME_DUPLICATE_SUFFIX = re.compile(r" \(\d+\)(?=\.[^.]*$|$)")
+# Temporários do Chrome: downloads em andamento e arquivos ainda sem o nome definitivo
+BROWSER_TEMPORARY_SUFFIX = ".crdownload"
+BROWSER_TEMPORARY_PREFIX = ".com.google.Chrome"
+# Arquivos auxiliares gravados pelo próprio script na pasta do curso: downloads HTTP em andamento,
+# pontos de retomada dos downloads segmentados (e sua gravação atômica) e vínculos do armazenamento
+# por conteúdo. Esta é a única lista desses nomes; o catálogo e a interface web a usam por
+# meio de ``is_partial_file``
+OWN_TEMPORARY_SUFFIXES = (".part", ".part.json", ".part.json.tmp", ".link")
+
+
+def is_temporary_file(name):
+    """
+    Indica se o arquivo é um download ainda em andamento no Chrome.
+
+    Args:
+        name (str): Nome do arquivo.
+
+    Returns:
+        bool: True se o arquivo é temporário.
+    """
+    return name.endswith(BROWSER_TEMPORARY_SUFFIX) or name.startswith(BROWSER_TEMPORARY_PREFIX)
+
+
+def is_own_temporary_file(name):
+    """
+    Indica se o arquivo é um temporário gravado pelo próprio script, e não pelo navegador.
+
+    Args:
+        name (str): Nome do arquivo.
+
+    Returns:
+        bool: True se o arquivo é um download HTTP em andamento, um ponto de retomada ou um vínculo em criação.
+    """
+    return name.endswith(OWN_TEMPORARY_SUFFIXES)
+
+
+def is_partial_file(name):
+    """
+    Indica se o arquivo é um temporário de download, do navegador ou do script, que não deve
+    ser listado nem servido.
+
+    Args:
+        name (str): Nome do arquivo.
+
+    Returns:
+        bool: True se o arquivo não é um download concluído.
+    """
+    return is_temporary_file(name) or is_own_temporary_file(name)
+
+
+def download_base_name(name):
+    """
+    Retorna o nome que o Chrome deu ao arquivo, sem ``.crdownload`` e sem o sufixo de duplicata.
+
+    Args:
+        name (str): Nome do arquivo, temporário ou final.
+
+    Returns:
+        str: Nome do arquivo como enviado pelo servidor.
+    """
+    if name.endswith(BROWSER_TEMPORARY_SUFFIX):
+        name = name[:-len(BROWSER_TEMPORARY_SUFFIX)]
+    return CHROME_DUPLICATE_SUFFIX.sub("", name, count=1)
+
+
+def load_inotify():
+    """
+    Carrega as funções do inotify da libc, se disponíveis.
+
+    Returns:
+        ctypes.CDLL | None: Biblioteca C com suporte a inotify ou None.
+    """
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        libc.inotify_init1
+        libc.inotify_add_watch
+        return libc
+    except (OSError, AttributeError):
+        return None
+
+
+class DownloadTicket:
+    """
+    Representa um download iniciado e o arquivo que ele produziu.
+
+    Args:
+        name (str): Nome esperado do arquivo, quando conhecido antes do clique.
+    """
+
+    def __init__(self, name=None):
+        self._event = threading.Event()
+        self.name = name
+        self.path = None
+        self.error = None
+        self.created_at = time.monotonic()
+        self.completed_at = None
+
+    def complete(self, path):
+        self.path = path
+        self.completed_at = time.monotonic()
+        self._event.set()
+
+    def fail(self, error):
+        self.error = error
+        self._event.set()
+
+    def wait(self, timeout=None):
+        """
+        Aguarda a conclusão do download.
+
+        Args:
+            timeout (float): Tempo máximo de espera (em segundos).
+
+        Returns:
+            str | None: Caminho do arquivo concluído ou None se o download falhou ou expirou.
+        """
+        self._event.wait(timeout)
+        return self.path
+
+
+class DownloadWatcher:
+    """
+    Observa o diretório de downloads e associa cada download iniciado ao arquivo que ele gera.
+
+    Usa inotify quando disponível e recorre a varreduras periódicas do diretório caso
+    contrário. Cada chamada a ``expect`` devolve um ``DownloadTicket``, e o ticket é
+    concluído assim que o Chrome renomeia o arquivo temporário para o nome final.
+
+    Os tickets com nome esperado são associados apenas ao arquivo com esse nome. Os
+    demais não têm como ser distinguidos entre si, por isso só pode haver um deles sem
+    arquivo associado por vez: ``expect`` aguarda até que o download anterior comece,
+    de modo que um clique que não gerou download não desloque os arquivos seguintes
+    para os tickets errados.
+
+    Os arquivos que o próprio script grava no diretório (downloads HTTP, vínculos do
+    armazenamento e seus temporários) nunca são associados aos tickets; os nomes finais
+    desses arquivos devem ser informados antes com ``ignore``.
+    """
+
+    def __init__(self, download_dir, poll_interval=0.25, use_inotify=True):
+        self.download_dir = download_dir
+        self.poll_interval = poll_interval
+        self._libc = load_inotify() if use_inotify else None
+        self._lock = threading.Lock()
+        self._started = threading.Condition(self._lock)
+        self._pending = deque()
+        self._named = {}
+        self._by_name = {}
+        self._claimed = set()
+        self._stop = threading.Event()
+        self._thread = None
+        self._fd = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+
+    def start(self):
+        """
+        Inicia a observação do diretório em uma thread separada.
+        """
+        self._known = self._list_dir()
+        target = self._poll_loop
+        if self._libc is not None:
+            fd = self._libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+            mask = IN_CREATE | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_DELETE
+            if fd >= 0 and self._libc.inotify_add_watch(fd, os.fsencode(self.download_dir), mask) >= 0:
+                self._fd = fd
+                target = self._inotify_loop
+            else:
+                if fd >= 0:
+                    os.close(fd)
+                logging.warning("inotify indisponível, usando varredura periódica do diretório.")
+        self._thread = threading.Thread(target=target, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """
+        Encerra a observação e libera os recursos.
+        """
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+        with self._lock:
+            for ticket in list(self._pending) + list(self._named.values()):
+                ticket.fail("Observador encerrado.")
+            self._pending.clear()
+            self._named.clear()
+            self._started.notify_all()
+
+    def expect(self, name=None, timeout=None):
+        """
+        Registra um download prestes a ser iniciado.
+
+        Sem ``name``, aguarda antes que o download anterior sem nome tenha gerado um arquivo.
+        Se isso não acontecer em ``timeout`` segundos, o ticket anterior falha, pois o clique
+        correspondente não iniciou nenhum download.
+
+        Args:
+            name (str): Nome esperado do arquivo, se conhecido.
+            timeout (float): Tempo máximo de espera pelo início do download anterior (em segundos).
+
+        Returns:
+            DownloadTicket: Ticket que será concluído com o arquivo gerado pelo download.
+        """
+        ticket = DownloadTicket(name)
+        with self._lock:
+            if name is not None:
+                self._named[name] = ticket
+                return ticket
+            if not self._started.wait_for(lambda: not self._pending, timeout):
+                for stale in self._pending:
+                    stale.fail("Nenhum download foi iniciado pelo clique.")
+                self._pending.clear()
+            self._pending.append(ticket)
+        return ticket
+
+    def cancel(self, ticket):
+        """
+        Descarta um ticket que não será mais aguardado, para que ele não capture downloads futuros.
+
+        Args:
+            ticket (DownloadTicket): Ticket a ser descartado.
+        """
+        with self._lock:
+            if ticket in self._pending:
+                self._pending.remove(ticket)
+                self._started.notify_all()
+            if self._named.get(ticket.name) is ticket:
+                del self._named[ticket.name]
+            for name, owner in list(self._by_name.items()):
+                if owner is ticket:
+                    del self._by_name[name]
+
+    def ignore(self, name):
+        """
+        Registra um arquivo que o próprio script vai criar no diretório, para que ele não seja
+        confundido com um download do navegador.
+
+        Args:
+            name (str): Nome do arquivo, sem o diretório.
+        """
+        with self._lock:
+            self._claimed.add(name)
+
+    def _is_owned(self, name):
+        return name in self._claimed or is_own_temporary_file(name)
+
+    def _bind(self, name, target=None):
+        """
+        Associa um arquivo a um ticket: ao ticket que espera esse nome ou, se nenhum espera,
+        ao download sem nome pendente. ``target`` é o nome pelo qual o arquivo é comparado,
+        quando difere de ``name`` (temporários do Chrome que ainda não têm o nome do arquivo).
+        """
+        ticket = self._by_name.get(name)
+        if ticket is not None:
+            return ticket
+        target = target or name
+        # Os temporários ".com.google.Chrome.*" não trazem o nome do arquivo: enquanto houver tickets
+        # com nome esperado, a associação fica para quando o arquivo for renomeado
+        nameless = target.startswith(BROWSER_TEMPORARY_PREFIX)
+        if not nameless:
+            ticket = self._named.pop(download_base_name(target), None)
+        if ticket is None and self._pending and not (nameless and self._named):
+            ticket = self._pending.popleft()
+            self._started.notify_all()
+        if ticket is not None:
+            self._by_name[name] = ticket
+        return ticket
+
+    def _finish(self, ticket, name):
+        self._claimed.add(name)
+        ticket.complete(os.path.join(self.download_dir, name))
+
+    def _on_created(self, name):
+        with self._lock:
+            if is_temporary_file(name):
+                self._bind(name)
+
+    def _on_closed(self, name):
+        with self._lock:
+            if is_temporary_file(name) or self._is_owned(name):
+                return
+            # Arquivo gravado diretamente com o nome final, sem passar por .crdownload
+            ticket = self._bind(name)
+            if ticket is not None:
+                del self._by_name[name]
+                self._finish(ticket, name)
+
+    def _on_moved(self, old_name, new_name):
+        with self._lock:
+            if self._is_owned(old_name):
+                # Arquivo do script renomeado (download HTTP concluído, vínculo criado, arquivo já renomeado)
+                self._claimed.add(new_name)
+                return
+            ticket = self._by_name.pop(old_name, None)
+            if ticket is None:
+                if not is_temporary_file(old_name):
+                    return
+                ticket = self._bind(old_name, new_name)
+                self._by_name.pop(old_name, None)
+                if ticket is None:
+                    return
+            if is_temporary_file(new_name):
+                self._by_name[new_name] = ticket
+            else:
+                self._finish(ticket, new_name)
+
+    def _on_deleted(self, name):
+        with self._lock:
+            ticket = self._by_name.pop(name, None)
+        if ticket is not None:
+            ticket.fail(f"Download cancelado: {name}")
+
+    def _inotify_loop(self):
+        moves = {}
+        while not self._stop.is_set():
+            ready, _, _ = select.select([self._fd], [], [], 0.5)
+            if not ready:
+                continue
+            try:
+                data = os.read(self._fd, 64 * 1024)
+            except BlockingIOError:
+                continue
+            offset = 0
+            while offset < len(data):
+                _, mask, cookie, length = EVENT_HEADER.unpack_from(data, offset)
+                offset += EVENT_HEADER.size
+                name = data[offset:offset + length].rstrip(b"\0").decode(errors="replace")
+                offset += length
+                if mask & IN_CREATE:
+                    self._on_created(name)
+                elif mask & IN_CLOSE_WRITE:
+                    self._on_closed(name)
+                elif mask & IN_MOVED_FROM:
+                    moves[cookie] = name
+                elif mask & IN_MOVED_TO:
+                    old_name = moves.pop(cookie, None)
+                    if old_name is None:
+                        self._on_closed(name)
+                    else:
+                        self._on_moved(old_name, name)
+                elif mask & IN_DELETE:
+                    self._on_deleted(name)
+            # Arquivos movidos para fora do diretório equivalem a remoções
+            for name in moves.values():
+                self._on_deleted(name)
+            moves.clear()
+
+    def _list_dir(self):
+        """
+        Lista o diretório com o inode de cada arquivo, usado para reconhecer as renomeações entre varreduras.
+        """
+        files = {}
+        with os.scandir(self.download_dir) as entries:
+            for entry in entries:
+                try:
+                    files[entry.name] = entry.inode()
+                except OSError:
+                    # Arquivo removido durante a listagem
+                    pass
+        return files
+
+    def _poll_loop(self):
+        while not self._stop.wait(self.poll_interval):
+            current = self._list_dir()
+            added = {name: current[name] for name in current.keys() - self._known.keys()}
+            removed = {name: self._known[name] for name in self._known.keys() - current.keys()}
+            self._known = current
+            # Um arquivo renomeado mantém o inode: o nome removido e o novo são o mesmo arquivo. Assim, o
+            # arquivo renomeado pelo script depois do download não é confundido com um download novo
+            new_names = {inode: name for name, inode in added.items() if inode}
+            for old_name, inode in sorted(removed.items()):
+                new_name = new_names.pop(inode, None) if inode else None
+                if new_name is not None:
+                    del added[new_name], removed[old_name]
+                    self._on_moved(old_name, new_name)
+            for old_name in sorted(removed):
+                if not is_temporary_file(old_name):
+                    continue
+                # Sem o inode, associa o temporário removido ao arquivo novo mais provável
+                final_name = None
+                if old_name.endswith(BROWSER_TEMPORARY_SUFFIX):
+                    final_name = old_name[:-len(BROWSER_TEMPORARY_SUFFIX)]
+                if final_name not in added:
+                    candidates = sorted((n for n in added if not self._is_owned(n)),
+                                        key=lambda n: not is_temporary_file(n))
+                    final_name = candidates[0] if candidates else None
+                if final_name is None:
+                    self._on_deleted(old_name)
+                    continue
+                del added[final_name]
+                self._on_moved(old_name, final_name)
+            for name in sorted(added):
+                if is_temporary_file(name):
+                    self._on_created(name)
+                else:
+                    self._on_closed(name)